@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yuklash benchmarki: to'liq (eager) va lazy yuklash vaqti hamda eng yuqori RSS
+
+Ishlatish:
+    python -m benchmarks.bench_load --users 20000 --messages 50
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+from config import Settings
+from database import MessageDatabase, peak_rss_mb, SNAPSHOT_FORMAT
+
+
+def generate(path: Path, users: int, messages: int):
+    """Sintetik snapshot faylini yaratish"""
+    with open(path, 'wb') as f:
+        f.write(b"{\n")
+        f.write(b'"_meta": ' + json.dumps({"seq": 0, "format": SNAPSHOT_FORMAT}).encode())
+        for user_id in range(users):
+            msgs = [
+                {"text": f"Salom, bu {i}-xabar", "timestamp": 1704110400,
+                 "type": "user" if i % 2 == 0 else "admin", "message_id": i}
+                for i in range(messages)
+            ]
+            header = json.dumps({
+                "user_info": {"id": user_id, "first_name": f"User{user_id}",
+                              "first_contact": 1704110400},
+                "stats": {"total_messages": messages, "last_message": 1704110400,
+                          "last_activity": 1704110400},
+                "message_count": messages,
+                "last_type": msgs[-1]["type"] if msgs else None
+            }, separators=(',', ':')).encode()
+            f.write(b",\n" + json.dumps(str(user_id)).encode() + b": ")
+            f.write(header[:-1] + b',"messages":' + json.dumps(msgs, separators=(',', ':')).encode() + b"}")
+        f.write(b"\n}\n")
+
+
+def run_child(path: Path, lazy: bool):
+    """Bitta jarayonda yuklash va natijani chop etish"""
+    Settings.LAZY_LOAD = lazy
+
+    async def load():
+        db = MessageDatabase(path, journal_path=path.with_suffix(".bench.journal"))
+        started = time.perf_counter()
+        count = await db.get_users_count()
+        elapsed = time.perf_counter() - started
+        print(json.dumps({"users": count, "seconds": elapsed, "rss_mb": peak_rss_mb()}))
+
+    asyncio.run(load())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot yuklash benchmarki")
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--child", choices=["eager", "lazy"])
+    parser.add_argument("--file", type=Path)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.file, args.child == "lazy")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.json"
+        generate(path, args.users, args.messages)
+        size_mb = path.stat().st_size / 1024 / 1024
+        print(f"📄 {args.users} foydalanuvchi, {args.users * args.messages} xabar, {size_mb:.1f} MB")
+
+        for mode in ("eager", "lazy"):
+            # Har bir rejim alohida jarayonda: RSS bir-biriga ta'sir qilmasin
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_load", "--child", mode, "--file", str(path)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:>5}: {result['seconds']:.2f} s, eng yuqori RSS {result['rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
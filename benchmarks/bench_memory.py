@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Xotira benchmarki: bitta xabar uchun sarflanadigan baytlar
+
+Eski ``@dataclass`` ko'rinishidagi xabar bilan hozirgi ``__slots__``
+asosidagi ``Message`` solishtiriladi. Xabarlar snapshotdagi kabi JSON
+dict'lardan yaratiladi.
+
+Ishlatish:
+    python -m benchmarks.bench_memory --messages 200000
+"""
+
+import gc
+import json
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from database import Message
+
+
+@dataclass
+class LegacyMessage:
+    """Avvalgi xabar ko'rinishi (har bir nusxada __dict__)"""
+    text: str
+    timestamp: str
+    type: str
+    message_id: Optional[int] = None
+
+
+def make_payload(count: int) -> str:
+    """Snapshotdagi kabi xabarlar JSON massivi"""
+    return json.dumps([
+        {"text": f"Salom, bu {i}-xabar", "timestamp": f"2024-01-{1 + i % 28:02d} 12:{i % 60:02d}:{i % 47:02d}",
+         "type": "user" if i % 2 == 0 else "admin", "message_id": i}
+        for i in range(count)
+    ])
+
+
+def measure(cls, count: int) -> float:
+    """JSON'dan yaratilgan xabar obyektlari egallagan xotira (bayt/xabar)"""
+    payload = make_payload(count)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = json.loads(payload)
+    messages = [cls(**record) for record in records]
+    del records  # Endi faqat obyektlarda saqlangan qismlar qoladi
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del messages
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Xabar obyektlari xotirasi")
+    parser.add_argument("--messages", type=int, default=200000)
+    args = parser.parse_args()
+
+    legacy = measure(LegacyMessage, args.messages)
+    compact = measure(Message, args.messages)
+    print(f"📦 {args.messages} xabar")
+    print(f"  @dataclass: {legacy:.0f} bayt/xabar")
+    print(f"  __slots__:  {compact:.0f} bayt/xabar ({100 * (1 - compact / legacy):.0f}% kam)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/messages ko'rinishi benchmarki: xabarlar ro'yxatidan va UserStats xulosasidan
+
+Avvalgi usul har bir foydalanuvchi uchun barcha xabarlarni aylanib chiqib
+hisoblagich va so'nggi xabar ko'rinishini tuzardi; yangi usul faqat
+xulosadagi tayyor qiymatlarni o'qiydi.
+
+Ishlatish:
+    python -m benchmarks.bench_messages --users 10000 --messages 50
+"""
+
+import time
+import random
+import argparse
+from typing import Dict, List
+
+from database import Message, UserData, UserInfo, UserStats
+from utils import escape_html
+
+
+def generate(users: int, messages: int) -> Dict[str, UserData]:
+    """Sintetik foydalanuvchilar, xulosalari xabarlardan hisoblangan"""
+    rng = random.Random(42)
+    base = 1704067200
+    data = {}
+    for user_id in range(users):
+        msgs = [
+            Message(f"<i>Salom</i>, bu {i}-xabar " + "matn " * rng.randrange(20),
+                    base + i, "user" if rng.random() < 0.6 else "admin")
+            for i in range(messages)
+        ]
+        stats = UserStats(total_messages=sum(1 for m in msgs if m.type == "user"),
+                          last_activity=base + messages)
+        stats.rebuild_summary(msgs)
+        data[str(user_id)] = UserData(
+            user_info=UserInfo(id=user_id, first_name=f"User{user_id}", first_contact=base),
+            messages=msgs,
+            stats=stats
+        )
+    return data
+
+
+def render_messages(users: List[tuple]) -> str:
+    """Avvalgi usul: xabarlar ro'yxatidan hisoblash"""
+    text = ""
+    for user_id, user_data in users:
+        user_info = user_data.user_info
+        messages = user_data.messages
+        user_messages = [m for m in messages if m.type == "user"]
+        admin_replies = [m for m in messages if m.type == "admin"]
+
+        status_emoji = ""
+        last_message = ""
+        if messages:
+            last_msg = messages[-1]
+            last_message = escape_html(last_msg.text[:50])
+            if len(last_msg.text) > 50:
+                last_message += "..."
+            if last_msg.type == 'user':
+                status_emoji = "❗️"
+
+        text += f"""
+👤 <b>{escape_html(user_info.first_name)} {escape_html(user_info.last_name or '')}</b>
+🆔 ID: <code>{user_id}</code>
+📱 @{user_info.username or 'Mavjud emas'}
+💬 Xabarlar: {len(user_messages)} | Javoblar: {len(admin_replies)}
+📝 So'nggi: {last_message} {status_emoji}
+➡️ <code>/reply {user_id}</code>
+"""
+    return text
+
+
+def render_summary(users: List[tuple]) -> str:
+    """Yangi usul: UserStats xulosasidan"""
+    text = ""
+    for user_id, user_data in users:
+        user_info = user_data.user_info
+        user_stats = user_data.stats
+        status_emoji = "❗️" if user_stats.last_sender == "user" else ""
+
+        text += f"""
+👤 <b>{escape_html(user_info.first_name)} {escape_html(user_info.last_name or '')}</b>
+🆔 ID: <code>{user_id}</code>
+📱 @{user_info.username or 'Mavjud emas'}
+💬 Xabarlar: {user_stats.total_messages} | Javoblar: {user_stats.admin_replies}
+📝 So'nggi: {user_stats.last_preview} {status_emoji}
+➡️ <code>/reply {user_id}</code>
+"""
+    return text
+
+
+def timed(func, *args, repeat: int = 5) -> float:
+    """Eng yaxshi urinish vaqti (ms)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/messages ko'rinishi benchmarki")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--page", type=int, default=5, help="sahifadagi foydalanuvchilar")
+    args = parser.parse_args()
+
+    data = generate(args.users, args.messages)
+    users = list(data.items())
+    assert render_messages(users[:100]) == render_summary(users[:100])
+
+    print(f"\n👥 {args.users} foydalanuvchi, har birida {args.messages} xabar")
+    print(f"{'ko`rinish':<24}{'xabarlardan, ms':>17}{'xulosadan, ms':>16}")
+    for label, chunk in (("barcha foydalanuvchilar", users), (f"sahifa ({args.page})", users[:args.page])):
+        repeat = 3 if len(chunk) > 1000 else 200
+        old_ms = timed(render_messages, chunk, repeat=repeat)
+        new_ms = timed(render_summary, chunk, repeat=repeat)
+        print(f"{label:<24}{old_ms:>17.3f}{new_ms:>16.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chiquvchi xabarlar benchmarki: soxta Bot API (tools/fake_bot_api.py) ustida
+
+Avvalgi usul har bir xabarni handler ichida darhol yuborib, 429 olsa
+``retry_after`` kutib qayta urinardi; yangi usul barcha chaqiruvlarni
+``OutboundScheduler`` orqali chegaralar ichida yuboradi. Ikkalasida ham
+bildirishnomalar oqimi ortidan admin javoblari yuboriladi va ularning
+yetkazilish vaqti o'lchanadi.
+
+Ishlatish:
+    python -m benchmarks.bench_outbound --chats 50 --messages 200 --replies 20
+"""
+
+import time
+import asyncio
+import argparse
+from typing import List, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+
+from outbound import OutboundScheduler, PRIORITY_NOTIFY, PRIORITY_REPLY
+from tools.fake_bot_api import FakeBotAPI, start_server
+
+
+def workload(chats: int, messages: int, replies: int) -> List[Tuple[int, int]]:
+    """(chat_id, ustuvorlik): avval bildirishnomalar, keyin javoblar"""
+    jobs = [(i % chats + 1, PRIORITY_NOTIFY) for i in range(messages)]
+    jobs += [(10_000 + i, PRIORITY_REPLY) for i in range(replies)]
+    return jobs
+
+
+async def run_direct(bot: Bot, jobs: List[Tuple[int, int]], args) -> List[float]:
+    """Avvalgi usul: hammasi birdaniga, 429 da retry_after kutib qayta urinish"""
+    started = time.perf_counter()
+
+    async def send(chat_id: int) -> float:
+        while True:
+            try:
+                await bot.send_message(chat_id=chat_id, text="x")
+                return time.perf_counter() - started
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+
+    return await asyncio.gather(*[send(chat_id) for chat_id, _ in jobs])
+
+
+async def run_scheduler(bot: Bot, jobs: List[Tuple[int, int]], args) -> List[float]:
+    """Yangi usul: OutboundScheduler navbati"""
+    scheduler = OutboundScheduler(rate=args.global_rate, chat_interval=args.chat_interval)
+    scheduler.start(bot)
+    started = time.perf_counter()
+    done = [0.0] * len(jobs)
+
+    def finished(index: int):
+        def callback(future):
+            done[index] = time.perf_counter() - started
+        return callback
+
+    futures = []
+    for index, (chat_id, priority) in enumerate(jobs):
+        future = scheduler.submit("send_message", chat_id, priority, text="x")
+        future.add_done_callback(finished(index))
+        futures.append(future)
+    await asyncio.gather(*futures)
+    await scheduler.close()
+    return done
+
+
+async def run(args):
+    api = FakeBotAPI(args.global_rate, args.chat_interval, args.latency)
+    runner = await start_server(api)
+    host, port = runner.addresses[0][:2]
+    bot = Bot("1:fake", session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://{host}:{port}")))
+    jobs = workload(args.chats, args.messages, args.replies)
+
+    print(f"\n📤 {args.messages} bildirishnoma ({args.chats} chat) + {args.replies} javob, "
+          f"kechikish {args.latency * 1000:.0f} ms")
+    print(f"{'usul':<12}{'jami, s':>10}{'javoblar, s':>14}{'429':>8}")
+    try:
+        for label, func in (("to'g'ridan", run_direct), ("navbat", run_scheduler)):
+            api.stats.clear()
+            # Oldingi usul qoldirgan chat oraliqlari tugashini kutish
+            await asyncio.sleep(args.chat_interval + 1)
+            done = await func(bot, jobs, args)
+            replies = max(done[-args.replies:]) if args.replies else 0.0
+            print(f"{label:<12}{max(done):>10.2f}{replies:>14.2f}{api.stats['429']:>8}")
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chiquvchi xabarlar benchmarki")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--replies", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--global-rate", type=float, default=30)
+    parser.add_argument("--chat-interval", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yo'naltirish benchmarki: lambda filtrli handlerlar va kontent jadvali
+
+Avvalgi usulda har bir kontent turi uchun user va admin handlerlari alohida
+ro'yxatdan o'tgan edi (``F.<tur> & F.from_user.func(lambda ...)``) va aiogram
+mos handler topilguncha filtrlarni ketma-ket tekshirardi. Yangi usulda
+``ContentRoute`` (rol, kontent turi) jadvalidan handlerni bitta qidiruv bilan
+topadi. Ikkala routerda ham bir xil komandalar va bo'sh handlerlar, shuning
+uchun faqat yangilanishni yo'naltirish vaqti o'lchanadi.
+
+Ishlatish:
+    python -m benchmarks.bench_routing --updates 5000
+"""
+
+import time
+import asyncio
+import logging
+import argparse
+from typing import Dict, List, Tuple
+
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.filters import Command, CommandStart
+from aiogram.types import Update
+
+from config import ADMIN_ID, MediaTypes
+from handlers import CONTENT_ROUTES, ContentRoute, USER_MEDIA_TYPES, ADMIN_MEDIA_TYPES
+from utils import is_admin
+
+COMMANDS = ("help", "messages", "stats", "next", "reply", "search", "backup")
+
+# (nomi, yuboruvchi, xabar maydonlari)
+SAMPLES: List[Tuple[str, int, dict]] = [
+    ("user text", 1001, {"text": "salom"}),
+    ("user photo", 1001, {"photo": [{"file_id": "p", "file_unique_id": "p", "width": 1, "height": 1}]}),
+    ("user document", 1001, {"document": {"file_id": "d", "file_unique_id": "d"}}),
+    ("user dice", 1001, {"dice": {"emoji": "🎲", "value": 3}}),
+    ("admin text", ADMIN_ID, {"text": "javob"}),
+    ("admin contact", ADMIN_ID, {"contact": {"phone_number": "1", "first_name": "A"}}),
+]
+
+
+async def noop(*args, **kwargs):
+    """Bo'sh handler"""
+
+
+def add_commands(router: Router):
+    router.message(CommandStart())(noop)
+    for command in COMMANDS:
+        router.message(Command(command))(noop)
+
+
+def legacy_router() -> Router:
+    """Avvalgi usul: har bir (rol, tur) uchun lambda filtrli handler"""
+    router = Router()
+    add_commands(router)
+    for media_type in USER_MEDIA_TYPES[:5] + (MediaTypes.DOCUMENT,) + USER_MEDIA_TYPES[5:]:
+        router.message(getattr(F, media_type) & F.from_user.func(lambda user: not is_admin(user.id)))(noop)
+    for media_type in ADMIN_MEDIA_TYPES:
+        router.message(getattr(F, media_type) & F.from_user.func(lambda user: is_admin(user.id)))(noop)
+    router.message(F.text & F.from_user.func(lambda user: is_admin(user.id)))(noop)
+    router.message(F.text & F.from_user.func(lambda user: not is_admin(user.id)))(noop)
+    return router
+
+
+def table_router() -> Router:
+    """Yangi usul: bitta handler va (rol, kontent turi) jadvali"""
+    router = Router()
+    add_commands(router)
+    router.message(ContentRoute({key: noop for key in CONTENT_ROUTES}))(noop)
+    return router
+
+
+def make_update(index: int, user_id: int, fields: dict) -> Update:
+    return Update.model_validate({
+        "update_id": index,
+        "message": {
+            "message_id": index, "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+            **fields,
+        },
+    })
+
+
+async def measure(router: Router, bot: Bot, update: Update, count: int) -> float:
+    """Bitta yangilanishni yo'naltirish vaqti (mikrosoniya)"""
+    dp = Dispatcher()
+    dp.include_router(router)
+    for _ in range(100):
+        await dp.feed_update(bot, update)
+    started = time.perf_counter()
+    for _ in range(count):
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - started) / count * 1_000_000
+
+
+async def run(args):
+    # aiogram har bir yangilanishni INFO darajasida yozadi
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+    bot = Bot("1:fake")
+    results: Dict[str, Tuple[float, float]] = {}
+    for index, (label, user_id, fields) in enumerate(SAMPLES):
+        update = make_update(index, user_id, fields)
+        legacy = await measure(legacy_router(), bot, update, args.updates)
+        table = await measure(table_router(), bot, update, args.updates)
+        results[label] = (legacy, table)
+    await bot.session.close()
+
+    print(f"\n🧭 {args.updates} yangilanish har bir tur uchun")
+    print(f"{'tur':<16}{'lambda, µs':>12}{'jadval, µs':>12}{'tezlanish':>11}")
+    for label, (legacy, table) in results.items():
+        print(f"{label:<16}{legacy:>12.1f}{table:>12.1f}{legacy / table:>10.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yo'naltirish benchmarki")
+    parser.add_argument("--updates", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
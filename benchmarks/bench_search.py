@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Qidiruv benchmarki: chiziqli skanerlash va trigram indeks
+
+Skanerlash ``query.lower() in text.lower()`` bo'lgani uchun kirill yoki
+boshqa tutuq belgili so'rovlarda kamroq natija topadi; jadvalda ikkala
+usulning natijalar soni ham ko'rsatiladi.
+
+Ishlatish:
+    python -m benchmarks.bench_search --sizes 100000 1000000
+"""
+
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+from database import Message
+from search_index import SearchIndex
+
+WORDS = [
+    "salom", "rahmat", "buyurtma", "yetkazish", "narx", "to'lov", "karta", "muammo",
+    "ilova", "parol", "hisob", "kirish", "xato", "yordam", "savol", "javob", "telefon",
+    "manzil", "vaqt", "bugun", "ertaga", "kecha", "tez", "sekin", "ishlamayapti",
+    "тўлов", "ёрдам", "қўнғироқ", "o‘zgartirish", "oʻchirish",
+] + [f"so'z{i}" for i in range(5000)]
+
+QUERIES = ["parol", "pa", "karta to'lov", "ishlamayapti ilova", "qo'ng'iroq", "ўзгартириш",
+           "so'z4999", "yo'qso'z"]
+
+
+def generate(count: int, users: int = 1000) -> List[Tuple[str, Message]]:
+    """Sintetik xabarlar: (user_id, Message), vaqt bo'yicha tartiblangan"""
+    rng = random.Random(42)
+    base = 1704067200
+    return [
+        (str(rng.randrange(users)),
+         Message(" ".join(rng.choices(WORDS, k=8)), base + i, "user" if i % 3 else "admin"))
+        for i in range(count)
+    ]
+
+
+def linear_search(items: List[Tuple[str, Message]], query: str, limit: int) -> list:
+    """Avvalgi usul: har bir xabarda kichik harfli substring qidirish"""
+    results = []
+    query_lower = query.lower()
+    for user_id, message in items:
+        if query_lower in message.text.lower():
+            results.append((user_id, message))
+            if len(results) >= limit:
+                break
+    return results
+
+
+def timed(func, *args, repeat: int = 5) -> Tuple[float, int]:
+    """Eng yaxshi urinish vaqti (ms) va natijalar soni"""
+    best, found = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        found = len(func(*args))
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Qidiruv benchmarki")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        items = generate(size)
+        started = time.perf_counter()
+        index = SearchIndex.build(items)
+        print(f"\n📚 {size} xabar, indeks qurish: {time.perf_counter() - started:.2f} s")
+        print(f"{'so`rov':<22}{'skanerlash, ms':>16}{'topildi':>9}{'indeks, ms':>12}{'topildi':>9}")
+        for query in QUERIES:
+            scan_ms, scan_found = timed(linear_search, items, query, args.limit, repeat=1)
+            index_ms, index_found = timed(index.search, query, args.limit)
+            print(f"{query:<22}{scan_ms:>16.2f}{scan_found:>9}{index_ms:>12.3f}{index_found:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bloklangan foydalanuvchilar ro'yxati (aiogram 3.8)
+Middleware uchun xotiradagi ixcham to'plam, alohida kichik faylda saqlanadi
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Blocklist:
+    """Bloklangan foydalanuvchilar ID to'plami
+
+    Asosiy ma'lumot bazada (``UserInfo.is_blocked``) qoladi; bu ro'yxat
+    uning nusxasi bo'lib, bazani yuklamasdan tekshirish uchun ishga tushishda
+    alohida fayldan o'qiladi. Baza yuklangach ``reset`` bilan solishtiriladi.
+    """
+
+    def __init__(self, path: Path):
+        """Ro'yxat faylini o'qish (fayl bo'lmasa ``loaded`` False qoladi)"""
+        self.path = path
+        self._user_ids: Set[int] = set()
+        self.loaded = False
+        try:
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._user_ids = set(json.load(f))
+                self.loaded = True
+        except Exception as e:
+            logger.error(f"Bloklanganlar ro'yxatini o'qishda xatolik: {e}")
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._user_ids
+
+    def __len__(self) -> int:
+        return len(self._user_ids)
+
+    def set_blocked(self, user_id: int, blocked: bool):
+        """Bitta foydalanuvchi holatini xotirada o'zgartirish"""
+        if blocked:
+            self._user_ids.add(user_id)
+        else:
+            self._user_ids.discard(user_id)
+
+    def reset(self, user_ids: Iterable[int]) -> bool:
+        """Bazadagi holat bilan almashtirish; o'zgargan bo'lsa True"""
+        user_ids = set(user_ids)
+        changed = not self.loaded or user_ids != self._user_ids
+        self._user_ids = user_ids
+        self.loaded = True
+        return changed
+
+    def save(self):
+        """Faylni vaqtinchalik nusxa orqali atomar yozish"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(self._user_ids), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
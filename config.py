@@ -45,10 +45,24 @@ BACKUP_DIR.mkdir(exist_ok=True)
 MEDIA_DIR = BASE_DIR / "media"
 MEDIA_DIR.mkdir(exist_ok=True)
 
+# Foydalanuvchi bo'yicha bo'lingan saqlash papkasi (STORAGE_LAYOUT=sharded)
+USERS_DIR = DATA_DIR / "users"
+
 # Fayllar
 MESSAGES_FILE = DATA_DIR / "messages.json"
+# Chiquvchi xabarlar navbati jurnali (yetkazilmaganlar qayta ishga tushishda tiklanadi)
+OUTBOX_FILE = DATA_DIR / "outbox.journal"
 LOG_FILE = LOGS_DIR / "bot.log"
 
+# Ma'lumotlar bazasi turi: "json" (messages.json + jurnal) yoki "sqlite"
+DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "json").lower()
+
+# Ma'lumotlar bazasi fayli
+DATABASE_PATH = BASE_DIR / os.getenv(
+    "DATABASE_PATH",
+    "data/messages.db" if DATABASE_BACKEND == "sqlite" else "data/messages.json"
+)
+
 
 # =============================================================================
 # MATN SOZLAMALARI
@@ -92,6 +106,7 @@ Siz bot administratorisiz va to'liq nazoratga egasiz.
 
 ⚡ <b>Tezkor komandalar:</b>
 • /messages - Barcha xabarlarni ko'rish
+• /next - Eng uzoq kutayotgan suhbat
 • /stats - Bot statistikasi
 • /backup - Ma'lumotlar zaxirasi
 • /help - To'liq yordam
@@ -154,11 +169,19 @@ Fayl bilan birga izoh ham yozishingiz mumkin!
 
 🔹 <b>Admin komandalar:</b>
 • <code>/messages</code> - Barcha xabarlarni ko'rish
+• <code>/next</code> - Eng uzoq kutayotgan suhbatni olish
 • <code>/stats</code> - Bot statistikasi
 • <code>/reply &lt;user_id&gt; &lt;xabar&gt;</code> - Javob berish
 • <code>/search &lt;so'z&gt;</code> - Xabarlarda qidirish
 • <code>/backup</code> - Ma'lumotlar zaxirasi
 
+🔹 <b>Qidiruv filtrlari:</b>
+• <code>from:&lt;user_id&gt;</code> - faqat shu foydalanuvchi
+• <code>since:2026-09-01</code>, <code>until:2026-09-30</code> - sana oralig'i
+• <code>type:admin</code> yoki <code>type:user</code> - yuboruvchi
+• <code>media:photo</code> - media turi (video, voice, document...)
+Misol: <code>/search to'lov from:123456789 since:2026-09-01</code>
+
 🔹 <b>Javob berish misoli:</b>
 <code>/reply 123456789 Salom! Sizning savolingizga javob...</code>
 
@@ -182,6 +205,23 @@ Javob berishda doim mehribon va professional bo'ling!
 🙏 Sabr qilganingiz uchun rahmat!
 """
 
+    # Admin javobi yuborish navbatiga qo'yildi
+    REPLY_QUEUED = "📤 Javob saqlandi va yuborish navbatiga qo'yildi."
+
+    # Yuklama paytida tasdiq o'rniga (bir marta)
+    BUSY_STORED = "📥 Xabaringiz saqlandi. Hozir murojaatlar ko'p, javob biroz kechikishi mumkin."
+
+    # Yuklama paytida qoldirilgan bildirishnomalar o'rniga adminga
+    DEFERRED_NOTIFICATIONS = """
+🚦 <b>Yuklama tugadi</b>
+
+Yuklama paytida {users} ta foydalanuvchidan {messages} ta xabar keldi.
+Ular saqlangan: /messages yoki /next orqali ko'ring.
+"""
+
+    # Takroriy xabar: yangi yozuv va admin bildirishnomasi yaratilmaydi
+    DUPLICATE_RECEIVED = "☑️ Bu xabar allaqachon qabul qilingan ({count}-marta yuborildi). Javobni kuting."
+
     # Admin bildirish
     @staticmethod
     def admin_notification(user, message_text, timestamp, user_id):
@@ -248,6 +288,7 @@ class Errors:
     USER_NOT_FOUND = "❌ Bunday foydalanuvchi topilmadi!"
     REPLY_SUCCESS = "✅ Javob muvaffaqiyatli yuborildi!"
     REPLY_ERROR = "❌ Javob yuborishda xatolik yuz berdi!"
+    REPLY_DELIVERY_FAILED = "❌ Foydalanuvchiga (<code>{user_id}</code>) javob yetkazilmadi: {error}"
     GENERAL_ERROR = "❌ Kutilmagan xatolik yuz berdi!"
     NO_SEARCH_RESULTS = "🔍 Qidiruv natijasi topilmadi"
     BACKUP_SUCCESS = "💾 Ma'lumotlar zaxirasi yaratildi!"
@@ -260,6 +301,14 @@ class Errors:
     MEDIA_PROCESSING_ERROR = "❌ Media faylni qayta ishlashda xatolik!"
     DOWNLOAD_ERROR = "❌ Faylni yuklashda xatolik!"
 
+    # Yuklama: yangilanish navbatga olinmadi
+    OVERLOADED = "⏳ Hozir murojaatlar juda ko'p. Iltimos, birozdan keyin qayta yozing."
+
+    # Spam himoya xabarlari
+    RATE_LIMITED = "⏳ Juda ko'p xabar! {seconds} soniyadan keyin qayta yuboring."
+    DAILY_LIMIT_REACHED = "🚫 Kunlik xabarlar chegarasi ({limit} ta) tugadi. Ertaga qayta yozing."
+    IDENTICAL_MESSAGES = "⚠️ Bir xil xabarni qayta-qayta yubormang!"
+
 
 # =============================================================================
 # BOT SOZLAMALARI
@@ -277,11 +326,24 @@ class Settings:
     # Maksimal xabar uzunligi
     MAX_MESSAGE_LENGTH = 4000
 
+    # Maksimal izoh uzunligi (Telegram chegarasi 1024)
+    MAX_CAPTION_LENGTH = 1000
+
     # Kuniga maksimal xabarlar soni
-    DAILY_MESSAGE_LIMIT = 50
+    DAILY_MESSAGE_LIMIT = int(os.getenv("DAILY_MESSAGE_LIMIT", "50"))
+
+    # Spam himoya - minimum vaqt (soniya): tezroq kelgan xabarlar shu
+    # oraliq bilan navbatga qo'yiladi (0 - o'chirilgan)
+    MIN_MESSAGE_INTERVAL = float(os.getenv("MIN_MESSAGE_INTERVAL", "5"))
+
+    # Takroriy xabarlar: foydalanuvchining shuncha so'nggi xabari bilan
+    # solishtiriladi, bir xillari yangi yozuv o'rniga hisoblagichga qo'shiladi
+    DUPLICATE_WINDOW = int(os.getenv("DUPLICATE_WINDOW", "5"))
 
-    # Spam himoya - minimum vaqt (soniya)
-    MIN_MESSAGE_INTERVAL = 5
+    # Xotirada kuzatiladigan foydalanuvchilar soni va ularning faolsizlik
+    # muddati (soniya): eskilari avval o'chiriladi
+    RATE_LIMIT_MAX_USERS = int(os.getenv("RATE_LIMIT_MAX_USERS", "100000"))
+    RATE_LIMIT_IDLE_SECONDS = int(os.getenv("RATE_LIMIT_IDLE_SECONDS", "86400"))
 
     # Media sozlamalari
     # Ruxsat etilgan fayl turlari
@@ -304,6 +366,84 @@ class Settings:
     # Auto backup vaqti (soat)
     AUTO_BACKUP_HOURS = 24
 
+    # Jurnal nechta yozuvdan keyin messages.json snapshotiga siqiladi
+    JOURNAL_COMPACT_EVERY = int(os.getenv("JOURNAL_COMPACT_EVERY", "1000"))
+
+    # JSON saqlash tartibi: "single" (bitta messages.json) yoki
+    # "sharded" (data/users/<id>.json + index.json)
+    STORAGE_LAYOUT = os.getenv("STORAGE_LAYOUT", "single").lower()
+
+    # Ishga tushishda faqat foydalanuvchi sarlavhalarini o'qish, xabarlarni
+    # esa foydalanuvchi birinchi marta so'ralganda yuklash
+    LAZY_LOAD = os.getenv("LAZY_LOAD", "False").lower() == "true"
+
+    # /search natijalarining bitta sahifasidagi xabarlar soni
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+
+    # /messages ning bitta sahifasidagi foydalanuvchilar soni
+    USERS_PAGE_SIZE = int(os.getenv("USERS_PAGE_SIZE", "5"))
+
+    # Guruhli yozish: shu oyna (ms) ichidagi o'zgarishlar bitta yozishda saqlanadi
+    GROUP_COMMIT_WINDOW_MS = int(os.getenv("GROUP_COMMIT_WINDOW_MS", "100"))
+
+    # Bitta yozishdagi maksimal o'zgarishlar soni (to'lsa oyna kutilmaydi)
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "200"))
+
+    # Bir vaqtda ishlanadigan yangilanishlar (bitta chatniki doim ketma-ket)
+    UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "50"))
+
+    # Yuklama darajalari (navbatdagi yangilanishlar soni, 0 - o'chirilgan):
+    # bildirishnomalarni qoldirish, komandalar/callback'larni tashlash va
+    # foydalanuvchi yangilanishlarini umuman qabul qilmaslik
+    DEFER_NOTIFICATIONS_AT = int(os.getenv("DEFER_NOTIFICATIONS_AT", "100"))
+    SHED_LOW_PRIORITY_AT = int(os.getenv("SHED_LOW_PRIORITY_AT", "500"))
+    INBOUND_QUEUE_LIMIT = int(os.getenv("INBOUND_QUEUE_LIMIT", "2000"))
+
+    # Chiquvchi navbatda shuncha xabar to'planganda ham bildirishnomalar qoldiriladi
+    OUTBOUND_BACKLOG_LIMIT = int(os.getenv("OUTBOUND_BACKLOG_LIMIT", "500"))
+
+    # Yangilanishlarni qabul qilish: "polling" yoki "webhook"
+    BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+    # Webhook: tashqi manzil (https://example.com), yo'l, maxfiy token va tinglash manzili
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+
+    # To'xtashda boshlangan yangilanishlar tugashini kutish (soniya)
+    WEBHOOK_DRAIN_SECONDS = float(os.getenv("WEBHOOK_DRAIN_SECONDS", "10"))
+
+    # Qabul qilingan yangilanishlarni JSONL faylga yozish (tools/replay_updates.py uchun)
+    WEBHOOK_RECORD_PATH = os.getenv("WEBHOOK_RECORD_PATH", "")
+
+    # Polling boshlanishida to'xtab turgan paytdagi yangilanishlarni tashlab yuborish
+    DROP_PENDING_UPDATES = os.getenv("DROP_PENDING_UPDATES", "False").lower() == "true"
+
+    # Bot API server manzili (bo'sh - api.telegram.org); sinov uchun
+    # tools/fake_bot_api.py, masalan: http://127.0.0.1:8081
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+    # Chiquvchi xabarlar: Telegram'ga soniyasiga umumiy chaqiruvlar soni
+    OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+
+    # Bitta chatga ketma-ket yuborishlar orasidagi minimal oraliq (soniya)
+    OUTBOUND_CHAT_INTERVAL = float(os.getenv("OUTBOUND_CHAT_INTERVAL", "1"))
+
+    # Retry-after va tarmoq xatolarida qayta urinishlar soni va maksimal kutish (soniya);
+    # tarmoq xatolarida kutish har safar ikki barobar oshadi: 1, 2, 4, ...
+    OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "8"))
+    OUTBOUND_MAX_BACKOFF = float(os.getenv("OUTBOUND_MAX_BACKOFF", "300"))
+
+    # Navbat jurnali nechta yozuvdan keyin siqiladi va takrorlanishni oldini
+    # olish uchun nechta yetkazilgan kalit eslab qolinadi
+    OUTBOX_COMPACT_EVERY = int(os.getenv("OUTBOX_COMPACT_EVERY", "1000"))
+    OUTBOX_KEEP_DONE = int(os.getenv("OUTBOX_KEEP_DONE", "1000"))
+
+    # To'xtashda navbatdagi xabarlarni yetkazish uchun kutish (soniya)
+    OUTBOUND_DRAIN_SECONDS = float(os.getenv("OUTBOUND_DRAIN_SECONDS", "10"))
+
     # Media papka sozlamalari
     SAVE_MEDIA_FILES = os.getenv("SAVE_MEDIA_FILES", "False").lower() == "true"
     MAX_MEDIA_STORAGE = 500  # MB
@@ -364,6 +504,13 @@ class MediaTypes:
         DICE: "O'yin"
     }
 
+    # Izoh (caption) qo'yish mumkin bo'lgan turlar: copy_message izoh bilan
+    CAPTIONED = frozenset({PHOTO, VIDEO, AUDIO, VOICE, DOCUMENT, ANIMATION})
+
+    # Nusxalab bo'lmaydigan yoki nusxada qiymati o'zgaradigan turlar
+    # (viktorina so'rovnomasi, zar): faqat forward qilinadi
+    FORWARD_ONLY = frozenset({POLL, DICE})
+
 
 # =============================================================================
 # CALLBACK DATA
@@ -418,9 +565,9 @@ class Formats:
 class Security:
     """Xavfsizlik sozlamalari"""
 
-    # Spam himoya
-    MAX_MESSAGES_PER_MINUTE = 5
-    MAX_IDENTICAL_MESSAGES = 3
+    # Spam himoya: daqiqalik token chelagi hajmi va ketma-ket bir xil xabarlar
+    MAX_MESSAGES_PER_MINUTE = int(os.getenv("MAX_MESSAGES_PER_MINUTE", "5"))
+    MAX_IDENTICAL_MESSAGES = int(os.getenv("MAX_IDENTICAL_MESSAGES", "3"))
 
     # Fayl xavfsizligi
     SCAN_FILES = True
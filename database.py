@@ -5,46 +5,231 @@ Ma'lumotlar bazasi moduli (aiogram 3.8)
 Foydalanuvchi xabarlarini saqlash va boshqarish
 """
 
+import gc
+import os
+import sys
 import json
+import time
+import shutil
 import logging
 import asyncio
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+import itertools
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional, Any, Iterator, Tuple
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 
-from config import MESSAGES_FILE, Settings, Formats
+from config import MESSAGES_FILE, USERS_DIR, DATABASE_BACKEND, DATABASE_PATH, Settings
+from utils import parse_timestamp, format_timestamp, make_preview
+from stats_index import StatsIndex
+from search_index import SearchIndex, parse_query
+from user_index import UserOrderIndex, USER_ORDERS, encode_cursor, decode_cursor
+from blocklist import Blocklist
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
-class UserInfo:
-    """Foydalanuvchi ma'lumotlari"""
-    id: int
-    first_name: str
-    last_name: Optional[str] = None
-    username: Optional[str] = None
-    first_contact: str = ""
-    is_blocked: bool = False
-
-
-@dataclass
-class Message:
-    """Xabar ma'lumotlari"""
-    text: str
-    timestamp: str
-    type: str  # "user" yoki "admin"
-    message_id: Optional[int] = None
-
-
-@dataclass
-class UserStats:
-    """Foydalanuvchi statistikasi"""
-    total_messages: int = 0
-    last_message: str = ""
-    last_activity: str = ""
-    is_active_today: bool = False
+# Snapshot formati: har bir foydalanuvchi bitta qatorda, xabarlar qator oxirida
+SNAPSHOT_FORMAT = 2
+MESSAGES_KEY = b',"messages":'
+
+
+def split_snapshot_line(line: bytes) -> Tuple[str, bytes, bytes]:
+    """Snapshot qatorini user_id, sarlavha JSON va xabarlar JSON qismlariga ajratish
+
+    JSON satrlari ichidagi qo'shtirnoq doim ekranlanadi, shuning uchun
+    ``,"messages":`` ning birinchi uchrashuvi haqiqiy kalitdir.
+    """
+    line = line.rstrip().rstrip(b",")
+    key_end = line.index(b'": ')
+    user_id = line[1:key_end].decode('utf-8')
+    body = line[key_end + 3:]
+    pos = body.find(MESSAGES_KEY)
+    return user_id, body[:pos] + b"}", body[pos + len(MESSAGES_KEY):-1]
+
+
+def peak_rss_mb() -> float:
+    """Jarayonning eng yuqori RSS xotirasi (MB, faqat Unix)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'da KB, macOS'da bayt
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+class _Record:
+    """``__slots__`` asosidagi yengil yozuvlar uchun umumiy metodlar
+
+    Millionlab obyektlar uchun har bir nusxadagi ``__dict__`` juda qimmat,
+    shuning uchun maydonlar slot'larda saqlanadi. ``_fields`` saqlanadigan
+    (JSON) ko'rinishdagi maydonlar ro'yxati.
+    """
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Saqlash uchun dict ko'rinishi"""
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+class UserInfo(_Record):
+    """Foydalanuvchi ma'lumotlari (``first_contact`` - Unix epoch soniyalari)"""
+    __slots__ = _fields = ("id", "first_name", "last_name", "username", "first_contact", "is_blocked")
+
+    def __init__(self, id: int, first_name: str, last_name: Optional[str] = None,
+                 username: Optional[str] = None, first_contact: int = 0, is_blocked: bool = False):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.username = username
+        self.first_contact = parse_timestamp(first_contact)
+        self.is_blocked = is_blocked
+
+
+# Xabar turlari xotirada kichik butun son sifatida saqlanadi
+MESSAGE_TYPES = ("user", "admin")
+MESSAGE_TYPE_CODES = {name: code for code, name in enumerate(MESSAGE_TYPES)}
+
+
+class Message(_Record):
+    """Xabar ma'lumotlari
+
+    Vaqt Unix epoch soniyalarida (``epoch``), tur esa kod sifatida saqlanadi;
+    ``timestamp`` va ``type`` avvalgidek matn qaytaradi. Diskka vaqt
+    epoch sonining o'zi sifatida yoziladi. ``media_type`` - MediaTypes
+    qiymatlaridan biri, matnli xabarda None (diskka yozilmaydi).
+    ``repeats`` - xabar necha marta yuborilgani (takrorlar yangi yozuv
+    bo'lmaydi; 1 bo'lsa diskka yozilmaydi).
+    """
+    __slots__ = ("text", "epoch", "_type", "message_id", "media_type", "repeats")
+    _fields = ("text", "timestamp", "type", "message_id", "media_type", "repeats")
+
+    def __init__(self, text: str, timestamp, type: str, message_id: Optional[int] = None,
+                 media_type: Optional[str] = None, repeats: int = 1):
+        self.text = text
+        self.epoch = parse_timestamp(timestamp)
+        self._type = MESSAGE_TYPE_CODES[type]
+        self.message_id = message_id
+        self.media_type = media_type
+        self.repeats = repeats
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Saqlash uchun dict ko'rinishi"""
+        result = {"text": self.text, "timestamp": self.epoch, "type": self.type, "message_id": self.message_id}
+        if self.media_type:
+            result["media_type"] = self.media_type
+        if self.repeats > 1:
+            result["repeats"] = self.repeats
+        return result
+
+    @property
+    def timestamp(self) -> str:
+        """Xabar vaqti (DATETIME_FORMAT)"""
+        return format_timestamp(self.epoch)
+
+    @property
+    def type(self) -> str:
+        """Xabar turi ("user" yoki "admin")"""
+        return MESSAGE_TYPES[self._type]
+
+
+# Suhbat xulosasida saqlanadigan so'nggi xabarlar soni
+RECENT_MESSAGES = 3
+
+
+class DuplicateWindow:
+    """Foydalanuvchilarning so'nggi xabarlari kontent kalitlari
+
+    Har bir foydalanuvchi uchun ``size`` ta so'nggi xabar kaliti (matnning
+    o'zi yoki media ``file_unique_id``) va xabar joyi kichik dict'da
+    saqlanadi, shuning uchun takrorni aniqlash O(1). Faqat xotirada:
+    qayta ishga tushgach oyna yangi xabarlardan to'ladi.
+    """
+
+    def __init__(self, size: int):
+        """``size`` - har bir foydalanuvchi uchun kuzatiladigan xabarlar (0 - o'chirilgan)"""
+        self.size = size
+        self._users: Dict[int, Dict[Hashable, int]] = {}
+
+    def find(self, user_id: int, key: Hashable) -> Optional[int]:
+        """Kalit oynada bo'lsa, xabar joyi"""
+        window = self._users.get(user_id)
+        return window.get(key) if window else None
+
+    def add(self, user_id: int, key: Hashable, position: int):
+        """Yangi xabar kalitini qo'shish (eng eskisi chiqariladi)"""
+        if not self.size:
+            return
+        window = self._users.setdefault(user_id, {})
+        window.pop(key, None)
+        window[key] = position
+        if len(window) > self.size:
+            del window[next(iter(window))]
+
+    def reset(self, user_id: int):
+        """Admin javob berdi: keyingi xabarlar takror hisoblanmaydi"""
+        self._users.pop(user_id, None)
+
+
+class UserStats(_Record):
+    """Foydalanuvchi statistikasi (vaqtlar - Unix epoch soniyalari)
+
+    ``total_messages`` - foydalanuvchi xabarlari, ``admin_replies`` - admin
+    javoblari soni. ``waiting_since`` - javobsiz qolgan eng eski xabar vaqti
+    (0 - javob berilgan). ``recent`` - so'nggi xabarlar xulosasi
+    ``[tur, epoch, ko'rinish]`` (ko'rinish kesilgan va ekranlangan); None -
+    xulosa hali xabarlardan hisoblanmagan (eski fayl).
+    """
+    __slots__ = _fields = ("total_messages", "last_message", "last_activity", "is_active_today",
+                           "waiting_since", "admin_replies", "recent")
+
+    def __init__(self, total_messages: int = 0, last_message: int = 0,
+                 last_activity: int = 0, is_active_today: bool = False, waiting_since: int = 0,
+                 admin_replies: int = 0, recent: Optional[List[list]] = None):
+        self.total_messages = total_messages
+        self.last_message = parse_timestamp(last_message)
+        self.last_activity = parse_timestamp(last_activity)
+        self.is_active_today = is_active_today
+        self.waiting_since = waiting_since
+        self.admin_replies = admin_replies
+        self.recent = recent
+
+    @property
+    def last_sender(self) -> Optional[str]:
+        """So'nggi xabar yuboruvchisi ("user"/"admin")"""
+        return self.recent[-1][0] if self.recent else None
+
+    @property
+    def last_preview(self) -> str:
+        """So'nggi xabarning qisqa ko'rinishi"""
+        return self.recent[-1][2] if self.recent else ""
+
+    def record_message(self, message: "Message"):
+        """Yangi xabarni xulosaga qo'shish (xulosa hisoblangan bo'lsa)"""
+        if self.recent is None:
+            return
+        if message.type == "admin":
+            self.admin_replies += 1
+        self.recent.append([message.type, message.epoch, make_preview(message.text)])
+        del self.recent[:-RECENT_MESSAGES]
+
+    def rebuild_summary(self, messages: List["Message"]):
+        """Xulosani barcha xabarlardan qayta hisoblash"""
+        self.admin_replies = sum(1 for message in messages if message.type == "admin")
+        self.recent = [
+            [message.type, message.epoch, make_preview(message.text)]
+            for message in messages[-RECENT_MESSAGES:]
+        ]
 
 
 @dataclass
@@ -56,16 +241,59 @@ class UserData:
 
 
 class MessageDatabase:
-    """Xabarlar bazasini boshqarish uchun sinf"""
+    """Xabarlar bazasini boshqarish uchun sinf
 
-    def __init__(self, file_path: Path = MESSAGES_FILE):
+    Har bir o'zgarish jurnal fayliga bitta ixcham qator bo'lib qo'shiladi,
+    messages.json esa vaqti-vaqti bilan siqiladigan snapshot hisoblanadi.
+    Yuklashda avval snapshot o'qiladi, keyin jurnal qayta qo'llanadi.
+    """
+
+    def __init__(self, file_path: Path = MESSAGES_FILE, journal_path: Optional[Path] = None):
         """Ma'lumotlar bazasini ishga tushirish"""
         self.file_path = file_path
+        self.journal_path = journal_path or file_path.with_suffix(".journal")
+        self._old_journal_path = self.journal_path.with_suffix(".journal.old")
+        self.backup_dir = file_path.parent.parent / "backup"
         self._lock = asyncio.Lock()
+        self._load_lock = asyncio.Lock()
+        self._compact_lock = asyncio.Lock()
+        # Snapshot faylini almashtirish va undan kechiktirilgan o'qishlar uchun
+        self._snapshot_lock = asyncio.Lock()
+        self._compact_task: Optional[asyncio.Task] = None
         self._ensure_data_directory()
         self.data: Dict[str, UserData] = {}
         self._loaded = False
-        # asyncio.create_task() ni olib tashladik
+        self.lazy_load = Settings.LAZY_LOAD
+        # Xabarlari hali o'qilmagan foydalanuvchilar: snapshotdagi xabarlar soni va so'nggi xabar turi
+        self._unloaded: Dict[str, Tuple[int, Optional[str]]] = {}
+        # Lazy rejimda foydalanuvchi qatorining snapshotdagi bayt pozitsiyasi
+        self._offsets: Dict[str, int] = {}
+        # get_stats uchun har bir o'zgarishda yangilanadigan yig'indilar
+        self.stats_index = StatsIndex()
+        # /messages sahifalari uchun foydalanuvchilar tartiblari
+        self.user_index = UserOrderIndex()
+        # Qidiruv indeksi birinchi /search paytida quriladi
+        self.search_index: Optional[SearchIndex] = None
+        self._search_lock = asyncio.Lock()
+        # Bloklanganlar: middleware bazani yuklamasdan tekshirishi uchun alohida fayl
+        self.blocklist = Blocklist(file_path.with_name("blocked.json"))
+        # Takroriy xabarlar: kalit -> xabarning foydalanuvchi ro'yxatidagi o'rni
+        self.duplicates = DuplicateWindow(Settings.DUPLICATE_WINDOW)
+        # Jurnal holati: oxirgi yozuv raqami va snapshotdan keyingi yozuvlar soni
+        self._seq = 0
+        self._journal_records = 0
+        # Guruhli yozish: navbatdagi qatorlar va ular kutayotgan umumiy natija
+        self._pending: List[str] = []
+        self._flush_waiter: Optional[asyncio.Future] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_full = asyncio.Event()
+        self.flush_stats = {"flushes": 0, "mutations": 0, "last_batch": 0, "max_batch": 0}
+        self._appliers = {
+            "user_message": self._apply_user_message,
+            "admin_reply": self._apply_admin_reply,
+            "block": self._apply_block,
+            "repeat": self._apply_repeat,
+        }
 
     def _ensure_data_directory(self):
         """Data papkasini yaratish"""
@@ -74,151 +302,766 @@ class MessageDatabase:
     async def _ensure_loaded(self):
         """Ma'lumotlarni lazy loading bilan yuklash"""
         if not self._loaded:
-            await self._load_data()
-            self._loaded = True
+            async with self._load_lock:
+                if not self._loaded:
+                    await self._load_data()
+                    self._loaded = True
 
     async def _load_data(self):
-        """Ma'lumotlarni async yuklash"""
+        """Snapshot va jurnalni alohida oqimda yuklash"""
+        await asyncio.to_thread(self._read_storage)
+
+    def _read_storage(self):
+        """Snapshot va jurnalni o'qish (worker oqimida)
+
+        Yuklash paytida GC to'xtatiladi: millionlab yangi obyektlar ustidan
+        takroriy to'liq yig'ish GIL'ni uzoq band qilib, event loop'ni
+        to'xtatib qo'yardi. Yuklangan obyektlar keyin muzlatiladi.
+
+        Buzilgan snapshot yoki jurnalda xatolik ko'tariladi: qisman yuklangan
+        holat keyingi siqishda yaxshi snapshot ustiga yozilib, ma'lumotlar
+        butunlay yo'qolardi. Faqat jurnalning uzilgan oxirgi qatori kechiriladi.
+        """
+        started = time.perf_counter()
+        gc.disable()
         try:
             if self.file_path.exists():
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    raw_data = json.load(f)
-
-                # Ma'lumotlarni dataclass'larga o'girish
-                for user_id, user_data in raw_data.items():
-                    try:
-                        # UserInfo yaratish
-                        user_info_dict = user_data.get("user_info", {})
-                        user_info = UserInfo(**user_info_dict)
-
-                        # Messages yaratish
-                        messages_list = []
-                        for msg_data in user_data.get("messages", []):
-                            message = Message(**msg_data)
-                            messages_list.append(message)
-
-                        # UserStats yaratish
-                        stats_dict = user_data.get("stats", {})
-                        stats = UserStats(**stats_dict)
-
-                        # UserData yaratish
-                        self.data[user_id] = UserData(
-                            user_info=user_info,
-                            messages=messages_list,
-                            stats=stats
-                        )
-                    except Exception as e:
-                        logger.error(f"Foydalanuvchi {user_id} ma'lumotlarini yuklashda xatolik: {e}")
+                if not (self.lazy_load and self._load_snapshot_lazy()):
+                    with open(self.file_path, 'r', encoding='utf-8') as f:
+                        self._load_snapshot(f)
 
                 logger.info(f"📂 {len(self.data)} foydalanuvchi ma'lumoti yuklandi")
             else:
                 logger.info("🆕 Yangi ma'lumotlar bazasi yaratildi")
 
+            self._build_stats_index()
+            self._replay_journal()
+            self._sync_blocklist()
+
         except Exception as e:
-            logger.error(f"Ma'lumotlarni yuklashda xatolik: {e}")
+            logger.critical(f"❌ Ma'lumotlarni yuklab bo'lmadi, fayllar o'zgartirilmadi: {e}")
+            # Keyingi urinish toza holatdan boshlanadi
+            self.data, self._unloaded, self._offsets = {}, {}, {}
+            self._seq = self._journal_records = 0
+            raise
+        finally:
+            gc.freeze()
+            gc.enable()
+
+        logger.info(
+            f"⏱ Yuklash: {time.perf_counter() - started:.2f} s, "
+            f"kechiktirilgan: {len(self._unloaded)}, eng yuqori RSS: {peak_rss_mb():.1f} MB"
+        )
+
+    @staticmethod
+    def _iter_snapshot(f) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Snapshot yozuvlarini birma-bir o'qish
+
+        Yangi formatda har bir foydalanuvchi alohida qatorda turadi va
+        alohida parse qilinadi, shuning uchun GIL uzoq band qilinmaydi.
+        Eski (indent=2) fayllar butunlay o'qiladi.
+        """
+        first, second = f.readline(), f.readline()
+        if first.strip() == "{" and second.startswith('"_meta"'):
+            for line in itertools.chain([second], f):
+                line = line.rstrip().rstrip(",")
+                if line and line != "}":
+                    yield next(iter(json.loads("{" + line + "}").items()))
+        else:
+            f.seek(0)
+            yield from json.load(f).items()
+
+    def _load_snapshot(self, f):
+        """Snapshot yozuvlarini dataclass'larga o'girish"""
+        for user_id, user_data in self._iter_snapshot(f):
+            # Snapshot qaysi jurnal yozuvigacha bo'lgan holatni saqlaydi
+            if user_id == "_meta":
+                self._seq = user_data.get("seq", 0)
+                continue
 
-    async def _save_data(self) -> bool:
-        """Ma'lumotlarni async saqlash"""
-        async with self._lock:
             try:
-                # Dataclass'larni dict'ga o'girish
-                raw_data = {}
-                for user_id, user_data in self.data.items():
-                    raw_data[user_id] = {
-                        "user_info": asdict(user_data.user_info),
-                        "messages": [asdict(msg) for msg in user_data.messages],
-                        "stats": asdict(user_data.stats)
-                    }
+                # UserInfo yaratish
+                user_info_dict = user_data.get("user_info", {})
+                user_info = UserInfo(**user_info_dict)
+
+                # Messages yaratish
+                messages_list = []
+                for msg_data in user_data.get("messages", []):
+                    message = Message(**msg_data)
+                    messages_list.append(message)
+
+                # UserStats yaratish
+                stats_dict = user_data.get("stats", {})
+                stats = UserStats(**stats_dict)
+
+                # UserData yaratish
+                self.data[user_id] = UserData(
+                    user_info=user_info,
+                    messages=messages_list,
+                    stats=stats
+                )
+            except Exception as e:
+                raise ValueError(f"Foydalanuvchi {user_id} yozuvi buzilgan: {e}") from e
+
+    def _load_snapshot_lazy(self) -> bool:
+        """Snapshotni oqim bilan o'qib, faqat sarlavhalarni yaratish
+
+        Har bir qatordan ``"messages"`` kalitigacha bo'lgan qism parse
+        qilinadi; xabarlar ro'yxati esa faqat qator pozitsiyasi sifatida
+        eslab qolinadi va foydalanuvchi so'ralganda o'qiladi. Eski formatdagi
+        fayllar uchun False qaytadi (to'liq yuklanadi).
+        """
+        with open(self.file_path, 'rb') as f:
+            first, second = f.readline(), f.readline()
+            if first.strip() != b"{" or not second.startswith(b'"_meta"'):
+                return False
+            meta = json.loads(second.split(b":", 1)[1].rstrip().rstrip(b","))
+            if meta.get("format") != SNAPSHOT_FORMAT:
+                return False
+            self._seq = meta.get("seq", 0)
+
+            offset = f.tell()
+            for line in f:
+                line_offset, offset = offset, offset + len(line)
+                if not line.startswith(b'"'):
+                    continue
+                user_id, header, _ = split_snapshot_line(line)
+                try:
+                    entry = json.loads(header)
+                    self.data[user_id] = UserData(
+                        user_info=UserInfo(**entry.get("user_info", {})),
+                        messages=[],
+                        stats=UserStats(**entry.get("stats", {}))
+                    )
+                    self._unloaded[user_id] = (entry.get("message_count", 0), entry.get("last_type"))
+                    self._offsets[user_id] = line_offset
+                except Exception as e:
+                    raise ValueError(f"Foydalanuvchi {user_id} yozuvi buzilgan: {e}") from e
+
+        return True
+
+    def _build_stats_index(self):
+        """Snapshotdan keyin statistika va foydalanuvchilar tartibi indekslarini bir marta qurish"""
+        index = self.stats_index = StatsIndex()
+        orders = self.user_index = UserOrderIndex()
+        for user_id, user_data in self.data.items():
+            if user_data.stats.recent is None and user_id not in self._unloaded:
+                user_data.stats.rebuild_summary(user_data.messages)
+            waiting_since = None
+            if self._last_message_type(user_id, user_data) == "user":
+                waiting_since = self._waiting_since(user_data)
+            stats = user_data.stats
+            index.add_user(
+                user_id,
+                self._message_count(user_id, user_data),
+                stats.total_messages,
+                stats.last_activity,
+                waiting_since
+            )
+            orders.add_user(user_id, stats.last_activity, stats.total_messages, waiting_since or 0)
+        index.sort_waiting()
+        orders.sort()
+
+    @staticmethod
+    def _waiting_since(user_data: UserData) -> int:
+        """Javobsiz qolgan eng eski xabar vaqti
+
+        Eski fayllarda bu maydon yo'q: xabarlar xotirada bo'lsa oxirgi
+        foydalanuvchi xabarlari ketma-ketligidan, aks holda so'nggi xabar
+        vaqtidan olinadi.
+        """
+        stats = user_data.stats
+        if not stats.waiting_since:
+            since = stats.last_message
+            for message in reversed(user_data.messages):
+                if message.type != "user":
+                    break
+                since = message.epoch
+            stats.waiting_since = since
+        return stats.waiting_since
+
+    def _replay_journal(self):
+        """Snapshotdan keyingi jurnal yozuvlarini qayta qo'llash
+
+        Siqish tugamay qolgan bo'lsa, avval aylantirilgan eski jurnal o'qiladi.
+        Yozish paytida uzilgan oxirgi qator kesib tashlanadi (aks holda keyingi
+        yozuv unga qo'shilib qolardi); o'rtadagi buzilgan qator - xatolik.
+        """
+        replayed = 0
+        for journal_path in (self._old_journal_path, self.journal_path):
+            if not journal_path.exists():
+                continue
+
+            torn = None
+            with open(journal_path, 'rb') as f:
+                offset = 0
+                for line_no, line in enumerate(f, 1):
+                    line_offset, offset = offset, offset + len(line)
+                    if not line.strip():
+                        continue
+                    if torn is not None:
+                        raise ValueError(f"{journal_path.name} {torn[0]}-qatori buzilgan")
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = (line_no, line_offset)
+                        continue
+
+                    self._journal_records += 1
+                    # Snapshotga allaqachon kirgan yozuvlar
+                    if record.get("seq", 0) <= self._seq:
+                        continue
+
+                    self._apply(record)
+                    self._seq = record["seq"]
+                    replayed += 1
+
+            if torn is not None:
+                logger.warning(f"⚠️ {journal_path.name} oxirgi ({torn[0]}-) qatori uzilgan, kesib tashlandi")
+                with open(journal_path, 'r+b') as f:
+                    f.truncate(torn[1])
+                    os.fsync(f.fileno())
+
+        if replayed:
+            logger.info(f"📜 Jurnaldan {replayed} ta yozuv qayta qo'llandi")
+
+    def _apply(self, record: Dict[str, Any]):
+        """Jurnal yozuvini xotiradagi ma'lumotlarga qo'llash"""
+        applier = self._appliers.get(record.get("op"))
+        if applier is None:
+            logger.warning(f"⚠️ Noma'lum jurnal yozuvi: {record.get('op')}")
+            return
+        applier(record)
+
+    def _apply_user_message(self, record: Dict[str, Any]):
+        """Foydalanuvchi xabarini xotiraga qo'shish"""
+        user_id_str = str(record["user_id"])
+        user_dict = record.get("user", {})
+        timestamp = parse_timestamp(record["ts"])  # Eski jurnallarda matn
+
+        # Yangi foydalanuvchini yaratish
+        if user_id_str not in self.data:
+            user_info = UserInfo(
+                id=record["user_id"],
+                first_name=user_dict.get("first_name", ""),
+                last_name=user_dict.get("last_name"),
+                username=user_dict.get("username"),
+                first_contact=timestamp
+            )
 
-                # Faylga yozish
-                with open(self.file_path, 'w', encoding='utf-8') as f:
-                    json.dump(raw_data, f, ensure_ascii=False, indent=2)
+            user_stats = UserStats(
+                total_messages=0,
+                last_message=timestamp,
+                last_activity=timestamp,
+                is_active_today=True,
+                recent=[]
+            )
 
-                logger.debug("💾 Ma'lumotlar saqlandi")
-                return True
+            self.data[user_id_str] = UserData(
+                user_info=user_info,
+                messages=[],
+                stats=user_stats
+            )
 
+        user_data = self.data[user_id_str]
+
+        # Xabarni qo'shish
+        message = Message(
+            text=record["text"],
+            timestamp=timestamp,
+            type="user",
+            message_id=record.get("message_id"),
+            media_type=record.get("media")
+        )
+        user_data.messages.append(message)
+        user_data.stats.record_message(message)
+        if self.search_index is not None:
+            self.search_index.add(user_id_str, message)
+
+        # Statistikani yangilash
+        user_data.stats.total_messages += 1
+        user_data.stats.last_message = timestamp
+        user_data.stats.last_activity = timestamp
+        user_data.stats.is_active_today = True
+        if not user_data.stats.waiting_since:
+            user_data.stats.waiting_since = timestamp
+
+        # Foydalanuvchi ma'lumotlarini yangilash
+        user_data.user_info.first_name = user_dict.get("first_name", "")
+        user_data.user_info.last_name = user_dict.get("last_name")
+        user_data.user_info.username = user_dict.get("username")
+
+        self.stats_index.on_user_message(user_id_str, user_data.stats.total_messages, timestamp)
+        self.user_index.update(user_id_str, user_data.stats.last_activity, user_data.stats.total_messages,
+                               user_data.stats.waiting_since)
+
+    def _apply_admin_reply(self, record: Dict[str, Any]):
+        """Admin javobini xotiraga qo'shish"""
+        user_data = self.data.get(str(record["user_id"]))
+        if user_data:
+            message = Message(
+                text=record["text"],
+                timestamp=record["ts"],
+                type="admin",
+                media_type=record.get("media")
+            )
+            user_data.messages.append(message)
+            user_data.stats.record_message(message)
+            if self.search_index is not None:
+                self.search_index.add(str(record["user_id"]), message)
+            user_data.stats.waiting_since = 0
+            self.stats_index.on_admin_reply(str(record["user_id"]))
+            self.user_index.update(str(record["user_id"]), user_data.stats.last_activity,
+                                   user_data.stats.total_messages, 0)
+
+    def _apply_block(self, record: Dict[str, Any]):
+        """Bloklash holatini xotirada o'zgartirish"""
+        user_data = self.data.get(str(record["user_id"]))
+        if user_data:
+            user_data.user_info.is_blocked = record["blocked"]
+            self.blocklist.set_blocked(record["user_id"], record["blocked"])
+
+    def _apply_repeat(self, record: Dict[str, Any]):
+        """Takroriy xabar hisoblagichini o'rnatish
+
+        Yozuvda yangi qiymatning o'zi bor, shuning uchun snapshotga
+        allaqachon tushgan yozuvni qayta qo'llash xavfsiz. Xabar hali
+        o'qilmagan bo'lsa (jurnalni qayta o'qishda), foydalanuvchi xabarlari
+        shu yerda o'qiladi; jonli yozuvdan oldin ular doim yuklangan bo'ladi.
+        """
+        user_id = str(record["user_id"])
+        user_data = self.data.get(user_id)
+        if not user_data:
+            return
+        index = record["index"]
+        entry = self._unloaded.get(user_id)
+        if entry is not None:
+            if index < entry[0]:
+                self._attach_deferred(user_id, self._read_deferred([user_id])[user_id])
+            else:
+                index -= entry[0]
+        if 0 <= index < len(user_data.messages):
+            user_data.messages[index].repeats = record["repeats"]
+
+    def _sync_blocklist(self):
+        """Yuklangan bazadan bloklanganlar faylini tekshirish
+
+        Fayl yo'q bo'lsa yoki bloklash jurnalga yozilib, fayl yozilmay
+        qolgan bo'lsa, u bazadagi holatdan qayta yoziladi.
+        """
+        blocked = [int(user_id) for user_id, user_data in self.data.items() if user_data.user_info.is_blocked]
+        if self.blocklist.reset(blocked):
+            try:
+                self.blocklist.save()
             except Exception as e:
-                logger.error(f"Ma'lumotlarni saqlashda xatolik: {e}")
-                return False
+                logger.error(f"Bloklanganlar ro'yxatini saqlashda xatolik: {e}")
 
-    async def add_user_message(self, user_id: int, user_dict: Dict[str, Any], message_text: str,
-                               message_id: int = None) -> bool:
-        """Foydalanuvchi xabarini qo'shish"""
-        await self._ensure_loaded()  # Lazy loading
+    async def _commit(self, record: Dict[str, Any]) -> bool:
+        """Yozuvni xotiraga qo'llab, navbatdagi guruhli yozishni kutish
 
+        Yozuv darhol xotiraga qo'llanadi, jurnalga esa bir oyna ichida
+        kelgan boshqa o'zgarishlar bilan birga bitta yozish va fsync orqali
+        tushadi. Natija faqat ma'lumot diskka yozilgandan keyin qaytadi.
+        """
         try:
-            user_id_str = str(user_id)
-            timestamp = datetime.now().strftime(Formats.DATETIME_FORMAT)
-
-            # Yangi foydalanuvchini yaratish
-            if user_id_str not in self.data:
-                user_info = UserInfo(
-                    id=user_id,
-                    first_name=user_dict.get("first_name", ""),
-                    last_name=user_dict.get("last_name"),
-                    username=user_dict.get("username"),
-                    first_contact=timestamp
-                )
+            self._seq += 1
+            record["seq"] = self._seq
+            self._apply(record)
+            self._pending.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        except Exception as e:
+            logger.error(f"Yozuvni qo'llashda xatolik: {e}")
+            return False
 
-                user_stats = UserStats(
-                    total_messages=0,
-                    last_message=timestamp,
-                    last_activity=timestamp,
-                    is_active_today=True
-                )
+        if self._flush_waiter is None:
+            self._flush_waiter = asyncio.get_running_loop().create_future()
+            self._flush_task = asyncio.create_task(self._group_flush())
+        waiter = self._flush_waiter
 
-                self.data[user_id_str] = UserData(
-                    user_info=user_info,
-                    messages=[],
-                    stats=user_stats
-                )
+        if len(self._pending) >= Settings.GROUP_COMMIT_MAX_BATCH:
+            self._batch_full.set()
 
-                logger.info(f"👤 Yangi foydalanuvchi: {user_dict.get('first_name')} ({user_id})")
+        return await asyncio.shield(waiter)
 
-            # Xabarni qo'shish
-            message = Message(
-                text=message_text,
-                timestamp=timestamp,
-                type="user",
-                message_id=message_id
+    async def _group_flush(self):
+        """Oyna tugashi yoki paket to'lishini kutib, jurnalga bir marta yozish"""
+        ok = False
+        waiter = self._flush_waiter
+        try:
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), Settings.GROUP_COMMIT_WINDOW_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+
+            # Shu paytdan keyingi o'zgarishlar keyingi paketga tushadi
+            self._batch_full.clear()
+            lines, self._pending = self._pending, []
+            self._flush_waiter = None
+
+            async with self._lock:
+                ok = await self._write_batch(lines)
+
+            if (ok and self._journal_records >= Settings.JOURNAL_COMPACT_EVERY
+                    and not self._compact_lock.locked()):
+                self._compact_task = asyncio.create_task(self._compact())
+        finally:
+            if self._flush_waiter is waiter:
+                self._flush_waiter = None
+            if not waiter.done():
+                waiter.set_result(ok)
+
+    def _append_journal(self, payload: str):
+        """Jurnal oxiriga yozish va diskka majburlash (worker oqimida)"""
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _write_batch(self, lines: List[str]) -> bool:
+        """Paketdagi yozuvlarni jurnal oxiriga qo'shish"""
+        try:
+            await asyncio.to_thread(self._append_journal, "\n".join(lines) + "\n")
+
+            self._journal_records += len(lines)
+            self.flush_stats["flushes"] += 1
+            self.flush_stats["mutations"] += len(lines)
+            self.flush_stats["last_batch"] = len(lines)
+            self.flush_stats["max_batch"] = max(self.flush_stats["max_batch"], len(lines))
+            logger.debug(f"💾 Jurnal: {len(lines)} ta o'zgarish bitta yozishda saqlandi")
+            return True
+
+        except Exception as e:
+            logger.error(f"Jurnalga yozishda xatolik: {e}")
+            return False
+
+    def _snapshot_state(self) -> Dict[str, tuple]:
+        """Event loop ichida arzon va izchil snapshot olish
+
+        Xabarlar faqat ro'yxat oxiriga qo'shiladi va o'zgarmaydi, shuning
+        uchun har bir foydalanuvchi uchun ro'yxatning o'zi va joriy uzunligi
+        yetarli. O'zgaruvchan user_info/stats esa kichik dict nusxa sifatida
+        olinadi. Qolgan barcha ish (JSON kodlash, disk) worker oqimida bajariladi.
+        Xabarlari o'qilmagan foydalanuvchilar uchun eski snapshotdagi xabarlar
+        soni va turi ham olinadi: ular diskdan xom holda ko'chiriladi.
+        """
+        return {
+            user_id: (
+                user_data.user_info.to_dict(),
+                user_data.messages,
+                len(user_data.messages),
+                user_data.stats.to_dict(),
+                self._unloaded.get(user_id)
             )
+            for user_id, user_data in self.data.items()
+        }
 
-            self.data[user_id_str].messages.append(message)
+    def _read_raw_messages(self, source, user_id: str, count: int) -> bytes:
+        """O'qilmagan foydalanuvchi xabarlarini JSON massiv sifatida olish (worker oqimida)"""
+        source.seek(self._offsets[user_id])
+        return split_snapshot_line(source.readline())[2]
+
+    def _dump_state(self, f, state: Dict[str, tuple], seq: int, source=None) -> Dict[str, int]:
+        """Snapshotni faylga oqim bilan yozish (worker oqimida)
+
+        Har bir foydalanuvchi alohida qatorga kichik ``json.dumps`` bilan
+        yoziladi: butun baza uchun katta oraliq dict yaratilmaydi va GIL
+        bitta foydalanuvchidan uzoqroq band qilinmaydi. Sarlavha qator
+        boshida, xabarlar oxirida turadi, shuning uchun lazy yuklash
+        xabarlarni parse qilmasdan o'tkazib yuboradi.
+
+        O'qilmagan foydalanuvchilarning yangi fayldagi pozitsiyasi qaytariladi.
+        """
+        offsets = {}
+        f.write(b"{\n")
+        f.write(b'"_meta": ' + json.dumps({"seq": seq, "format": SNAPSHOT_FORMAT}).encode())
+        for user_id, (user_info, messages, count, stats, deferred) in state.items():
+            tail = [msg.to_dict() for msg in messages[:count]]
+            if deferred is None:
+                message_count = count
+                last_type = tail[-1]["type"] if tail else None
+            else:
+                message_count = deferred[0] + count
+                last_type = tail[-1]["type"] if tail else deferred[1]
+
+            header = json.dumps({
+                "user_info": user_info,
+                "stats": stats,
+                "message_count": message_count,
+                "last_type": last_type
+            }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            body = json.dumps(tail, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+            if deferred is not None:
+                # Eski xabarlar parse qilinmasdan, xom baytlar sifatida ko'chiriladi
+                raw = self._read_raw_messages(source, user_id, deferred[0])
+                if raw != b"[]":
+                    body = raw if body == b"[]" else raw[:-1] + b"," + body[1:]
+
+            f.write(b",\n")
+            if deferred is not None:
+                offsets[user_id] = f.tell()
+            f.write(json.dumps(user_id).encode() + b": ")
+            f.write(header[:-1] + MESSAGES_KEY + body + b"}")
+        f.write(b"\n}\n")
+        return offsets
+
+    def _rotate_journal(self):
+        """Joriy jurnalni eski jurnalga aylantirish (worker oqimida)
+
+        Oldingi siqish tugamagan bo'lsa, eski jurnal ustiga yozilmaydi,
+        balki joriy jurnal uning oxiriga qo'shiladi.
+        """
+        if not self.journal_path.exists():
+            return
+        if self._old_journal_path.exists():
+            with open(self._old_journal_path, 'a', encoding='utf-8') as dst, \
+                    open(self.journal_path, 'r', encoding='utf-8') as src:
+                shutil.copyfileobj(src, dst)
+            self.journal_path.unlink()
+        else:
+            os.replace(self.journal_path, self._old_journal_path)
+
+    def _dump_to_path(self, path: Path, state: Dict[str, tuple], seq: int, sync: bool) -> Dict[str, int]:
+        """Snapshotni berilgan faylga yozish, kerak bo'lsa eski snapshotdan o'qib"""
+        needs_source = any(entry[4] is not None for entry in state.values())
+        with open(path, 'wb') as f:
+            if needs_source:
+                with open(self.file_path, 'rb') as source:
+                    offsets = self._dump_state(f, state, seq, source)
+            else:
+                offsets = self._dump_state(f, state, seq)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        return offsets
+
+    def _write_snapshot(self, state: Dict[str, tuple], seq: int):
+        """Snapshotni atomar yozish va eski jurnalni o'chirish (worker oqimida)"""
+        tmp_path = self.file_path.with_suffix(".tmp")
+        offsets = self._dump_to_path(tmp_path, state, seq, sync=True)
+        os.replace(tmp_path, self.file_path)
+
+        self._old_journal_path.unlink(missing_ok=True)
+        return offsets
+
+    def _write_backup(self, backup_path: Path, state: Dict[str, tuple], seq: int):
+        """Zahira faylini yozish (worker oqimida)"""
+        self._dump_to_path(backup_path, state, seq, sync=False)
+
+    async def _compact(self) -> bool:
+        """Snapshotni qayta yozib, jurnalni tozalash
+
+        Jurnal yozuvchilari qulf ostida to'xtatilgan qisqa vaqt ichida
+        snapshot olinadi va jurnal aylantiriladi; kodlash va diskka yozish
+        esa alohida oqimda, yangi o'zgarishlar qabul qilinayotgan paytda
+        bajariladi. Snapshotdagi ``seq`` tufayli hech bir yozuv ikki marta
+        qo'llanmaydi.
+        """
+        async with self._compact_lock:
+            state = None
+            try:
+                async with self._lock:
+                    await self._prepare_compaction()
+                    started = time.perf_counter()
+                    state, seq = self._compaction_state(), self._seq
+                    loop_ms = (time.perf_counter() - started) * 1000
+                    await asyncio.to_thread(self._rotate_journal)
+                    self._journal_records = 0
+
+                async with self._snapshot_lock:
+                    result = await asyncio.to_thread(self._write_snapshot, state, seq)
+                    self._compaction_done(result)
+
+                logger.debug(f"💾 Snapshot yangilandi (event loop: {loop_ms:.1f} ms)")
+                return True
+
+            except Exception as e:
+                logger.error(f"Snapshot yozishda xatolik: {e}")
+                if state is not None:
+                    self._compaction_failed(state)
+                return False
+
+    # -------------------------------------------------------------------------
+    # Kechiktirilgan (lazy) xabarlar
+    # -------------------------------------------------------------------------
+
+    def _read_deferred(self, user_ids: List[str]) -> Dict[str, List[Message]]:
+        """O'qilmagan foydalanuvchilar xabarlarini snapshotdan o'qish (worker oqimida)"""
+        result = {}
+        with open(self.file_path, 'rb') as f:
+            for user_id in user_ids:
+                f.seek(self._offsets[user_id])
+                raw = split_snapshot_line(f.readline())[2]
+                result[user_id] = [Message(**msg) for msg in json.loads(raw)]
+        return result
+
+    def _attach_deferred(self, user_id: str, messages: List[Message]):
+        """O'qilgan xabarlarni xotiradagi xabarlar oldiga qo'shish
+
+        Snapshotdan keyin kelgan xabarlar jurnal orqali allaqachon xotirada.
+        Diskdagi nusxa ulardan ba'zilarini ham o'z ichiga olgan bo'lishi
+        mumkin, shuning uchun eslab qolingan son bo'yicha kesiladi.
+        """
+        entry = self._unloaded.pop(user_id, None)
+        if entry is None:
+            return  # Parallel so'rov allaqachon yuklagan
+        self._offsets.pop(user_id, None)
+        user_data = self.data[user_id]
+        user_data.messages = messages[:entry[0]] + user_data.messages
+        if user_data.stats.recent is None:
+            user_data.stats.rebuild_summary(user_data.messages)
+
+    async def _load_deferred(self, user_ids: List[str]):
+        """Bir nechta foydalanuvchi xabarlarini alohida oqimda yuklash"""
+        if not user_ids:
+            return
+        async with self._snapshot_lock:
+            user_ids = [user_id for user_id in user_ids if user_id in self._unloaded]
+            loaded = await asyncio.to_thread(self._read_deferred, user_ids)
+        for user_id, messages in loaded.items():
+            self._attach_deferred(user_id, messages)
+
+    async def _ensure_user_loaded(self, user_id: str):
+        """Foydalanuvchi xabarlarini birinchi murojaatda yuklash"""
+        if user_id in self._unloaded:
+            await self._load_deferred([user_id])
+
+    async def _ensure_all_loaded(self):
+        """Barcha foydalanuvchilar xabarlarini yuklash (qidiruv uchun)"""
+        await self._load_deferred(list(self._unloaded))
+
+    def _message_count(self, user_id: str, user_data: UserData) -> int:
+        """Foydalanuvchi xabarlari soni (xabarlar o'qilmagan bo'lsa ham)"""
+        entry = self._unloaded.get(user_id)
+        if entry is None:
+            return len(user_data.messages)
+        return entry[0] + len(user_data.messages)
+
+    def _last_message_type(self, user_id: str, user_data: UserData) -> Optional[str]:
+        """Foydalanuvchining so'nggi xabari turi ("user"/"admin")"""
+        if user_data.messages:
+            return user_data.messages[-1].type
+        entry = self._unloaded.get(user_id)
+        return entry[1] if entry else None
+
+    # -------------------------------------------------------------------------
+    # Saqlash tartibiga bog'liq qismlar (ShardedMessageDatabase qayta belgilaydi)
+    # -------------------------------------------------------------------------
+
+    async def _prepare_compaction(self):
+        """Siqishdan oldingi tayyorgarlik"""
+
+    def _compaction_state(self):
+        """Siqish uchun snapshot"""
+        return self._snapshot_state()
+
+    def _compaction_done(self, result):
+        """Yangi snapshotdagi pozitsiyalarni eslab qolish"""
+        for user_id, offset in (result or {}).items():
+            if user_id in self._unloaded:
+                self._offsets[user_id] = offset
+
+    def _compaction_failed(self, state):
+        """Siqish muvaffaqiyatsiz bo'lganda holatni tiklash"""
+
+    async def _save_data(self) -> bool:
+        """Snapshotni majburan yangilash"""
+        return await self._compact()
 
-            # Statistikani yangilash
-            self.data[user_id_str].stats.total_messages += 1
-            self.data[user_id_str].stats.last_message = timestamp
-            self.data[user_id_str].stats.last_activity = timestamp
-            self.data[user_id_str].stats.is_active_today = True
+    async def close(self):
+        """Bot to'xtashida navbatni yozib, jurnalni snapshotga siqish"""
+        while self._flush_waiter is not None:
+            self._batch_full.set()
+            await asyncio.shield(self._flush_waiter)
 
-            # Foydalanuvchi ma'lumotlarini yangilash
-            self.data[user_id_str].user_info.first_name = user_dict.get("first_name", "")
-            self.data[user_id_str].user_info.last_name = user_dict.get("last_name")
-            self.data[user_id_str].user_info.username = user_dict.get("username")
+        if self._compact_task is not None:
+            await self._compact_task
 
-            return await self._save_data()
+        if self._loaded and self._journal_records:
+            await self._save_data()
+
+    async def add_user_message(self, user_id: int, user_dict: Dict[str, Any], message_text: str,
+                               message_id: int = None, media_type: Optional[str] = None,
+                               content_key: Optional[Hashable] = None) -> bool:
+        """Foydalanuvchi xabarini qo'shish (media uchun ``media_type`` - MediaTypes qiymati)
+
+        ``content_key`` berilsa xabar takrorlar oynasiga qo'shiladi (``fold_duplicate``).
+        """
+        await self._ensure_loaded()  # Lazy loading
+
+        try:
+            user_data = self.data.get(str(user_id))
+            if user_data is None:
+                logger.info(f"👤 Yangi foydalanuvchi: {user_dict.get('first_name')} ({user_id})")
+
+            record = {
+                "op": "user_message",
+                "user_id": user_id,
+                "user": {
+                    "first_name": user_dict.get("first_name", ""),
+                    "last_name": user_dict.get("last_name"),
+                    "username": user_dict.get("username")
+                },
+                "text": message_text,
+                "ts": int(time.time()),
+                "message_id": message_id
+            }
+            if media_type:
+                record["media"] = media_type
+            if content_key is not None:
+                # Yozuv darhol qo'llanadi: parallel takror ham shu xabarni topadi
+                position = self._message_count(str(user_id), user_data) if user_data else 0
+                self.duplicates.add(user_id, content_key, position)
+            committed = await self._commit(record)
+            if not committed:
+                self.duplicates.reset(user_id)
+            return committed
 
         except Exception as e:
             logger.error(f"Xabar qo'shishda xatolik: {e}")
             return False
 
-    async def add_admin_reply(self, user_id: int, reply_text: str) -> bool:
-        """Admin javobini qo'shish"""
+    async def fold_duplicate(self, user_id: int, content_key: Hashable) -> int:
+        """Takroriy xabarni oldingisining hisoblagichiga qo'shish
+
+        Kalit foydalanuvchining so'nggi xabarlari oynasida bo'lsa, yangi
+        yozuv o'rniga o'sha xabarning ``repeats`` qiymati oshiriladi va yangi
+        qiymat qaytadi; takror bo'lmasa 0.
+        """
         await self._ensure_loaded()  # Lazy loading
 
         try:
+            position = self.duplicates.find(user_id, content_key)
+            if position is None:
+                return 0
             user_id_str = str(user_id)
-            timestamp = datetime.now().strftime(Formats.DATETIME_FORMAT)
+            await self._ensure_user_loaded(user_id_str)
+            user_data = self.data.get(user_id_str)
+            if user_data is None or position >= len(user_data.messages):
+                return 0
+            repeats = user_data.messages[position].repeats + 1
+            record = {"op": "repeat", "user_id": user_id, "index": position, "repeats": repeats}
+            return repeats if await self._commit(record) else 0
 
-            if user_id_str in self.data:
-                message = Message(
-                    text=reply_text,
-                    timestamp=timestamp,
-                    type="admin"
-                )
+        except Exception as e:
+            logger.error(f"Takroriy xabarni qo'shishda xatolik: {e}")
+            return 0
 
-                self.data[user_id_str].messages.append(message)
-                return await self._save_data()
+    async def add_admin_reply(self, user_id: int, reply_text: str, media_type: Optional[str] = None) -> bool:
+        """Admin javobini qo'shish (media uchun ``media_type`` - MediaTypes qiymati)"""
+        await self._ensure_loaded()  # Lazy loading
+
+        try:
+            if str(user_id) in self.data:
+                record = {
+                    "op": "admin_reply",
+                    "user_id": user_id,
+                    "text": reply_text,
+                    "ts": int(time.time())
+                }
+                if media_type:
+                    record["media"] = media_type
+                self.duplicates.reset(user_id)
+                return await self._commit(record)
             else:
                 logger.error(f"Foydalanuvchi topilmadi: {user_id}")
                 return False
@@ -230,11 +1073,50 @@ class MessageDatabase:
     async def get_all_users(self) -> Dict[str, UserData]:
         """Barcha foydalanuvchilarni olish"""
         await self._ensure_loaded()  # Lazy loading
+        await self._ensure_all_loaded()
         return self.data.copy()
 
+    async def get_users_page(self, order: str = "unread", cursor: Optional[str] = None,
+                             limit: int = 10, backward: bool = False) -> Dict[str, Any]:
+        """Foydalanuvchilar sahifasi tartiblangan indeksdan
+
+        ``order`` - USER_ORDERS dan biri. ``cursor`` - oldingi javobdagi
+        ``next`` (keyingi sahifa) yoki ``prev`` (``backward=True`` bilan)
+        qiymati. Sahifa ``UserStats`` xulosalaridan chiziladi; xabarlar faqat
+        xulosasi yo'q (eski fayldagi) foydalanuvchilar uchun yuklanadi.
+        ``offset`` - sahifaning ro'yxatdagi o'rni (SQLite'da faqat birinchi
+        sahifa uchun ma'lum, aks holda None).
+        """
+        await self._ensure_loaded()  # Lazy loading
+        if order not in USER_ORDERS:
+            raise ValueError(f"Noma'lum tartib: {order}")
+
+        keys, offset = self.user_index.page(order, decode_cursor(cursor) if cursor else None, limit, backward)
+        user_ids = [str(key[-1]) for key in keys]
+        # Xulosasi saqlangan foydalanuvchilar xabarlarini yuklash shart emas
+        await self._load_deferred([
+            user_id for user_id in user_ids
+            if user_id in self._unloaded and self.data[user_id].stats.recent is None
+        ])
+
+        total = len(self.user_index)
+        return {
+            "users": [(user_id, self.data[user_id]) for user_id in user_ids],
+            "offset": offset,
+            "total": total,
+            "prev": encode_cursor(keys[0]) if keys and offset > 0 else None,
+            "next": encode_cursor(keys[-1]) if keys and offset + len(keys) < total else None
+        }
+
+    async def get_users_count(self) -> int:
+        """Foydalanuvchilar soni (xabarlarni yuklamasdan)"""
+        await self._ensure_loaded()  # Lazy loading
+        return len(self.data)
+
     async def get_user_data(self, user_id: int) -> Optional[UserData]:
         """Foydalanuvchi ma'lumotlarini olish"""
         await self._ensure_loaded()  # Lazy loading
+        await self._ensure_user_loaded(str(user_id))
         return self.data.get(str(user_id))
 
     async def get_user_messages(self, user_id: int) -> List[Message]:
@@ -245,83 +1127,100 @@ class MessageDatabase:
     async def get_unread_messages_count(self) -> int:
         """Javob berilmagan xabarlar soni"""
         await self._ensure_loaded()  # Lazy loading
-        count = 0
-        for user_data in self.data.values():
-            if user_data.messages and user_data.messages[-1].type == "user":
-                count += 1
-        return count
+        return self.stats_index.unread_count
 
-    async def get_stats(self) -> Dict[str, Any]:
-        """Bot statistikasi"""
-        await self._ensure_loaded()  # Lazy loading
+    async def get_waiting_queue(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Javob kutayotgan suhbatlar, eng uzoq kutayotgani birinchi
 
-        total_users = len(self.data)
-        total_messages = sum(len(user_data.messages) for user_data in self.data.values())
-        unread_messages = await self.get_unread_messages_count()
+        Natija: (user_id, kutish boshlangan vaqt) juftliklari.
+        """
+        await self._ensure_loaded()  # Lazy loading
+        return self.stats_index.peek_waiting(limit)
 
-        # Faol foydalanuvchilar (24 soat)
-        yesterday = datetime.now() - timedelta(days=1)
-        active_users = 0
+    async def pop_waiting(self) -> Optional[Tuple[str, int]]:
+        """Eng uzoq kutayotgan suhbatni navbatdan olish (admin /next)"""
+        await self._ensure_loaded()  # Lazy loading
+        return self.stats_index.pop_waiting()
 
-        for user_data in self.data.values():
-            try:
-                last_activity = datetime.strptime(
-                    user_data.stats.last_activity,
-                    Formats.DATETIME_FORMAT
-                )
-                if last_activity > yesterday:
-                    active_users += 1
-            except (ValueError, AttributeError):
-                pass
+    async def get_stats(self) -> Dict[str, Any]:
+        """Bot statistikasi"""
+        await self._ensure_loaded()  # Lazy loading
 
-        # Eng faol foydalanuvchilar
-        top_users = sorted(
-            self.data.items(),
-            key=lambda x: x[1].stats.total_messages,
-            reverse=True
-        )[:5]
+        index = self.stats_index
 
         return {
-            "total_users": total_users,
-            "total_messages": total_messages,
-            "unread_messages": unread_messages,
-            "active_users_24h": active_users,
+            "total_users": len(self.data),
+            "total_messages": index.total_messages,
+            "unread_messages": index.unread_count,
+            "active_users_24h": index.active_count(),
             "top_users": [
                 {
                     "user_id": user_id,
-                    "name": f"{data.user_info.first_name} {data.user_info.last_name or ''}".strip(),
-                    "messages_count": data.stats.total_messages
+                    "name": f"{self.data[user_id].user_info.first_name} "
+                            f"{self.data[user_id].user_info.last_name or ''}".strip(),
+                    "messages_count": count
                 }
-                for user_id, data in top_users
+                for count, user_id in index.top()
             ]
         }
 
-    async def search_messages(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Xabarlarda qidirish"""
-        await self._ensure_loaded()  # Lazy loading
+    async def _ensure_search_index(self) -> SearchIndex:
+        """Qidiruv indeksini birinchi murojaatda alohida oqimda qurish
 
-        results = []
-        query_lower = query.lower()
+        Qurish paytida kelgan xabarlar keyin, snapshotdagi uzunlikdan
+        boshlab qo'shiladi; shundan so'ng indeks har bir o'zgarishda
+        yangilanadi.
+        """
+        if self.search_index is not None:
+            return self.search_index
 
-        for user_id, user_data in self.data.items():
-            user_info = user_data.user_info
+        async with self._search_lock:
+            if self.search_index is None:
+                await self._ensure_all_loaded()
+                started = time.perf_counter()
+                state = {user_id: (data.messages, len(data.messages)) for user_id, data in self.data.items()}
 
-            for message in user_data.messages:
-                if query_lower in message.text.lower():
-                    results.append({
-                        "user_id": user_id,
-                        "user_name": f"{user_info.first_name} {user_info.last_name or ''}".strip(),
-                        "username": user_info.username,
-                        "message": message,
-                        "match_text": message.text
-                    })
+                def items():
+                    for user_id, (messages, count) in state.items():
+                        for message in messages[:count]:
+                            yield user_id, message
 
-                    if len(results) >= limit:
-                        break
+                index = await asyncio.to_thread(SearchIndex.build, items())
+                for user_id, user_data in self.data.items():
+                    start = state[user_id][1] if user_id in state else 0
+                    for message in user_data.messages[start:]:
+                        index.add(user_id, message)
+                self.search_index = index
+                logger.info(
+                    f"🔎 Qidiruv indeksi qurildi: {len(index)} xabar, "
+                    f"{time.perf_counter() - started:.2f} s"
+                )
+        return self.search_index
 
-            if len(results) >= limit:
-                break
+    async def search_messages(self, query: str, limit: int = 50,
+                              before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Xabarlarda qidirish (eng yangi natijalar birinchi)
 
+        So'zlar qism-satr sifatida, lotin/kirill yozuvidan qat'i nazar qidiriladi.
+        ``from:``, ``since:``, ``until:``, ``type:`` va ``media:`` filtrlari
+        indekslardan olinadi (noto'g'ri filtrda ValueError). Keyingi sahifa
+        uchun oxirgi natijaning ``cursor`` qiymati ``before`` ga beriladi.
+        """
+        await self._ensure_loaded()  # Lazy loading
+        parsed = parse_query(query)
+        index = await self._ensure_search_index()
+
+        results = []
+        for doc_id, user_id, message in index.search(parsed, limit, before):
+            user_info = self.data[user_id].user_info
+            results.append({
+                "user_id": user_id,
+                "user_name": f"{user_info.first_name} {user_info.last_name or ''}".strip(),
+                "username": user_info.username,
+                "message": message,
+                "match_text": message.text,
+                "cursor": doc_id
+            })
         return results
 
     async def backup_data(self, backup_path: Path = None) -> bool:
@@ -331,22 +1230,16 @@ class MessageDatabase:
         try:
             if not backup_path:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                backup_path = self.file_path.parent.parent / "backup" / f"messages_backup_{timestamp}.json"
+                backup_path = self.backup_dir / f"messages_backup_{timestamp}.json"
 
             # Backup papkasini yaratish
             backup_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Ma'lumotlarni nusxalash
-            raw_data = {}
-            for user_id, user_data in self.data.items():
-                raw_data[user_id] = {
-                    "user_info": asdict(user_data.user_info),
-                    "messages": [asdict(msg) for msg in user_data.messages],
-                    "stats": asdict(user_data.stats)
-                }
-
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                json.dump(raw_data, f, ensure_ascii=False, indent=2)
+            # Snapshot event loop'da olinadi, kodlash va yozish esa alohida oqimda
+            # O'qilmagan xabarlar eski snapshotdan xom holda ko'chiriladi
+            async with self._snapshot_lock:
+                state, seq = self._snapshot_state(), self._seq
+                await asyncio.to_thread(self._write_backup, backup_path, state, seq)
 
             logger.info(f"💾 Zahira nusxa yaratildi: {backup_path}")
             return True
@@ -359,9 +1252,9 @@ class MessageDatabase:
         """Foydalanuvchini bloklash"""
         try:
             user_data = await self.get_user_data(user_id)
-            if user_data:
-                user_data.user_info.is_blocked = True
-                return await self._save_data()
+            if user_data and await self._commit({"op": "block", "user_id": user_id, "blocked": True}):
+                await asyncio.to_thread(self.blocklist.save)
+                return True
             return False
         except Exception as e:
             logger.error(f"Foydalanuvchini bloklashda xatolik: {e}")
@@ -371,19 +1264,35 @@ class MessageDatabase:
         """Foydalanuvchini blokdan chiqarish"""
         try:
             user_data = await self.get_user_data(user_id)
-            if user_data:
-                user_data.user_info.is_blocked = False
-                return await self._save_data()
+            if user_data and await self._commit({"op": "block", "user_id": user_id, "blocked": False}):
+                await asyncio.to_thread(self.blocklist.save)
+                return True
             return False
         except Exception as e:
             logger.error(f"Blokdan chiqarishda xatolik: {e}")
             return False
 
     async def is_user_blocked(self, user_id: int) -> bool:
-        """Foydalanuvchi bloklanganmi tekshirish"""
-        user_data = await self.get_user_data(user_id)
-        return user_data.user_info.is_blocked if user_data else False
+        """Foydalanuvchi bloklanganmi tekshirish
+
+        Bloklanganlar fayli bo'lsa baza yuklanmaydi: xotiradagi to'plam
+        tekshiriladi. Fayl yo'q bo'lsa u birinchi yuklashda yaratiladi.
+        """
+        if not self.blocklist.loaded:
+            await self._ensure_loaded()
+        return user_id in self.blocklist
+
+
+def create_database():
+    """Sozlamalarga ko'ra ma'lumotlar bazasini yaratish"""
+    if DATABASE_BACKEND == "sqlite":
+        from sqlite_database import SQLiteMessageDatabase
+        return SQLiteMessageDatabase(DATABASE_PATH)
+    if Settings.STORAGE_LAYOUT == "sharded":
+        from sharded_database import ShardedMessageDatabase
+        return ShardedMessageDatabase(USERS_DIR / "index.json")
+    return MessageDatabase(DATABASE_PATH)
 
 
 # Global database instance
-db = MessageDatabase()
\ No newline at end of file
+db = create_database()
\ No newline at end of file
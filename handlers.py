@@ -5,30 +5,96 @@ Telegram bot handlerlari (aiogram 3.8)
 Barcha komandalar va xabar handlerlarini o'z ichiga oladi
 """
 
+import asyncio
 import logging
+import itertools
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
 from aiogram import Router, Bot, F
-from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command, CommandStart
+from aiogram.enums import ContentType
+from aiogram.types import Message, CallbackQuery, InlineKeyboardButton
+from aiogram.filters import Command, CommandStart, Filter
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from config import ADMIN_ID, Messages, Errors, Settings, Formats, CallbackData
+from config import ADMIN_ID, Messages, Errors, Settings, Formats, CallbackData, MediaTypes
 from database import db
-from utils import is_admin, split_long_message, escape_html, format_file_size, extract_user_id_from_message
+from middlewares import AdmissionMiddleware, ChatSerialMiddleware
+from outbound import outbound, PRIORITY_NOTIFY, PRIORITY_REPLY
+from utils import is_admin, escape_html, format_file_size, extract_user_id_from_message, format_timestamp, get_time_ago, create_pagination_keyboard, get_content_key
 
 logger = logging.getLogger(__name__)
 router = Router()
 
+# Xabar yuboruvchi roli: kontent jadvali kaliti (rol, kontent turi)
+ROLE_USER = "user"
+ROLE_ADMIN = "admin"
+Route = Callable[[Message, str, Optional[AdmissionMiddleware]], Awaitable[None]]
+
 # Admin reply rejimi - user_id saqlab qolish uchun
 admin_reply_mode: Dict[int, int] = {}
 
+# /search sahifalari: token -> (so'rov, har bir sahifaning kursori).
+# Callback data 64 baytdan oshmasligi uchun tugmada faqat token va sahifa raqami
+search_sessions: "OrderedDict[str, Tuple[str, List[Optional[int]]]]" = OrderedDict()
+search_tokens = itertools.count(1)
+SEARCH_SESSIONS_MAX = 100
+
+# /messages tartiblari tugmalari
+USER_ORDER_NAMES = {
+    "unread": "🔔 Javobsizlar",
+    "activity": "🕒 Faollik",
+    "messages": "💬 Xabarlar",
+}
+
 
 # =============================================================================
 # YORDAMCHI FUNKSIYALAR
 # =============================================================================
 
+def build_user_card(user_id: int, user_data):
+    """Foydalanuvchi ma'lumotlari matni va tugmalari"""
+    user_info = user_data.user_info
+    stats = user_data.stats
+
+    # So'nggi xabarlar xulosadan (ko'rinishlar allaqachon ekranlangan)
+    recent_text = ""
+    for msg_type, epoch, preview in stats.recent or []:
+        icon = "👤" if msg_type == "user" else "👨‍💻"
+        recent_text += f"{icon} {format_timestamp(epoch)}: {preview}\n"
+
+    info_text = f"""
+👤 <b>Foydalanuvchi ma'lumotlari</b>
+
+<b>Shaxsiy ma'lumotlar:</b>
+• Ism: {escape_html(user_info.first_name)} {escape_html(user_info.last_name or '')}
+• Username: @{user_info.username or 'Mavjud emas'}
+• ID: <code>{user_info.id}</code>
+• Birinchi murojaat: {format_timestamp(user_info.first_contact)}
+
+<b>Statistika:</b>
+• Jami xabarlar: {stats.total_messages}
+• So'nggi faollik: {format_timestamp(stats.last_activity)}
+• Status: {'🔴 Bloklangan' if user_info.is_blocked else '🟢 Faol'}
+
+<b>So'nggi xabarlar:</b>
+{recent_text or "Xabarlar yo'q"}
+"""
+
+    # Tugmalar
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(text="💬 Javob berish", callback_data=f"reply_{user_id}")
+
+    if user_info.is_blocked:
+        keyboard.button(text="✅ Blokdan chiqarish", callback_data=f"unblock_{user_id}")
+    else:
+        keyboard.button(text="🚫 Bloklash", callback_data=f"block_{user_id}")
+
+    keyboard.adjust(2)
+    return info_text, keyboard
+
+
 async def get_media_info(message: Message) -> str:
     """Media haqida ma'lumot olish"""
     info = ""
@@ -129,101 +195,133 @@ async def get_media_info(message: Message) -> str:
     return info
 
 
+def update_key(kind: str, message: Message) -> str:
+    """Yangilanishdan idempotentlik kaliti: qayta ishlangan yangilanish qayta yuborilmaydi"""
+    return f"{kind}:{message.chat.id}:{message.message_id}"
+
+
+def build_queue_stats(chat_serial: Optional[ChatSerialMiddleware],
+                      admission: Optional[AdmissionMiddleware] = None) -> str:
+    """Kiruvchi va chiquvchi navbatlar holati (/stats uchun)"""
+    text = "\n⚙️ <b>Navbatlar:</b>\n"
+    if chat_serial is not None:
+        stats = chat_serial.stats()
+        text += (f"• Kiruvchi: {stats['queued']} kutmoqda, {stats['active']} ishlanmoqda "
+                 f"(eng uzun navbat {stats['max_queued']})\n"
+                 f"• Chat navbatida kutish: o'rtacha {stats['wait_avg_ms']:.0f} ms, "
+                 f"p99 {stats['wait_p99_ms']:.0f} ms, eng ko'pi {stats['wait_max_ms']:.0f} ms\n")
+    text += f"• Chiquvchi: {outbound.pending} ta yuborilmoqda\n"
+    if admission is not None:
+        stats = admission.stats
+        text += (f"• Yuklama: {stats['overloads']} marta, rad etilgan {stats['rejected']}, "
+                 f"tashlangan {stats['shed']}, qoldirilgan bildirishnomalar {stats['deferred']}\n")
+    return text
+
+
+def acknowledge(message: Message, text: str):
+    """Foydalanuvchiga tasdiq xabari
+
+    Navbat orqali yuboriladi: ko'p foydalanuvchi birdaniga yozganda
+    tasdiqlar ham umumiy chegaraga rioya qiladi.
+    """
+    outbound.submit("send_message", message.chat.id, PRIORITY_NOTIFY, update_key("ack", message), text=text)
+
+
+def defer_for_overload(message: Message, admission: Optional[AdmissionMiddleware]) -> bool:
+    """Yuklama paytida saqlangan xabar uchun tasdiq va bildirishnomani qoldirish
+
+    Foydalanuvchi bir marta "band" javobini oladi, admin esa yuklama
+    tugagach bitta umumiy xabar oladi. Qoldirilgan bo'lsa True.
+    """
+    if admission is None or not admission.overloaded:
+        return False
+    admission.notify_busy(message.from_user.id, Messages.BUSY_STORED)
+    admission.defer_notification(message.from_user.id)
+    return True
+
+
 async def forward_media_to_admin(message: Message, user, media_info: str):
-    """Media ni adminga forward qilish"""
-    try:
-        # Media ni forward qilish
-        await message.forward(ADMIN_ID)
+    """Media ni adminga yuborish (yuborish navbatiga qo'yiladi)
 
-        # Ma'lumot xabarini yuborish
-        timestamp = datetime.now().strftime(Formats.DATETIME_FORMAT)
-        admin_notification = f"""
+    Izohli turlar bitta ``copy_message`` bilan ketadi: bildirishnoma izohda,
+    tugmalar shu xabarda. Izohsiz turlar, juda uzun bildirishnoma va nusxalab
+    bo'lmaydigan turlar uchun media va bildirishnoma alohida yuboriladi.
+    """
+    # Ism, username va izoh HTML izohga ekranlanib qo'yiladi: bitta "<" butun
+    # copy_message ni rad ettiradi va media yo'qoladi
+    timestamp = datetime.now().strftime(Formats.DATETIME_FORMAT)
+    admin_notification = f"""
 🔔 <b>Yangi media xabar keldi!</b>
 
 👤 <b>Foydalanuvchi:</b>
-• Ism: {user.first_name} {user.last_name or ''}
-• Username: @{user.username or 'Mavjud emas'}
+• Ism: {escape_html(user.first_name)} {escape_html(user.last_name or '')}
+• Username: @{escape_html(user.username or 'Mavjud emas')}
 • ID: <code>{user.id}</code>
 • Vaqt: {timestamp}
 
 📎 <b>Media ma'lumotlari:</b>
-{media_info}
+{escape_html(media_info)}
 
 📤 <b>Javob berish:</b>
 <code>/reply {user.id}</code>
 """
 
-        keyboard = InlineKeyboardBuilder()
-        keyboard.button(text="💬 Javob berish", callback_data=f"reply_{user.id}")
-        keyboard.button(text="👤 Foydalanuvchi", callback_data=f"user_{user.id}")
-        keyboard.adjust(2)
+    keyboard = InlineKeyboardBuilder()
+    keyboard.button(text="💬 Javob berish", callback_data=f"reply_{user.id}")
+    keyboard.button(text="👤 Foydalanuvchi", callback_data=f"user_{user.id}")
+    keyboard.adjust(2)
 
-        await message.bot.send_message(
-            chat_id=ADMIN_ID,
-            text=admin_notification,
-            reply_markup=keyboard.as_markup()
-        )
+    source = {"from_chat_id": message.chat.id, "message_id": message.message_id}
+    content_type = message.content_type
+    if content_type in MediaTypes.CAPTIONED and len(admin_notification) <= Settings.MAX_CAPTION_LENGTH:
+        await outbound.enqueue("copy_message", ADMIN_ID, PRIORITY_NOTIFY, update_key("notify", message),
+                               caption=admin_notification, reply_markup=keyboard.as_markup(), **source)
+        return
 
-        return True
-    except Exception as e:
-        logger.error(f"Adminga forward qilishda xatolik: {e}")
-        return False
+    method = "forward_message" if content_type in MediaTypes.FORWARD_ONLY else "copy_message"
+    await outbound.enqueue(method, ADMIN_ID, PRIORITY_NOTIFY, update_key("forward", message), **source)
+    await outbound.enqueue("send_message", ADMIN_ID, PRIORITY_NOTIFY, update_key("notify", message),
+                           text=admin_notification, reply_markup=keyboard.as_markup())
 
 
-async def send_admin_media_to_user(message: Message, user_id: int):
-    """Admin media ni foydalanuvchiga yuborish"""
-    try:
-        bot = message.bot
-        caption_text = f"💬 <b>Xodimundan javob:</b>"
-
-        if message.caption:
-            caption_text += f"\n\n{message.caption}"
-
-        if message.photo:
-            await bot.send_photo(chat_id=user_id, photo=message.photo[-1].file_id, caption=caption_text)
-        elif message.video:
-            await bot.send_video(chat_id=user_id, video=message.video.file_id, caption=caption_text)
-        elif message.audio:
-            await bot.send_audio(chat_id=user_id, audio=message.audio.file_id, caption=caption_text)
-        elif message.voice:
-            await bot.send_voice(chat_id=user_id, voice=message.voice.file_id)
-            await bot.send_message(chat_id=user_id, text=caption_text)
-        elif message.video_note:
-            await bot.send_video_note(chat_id=user_id, video_note=message.video_note.file_id)
-            await bot.send_message(chat_id=user_id, text=caption_text)
-        elif message.document:
-            await bot.send_document(chat_id=user_id, document=message.document.file_id, caption=caption_text)
-        elif message.sticker:
-            await bot.send_sticker(chat_id=user_id, sticker=message.sticker.file_id)
-            await bot.send_message(chat_id=user_id, text=caption_text)
-        elif message.animation:
-            await bot.send_animation(chat_id=user_id, animation=message.animation.file_id, caption=caption_text)
-        elif message.location:
-            await bot.send_location(chat_id=user_id, latitude=message.location.latitude,
-                                    longitude=message.location.longitude)
-            await bot.send_message(chat_id=user_id, text=caption_text)
-        elif message.venue:
-            await bot.send_venue(
-                chat_id=user_id,
-                latitude=message.venue.location.latitude,
-                longitude=message.venue.location.longitude,
-                title=message.venue.title,
-                address=message.venue.address
-            )
-            await bot.send_message(chat_id=user_id, text=caption_text)
-        elif message.contact:
-            await bot.send_contact(
-                chat_id=user_id,
-                phone_number=message.contact.phone_number,
-                first_name=message.contact.first_name,
-                last_name=message.contact.last_name or ""
-            )
-            await bot.send_message(chat_id=user_id, text=caption_text)
+async def send_admin_media_to_user(message: Message, user_id: int) -> List[asyncio.Future]:
+    """Admin media ni foydalanuvchiga yuborish navbatiga qo'yish
 
-        return True
-    except Exception as e:
-        logger.error(f"Admin media yuborishda xatolik: {e}")
-        return False
+    Media ``copy_message`` bilan nusxalanadi, izohli turlarda javob sarlavhasi
+    shu nusxaning izohiga qo'yiladi. Izohsiz turlar (stiker, joylashuv,
+    kontakt, ...) uchun sarlavha alohida xabar bo'lib ketadi; chat navbati
+    tartibni saqlaydi, shuning uchun u media'dan keyin yetkaziladi.
+    """
+    caption_text = f"💬 <b>Xodimundan javob:</b>"
+
+    if message.caption:
+        caption_text += f"\n\n{escape_html(message.caption)}"
+
+    copy = {"from_chat_id": message.chat.id, "message_id": message.message_id}
+    if message.content_type in MediaTypes.CAPTIONED and len(caption_text) <= Settings.MAX_CAPTION_LENGTH:
+        calls = [("copy_message", {**copy, "caption": caption_text})]
+    else:
+        calls = [("copy_message", copy), ("send_message", {"text": caption_text})]
+
+    key = update_key("reply", message)
+    return [await outbound.enqueue(method, user_id, PRIORITY_REPLY, f"{key}:{index}", **kwargs)
+            for index, (method, kwargs) in enumerate(calls)]
+
+
+def report_reply_delivery(user_id: int, futures: List[asyncio.Future]):
+    """Javob yetkazilmasa adminga bir marta xabar berish"""
+    reported = []
+
+    def on_done(future: asyncio.Future):
+        if future.cancelled() or future.exception() is None or reported:
+            return
+        reported.append(True)
+        outbound.submit("send_message", ADMIN_ID, PRIORITY_REPLY,
+                        text=Errors.REPLY_DELIVERY_FAILED.format(
+                            user_id=user_id, error=escape_html(str(future.exception()))))
+
+    for future in futures:
+        future.add_done_callback(on_done)
 
 
 # =============================================================================
@@ -267,7 +365,7 @@ async def help_handler(message: Message):
 
 @router.message(Command("messages"))
 async def messages_handler(message: Message):
-    """Barcha xabarlarni ko'rish (faqat admin)"""
+    """Foydalanuvchilar ro'yxati, bitta sahifa (faqat admin)"""
     try:
         user = message.from_user
 
@@ -277,14 +375,31 @@ async def messages_handler(message: Message):
 
         logger.info(f"📋 /messages - {user.first_name} ({user.id})")
 
-        stats = await db.get_stats()
-        all_users = await db.get_all_users()
-
-        if not all_users:
+        text, keyboard = await build_users_page("unread", None, False)
+        if text is None:
             await message.answer(Errors.NO_MESSAGES)
             return
 
-        stats_text = f"""
+        await message.answer(text, reply_markup=keyboard.as_markup())
+
+    except Exception as e:
+        logger.error(f"Messages handler xatoligi: {e}")
+        await message.answer(Errors.GENERAL_ERROR)
+
+
+async def build_users_page(order: str, cursor: Optional[str],
+                           backward: bool) -> Tuple[Optional[str], Optional[InlineKeyboardBuilder]]:
+    """/messages sahifasi: statistika, foydalanuvchilar va tugmalar
+
+    Bazadan faqat bitta sahifa olinadi; tugmalarda tartib va kursor
+    (``users_<tartib>_<n|p>_<kursor>``) saqlanadi. Foydalanuvchi bo'lmasa matn None.
+    """
+    page = await db.get_users_page(order, cursor, Settings.USERS_PAGE_SIZE, backward)
+    if not page["users"]:
+        return None, None
+
+    stats = await db.get_stats()
+    text = f"""
 📊 <b>Bot Statistikasi</b>
 
 👥 Jami foydalanuvchilar: {stats['total_users']}
@@ -292,62 +407,44 @@ async def messages_handler(message: Message):
 🔔 Javob kutayotgan: {stats['unread_messages']}
 🟢 Faol (24h): {stats['active_users_24h']}
 
-📋 <b>Foydalanuvchilar:</b>
+📋 <b>Foydalanuvchilar ({USER_ORDER_NAMES[order]}):</b>
 """
 
-        await message.answer(stats_text)
-
-        users_list = list(all_users.items())
-        page_size = 5
-
-        for i in range(0, len(users_list), page_size):
-            page_users = users_list[i:i + page_size]
-            response_parts = []
-
-            for user_id, user_data in page_users:
-                user_info = user_data.user_info
-                messages = user_data.messages
-                user_messages = [m for m in messages if m.type == "user"]
-                admin_replies = [m for m in messages if m.type == "admin"]
-
-                status_emoji = ""
-                last_message = ""
-                if messages:
-                    last_msg = messages[-1]
-                    last_message = escape_html(last_msg.text[:50])
-                    if len(last_msg.text) > 50:
-                        last_message += "..."
-
-                    if last_msg.type == 'user':
-                        status_emoji = "❗️"
+    for user_id, user_data in page["users"]:
+        # Xabarlar ro'yxati o'qilmaydi: hisoblagichlar UserStats xulosasida
+        user_info = user_data.user_info
+        user_stats = user_data.stats
+        status_emoji = "❗️" if user_stats.last_sender == "user" else ""
 
-                user_block = f"""
+        text += f"""
 👤 <b>{escape_html(user_info.first_name)} {escape_html(user_info.last_name or '')}</b>
 🆔 ID: <code>{user_id}</code>
 📱 @{user_info.username or 'Mavjud emas'}
-💬 Xabarlar: {len(user_messages)} | Javoblar: {len(admin_replies)}
-📝 So'nggi: {last_message} {status_emoji}
-
+💬 Xabarlar: {user_stats.total_messages} | Javoblar: {user_stats.admin_replies}
+📝 So'nggi: {user_stats.last_preview} {status_emoji}
 ➡️ <code>/reply {user_id}</code>
-
-{'=' * 30}
 """
-                response_parts.append(user_block)
-
-            page_text = "\n".join(response_parts)
-            if len(page_text) > Settings.MAX_MESSAGE_LENGTH:
-                for part in split_long_message(page_text):
-                    await message.answer(part)
-            else:
-                await message.answer(page_text)
 
-    except Exception as e:
-        logger.error(f"Messages handler xatoligi: {e}")
-        await message.answer(Errors.GENERAL_ERROR)
+    if page["offset"] is not None:
+        first = page["offset"] + 1
+        label = f"{first}-{first + len(page['users']) - 1}/{page['total']}"
+    else:
+        label = f"👥 {page['total']}"
+    keyboard = create_pagination_keyboard(
+        f"users_{order}_p_{page['prev']}" if page["prev"] else None,
+        f"users_{order}_n_{page['next']}" if page["next"] else None,
+        label
+    )
+    keyboard.row(*[
+        InlineKeyboardButton(text=("• " if name == order else "") + title, callback_data=f"users_{name}_n_")
+        for name, title in USER_ORDER_NAMES.items()
+    ])
+    return text, keyboard
 
 
 @router.message(Command("stats"))
-async def stats_handler(message: Message):
+async def stats_handler(message: Message, chat_serial: Optional[ChatSerialMiddleware] = None,
+                        admission: Optional[AdmissionMiddleware] = None):
     """Bot statistikasi (faqat admin)"""
     try:
         user = message.from_user
@@ -377,7 +474,7 @@ async def stats_handler(message: Message):
 
 🏆 <b>Eng faol foydalanuvchilar:</b>
 {top_users_text or "Ma'lumot yo'q"}
-
+{build_queue_stats(chat_serial, admission)}
 📅 <b>Vaqt:</b> {datetime.now().strftime(Formats.DATETIME_FORMAT)}
 """
 
@@ -388,6 +485,47 @@ async def stats_handler(message: Message):
         await message.answer(Errors.GENERAL_ERROR)
 
 
+@router.message(Command("next"))
+async def next_handler(message: Message):
+    """Eng uzoq kutayotgan suhbatni olish (faqat admin)"""
+    try:
+        user = message.from_user
+
+        if not is_admin(user.id):
+            await message.answer(Errors.ADMIN_ONLY)
+            return
+
+        logger.info(f"⏭ /next - {user.first_name} ({user.id})")
+
+        waiting = await db.pop_waiting()
+        if waiting is None:
+            await message.answer("✅ Javob kutayotgan suhbatlar yo'q!")
+            return
+
+        user_id, since = waiting
+        user_data = await db.get_user_data(int(user_id))
+        if not user_data:
+            await message.answer(Errors.USER_NOT_FOUND)
+            return
+
+        # Keyingi xabar avtomatik shu foydalanuvchiga yuboriladi
+        admin_reply_mode[user.id] = int(user_id)
+
+        info_text, keyboard = build_user_card(int(user_id), user_data)
+        unread = await db.get_unread_messages_count()
+        header = f"""
+⏭ <b>Navbatdagi suhbat</b>
+⏳ Kutmoqda: {get_time_ago(since)} ({format_timestamp(since)})
+🔔 Javob kutayotgan jami: {unread}
+💬 Javob rejimi yoqildi - keyingi xabaringiz shu foydalanuvchiga yuboriladi
+"""
+        await message.answer(header + info_text, reply_markup=keyboard.as_markup())
+
+    except Exception as e:
+        logger.error(f"Next handler xatoligi: {e}")
+        await message.answer(Errors.GENERAL_ERROR)
+
+
 @router.message(Command("reply"))
 async def reply_handler(message: Message):
     """Foydalanuvchiga javob berish (faqat admin)"""
@@ -458,17 +596,17 @@ async def reply_handler(message: Message):
                 return
 
             try:
-                bot = message.bot
-                await bot.send_message(
-                    chat_id=target_user_id,
+                future = await outbound.enqueue(
+                    "send_message", target_user_id, PRIORITY_REPLY, update_key("reply", message),
                     text=f"💬 <b>Xodimundan xabar:</b>\n\n{escape_html(reply_text)}"
                 )
+                report_reply_delivery(target_user_id, [future])
 
                 if await db.add_admin_reply(target_user_id, reply_text):
-                    await message.answer(Errors.REPLY_SUCCESS)
-                    logger.info(f"✅ Tezkor javob yuborildi: {target_user_id}")
+                    await message.answer(Messages.REPLY_QUEUED)
+                    logger.info(f"✅ Tezkor javob navbatga qo'yildi: {target_user_id}")
                 else:
-                    await message.answer("⚠️ Javob yuborildi, lekin saqlashda muammo!")
+                    await message.answer("⚠️ Javob navbatga qo'yildi, lekin saqlashda muammo!")
 
             except Exception as e:
                 logger.error(f"Javob yuborishda xatolik: {e}")
@@ -495,44 +633,86 @@ async def search_handler(message: Message):
 
         command_parts = message.text.split(' ', 1)
         if len(command_parts) < 2:
-            await message.answer("❌ Qidiruv so'zini kiriting!\n\nMisol: <code>/search salom</code>")
+            await message.answer(
+                "❌ Qidiruv so'zini kiriting!\n\nMisol: <code>/search salom</code>\n"
+                "Filtrlar: <code>from:&lt;user_id&gt; since:2026-09-01 type:admin media:photo</code>"
+            )
             return
 
         query = command_parts[1]
         logger.info(f"🔍 /search '{query}' - {user.first_name} ({user.id})")
 
-        results = await db.search_messages(query, limit=20)
+        token = f"{next(search_tokens):x}"
+        cursors: List[Optional[int]] = [None]
+        try:
+            text, keyboard = await build_search_page(token, query, cursors, 0)
+        except ValueError as ve:
+            await message.answer(f"❌ {escape_html(str(ve))}")
+            return
 
-        if not results:
+        if text is None:
             await message.answer(Errors.NO_SEARCH_RESULTS)
             return
 
-        search_results = f"🔍 <b>Qidiruv natijalari: '{escape_html(query)}'</b>\n\n"
+        # Bitta sahifadan ko'p bo'lsa, tugmalar uchun sessiya saqlanadi
+        if keyboard is not None:
+            search_sessions[token] = (query, cursors)
+            while len(search_sessions) > SEARCH_SESSIONS_MAX:
+                search_sessions.popitem(last=False)
 
-        for i, result in enumerate(results[:10], 1):
-            user_name = escape_html(result['user_name'])
-            username = result['username'] or 'Mavjud emas'
-            match_text = escape_html(result['match_text'][:100])
-            if len(result['match_text']) > 100:
-                match_text += "..."
+        await message.answer(text, reply_markup=keyboard.as_markup() if keyboard else None)
 
-            search_results += f"""
-{i}. 👤 <b>{user_name}</b> (@{username})
-📝 {match_text}
-⏰ {result['message'].timestamp}
-🆔 <code>/reply {result['user_id']}</code>
+    except Exception as e:
+        logger.error(f"Search handler xatoligi: {e}")
+        await message.answer(Errors.GENERAL_ERROR)
 
-"""
 
-        if len(results) > 10:
-            search_results += f"\n... va yana {len(results) - 10} natija"
+async def build_search_page(token: str, query: str, cursors: List[Optional[int]],
+                            page: int) -> Tuple[Optional[str], Optional[InlineKeyboardBuilder]]:
+    """Qidiruv natijalarining bitta sahifasi: (matn, tugmalar)
 
-        for part in split_long_message(search_results):
-            await message.answer(part)
+    ``cursors[page]`` - sahifa boshlanadigan kursor; keyingi sahifa kursori
+    shu yerda ro'yxatga qo'shiladi. Natija bo'lmasa matn None.
+    """
+    page_size = Settings.SEARCH_PAGE_SIZE
+    results = await db.search_messages(query, limit=page_size + 1, before=cursors[page])
+    if not results:
+        return None, None
+
+    has_next = len(results) > page_size
+    results = results[:page_size]
+    if has_next and len(cursors) == page + 1:
+        cursors.append(results[-1]["cursor"])
+
+    text = f"🔍 <b>Qidiruv natijalari: '{escape_html(query)}'</b> (sahifa {page + 1})\n\n"
+    for i, result in enumerate(results, page * page_size + 1):
+        msg = result['message']
+        user_name = escape_html(result['user_name'])
+        username = result['username'] or 'Mavjud emas'
+        match_text = escape_html(result['match_text'][:100])
+        if len(result['match_text']) > 100:
+            match_text += "..."
+        sender = "👤" if msg.type == "user" else "👨‍💻"
+        media = MediaTypes.MEDIA_EMOJIS.get(msg.media_type, "📝")
+        if msg.repeats > 1:
+            match_text += f" (×{msg.repeats})"
+
+        text += f"""
+{i}. {sender} <b>{user_name}</b> (@{username})
+{media} {match_text}
+⏰ {msg.timestamp}
+🆔 <code>/reply {result['user_id']}</code>
+"""
 
-    except Exception as e:
-        logger.error(f"Search handler xatoligi: {e}")
-        await message.answer(Errors.GENERAL_ERROR)
+    if page == 0 and not has_next:
+        return text, None
+
+    keyboard = create_pagination_keyboard(
+        f"search_{token}_{page - 1}" if page > 0 else None,
+        f"search_{token}_{page + 1}" if has_next else None,
+        f"{page + 1}"
+    )
+    return text, keyboard
 
 
 @router.message(Command("backup"))
@@ -570,111 +750,12 @@ async def backup_handler(message: Message):
 # USER MEDIA HANDLERLARI
 # =============================================================================
 
-@router.message(F.photo & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_photo_handler(message: Message):
-    """User rasm handleri"""
-    await user_media_handler(message, "photo")
-
-
-@router.message(F.video & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_video_handler(message: Message):
-    """User video handleri"""
-    await user_media_handler(message, "video")
-
-
-@router.message(F.audio & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_audio_handler(message: Message):
-    """User audio handleri"""
-    await user_media_handler(message, "audio")
-
-
-@router.message(F.voice & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_voice_handler(message: Message):
-    """User ovozli xabar handleri"""
-    await user_media_handler(message, "voice")
-
-
-@router.message(F.video_note & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_video_note_handler(message: Message):
-    """User video xabar handleri"""
-    await user_media_handler(message, "video_note")
-
-
-@router.message(F.document & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_document_handler(message: Message):
-    """User hujjat handleri"""
-    try:
-        # APK fayllarini tekshirish
-        document = message.document
-        if document:
-            file_name = document.file_name or ""
-            mime_type = document.mime_type or ""
-
-            if (file_name.lower().endswith('.apk') or
-                    mime_type == 'application/vnd.android.package-archive'):
-                await message.answer("❌ APK fayllari yuborish taqiqlangan!")
-                logger.warning(f"🚫 APK fayl rad etildi: {message.from_user.id}")
-                return
-
-        await user_media_handler(message, "document")
-
-    except Exception as e:
-        logger.error(f"User document handler xatoligi: {e}")
-        await message.answer(Errors.GENERAL_ERROR)
-
-
-@router.message(F.sticker & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_sticker_handler(message: Message):
-    """User stiker handleri"""
-    await user_media_handler(message, "sticker")
-
-
-@router.message(F.animation & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_animation_handler(message: Message):
-    """User GIF handleri"""
-    await user_media_handler(message, "animation")
-
-
-@router.message(F.location & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_location_handler(message: Message):
-    """User joylashuv handleri"""
-    await user_media_handler(message, "location")
-
-
-@router.message(F.venue & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_venue_handler(message: Message):
-    """User joy handleri"""
-    await user_media_handler(message, "venue")
-
-
-@router.message(F.contact & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_contact_handler(message: Message):
-    """User kontakt handleri"""
-    await user_media_handler(message, "contact")
-
-
-@router.message(F.poll & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_poll_handler(message: Message):
-    """User so'rovnoma handleri"""
-    await user_media_handler(message, "poll")
-
-
-@router.message(F.dice & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_dice_handler(message: Message):
-    """User zar/o'yin handleri"""
-    await user_media_handler(message, "dice")
-
-
-async def user_media_handler(message: Message, media_type: str):
+async def user_media_handler(message: Message, media_type: str,
+                             admission: Optional[AdmissionMiddleware] = None):
     """User media handleri"""
     try:
         user = message.from_user
 
-        # Bloklangan foydalanuvchilarni tekshirish
-        if await db.is_user_blocked(user.id):
-            logger.info(f"🚫 Bloklangan foydalanuvchi: {user.first_name} ({user.id})")
-            return
-
         logger.info(f"🎭 {media_type.upper()} - {user.first_name} ({user.id})")
 
         # Media ma'lumotlarini olish
@@ -684,6 +765,14 @@ async def user_media_handler(message: Message, media_type: str):
             await message.answer(f"❌ {str(ve)}")
             return
 
+        # Takroriy fayl: oldingi xabar hisoblagichi oshiriladi, admin qayta bezovta qilinmaydi
+        content_key = get_content_key(message)
+        if content_key is not None:
+            repeats = await db.fold_duplicate(user.id, content_key)
+            if repeats:
+                acknowledge(message, Messages.DUPLICATE_RECEIVED.format(count=repeats))
+                return
+
         # Foydalanuvchi ma'lumotlarini tayyorlash
         user_dict = {
             "first_name": user.first_name,
@@ -692,9 +781,13 @@ async def user_media_handler(message: Message, media_type: str):
         }
 
         # Xabarni saqlash
-        if await db.add_user_message(user.id, user_dict, media_info, message.message_id):
+        if await db.add_user_message(user.id, user_dict, media_info, message.message_id, media_type,
+                                     content_key=content_key):
+            if defer_for_overload(message, admission):
+                return
+
             # Foydalanuvchiga tasdiq xabari
-            await message.answer(Messages.MESSAGE_RECEIVED)
+            acknowledge(message, Messages.MESSAGE_RECEIVED)
 
             # Adminga forward qilish
             await forward_media_to_admin(message, user, media_info)
@@ -706,77 +799,35 @@ async def user_media_handler(message: Message, media_type: str):
         await message.answer(Errors.GENERAL_ERROR)
 
 
-# =============================================================================
-# ADMIN MEDIA HANDLERLARI (Reply rejimida)
-# =============================================================================
-
-@router.message(F.photo & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_photo_handler(message: Message):
-    """Admin rasm handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.video & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_video_handler(message: Message):
-    """Admin video handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.audio & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_audio_handler(message: Message):
-    """Admin audio handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.voice & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_ovozli_handler(message: Message):
-    """Admin ovozli xabar handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.video_note & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_video_note_handler(message: Message):
-    """Admin video xabar handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.document & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_document_handler(message: Message):
-    """Admin hujjat handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.sticker & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_sticker_handler(message: Message):
-    """Admin stiker handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.animation & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_animation_handler(message: Message):
-    """Admin GIF handleri"""
-    await admin_media_handler(message)
-
-
-@router.message(F.location & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_location_handler(message: Message):
-    """Admin joylashuv handleri"""
-    await admin_media_handler(message)
+async def user_document_handler(message: Message, media_type: str,
+                                admission: Optional[AdmissionMiddleware] = None):
+    """User hujjat handleri"""
+    try:
+        # APK fayllarini tekshirish
+        document = message.document
+        if document:
+            file_name = document.file_name or ""
+            mime_type = document.mime_type or ""
 
+            if (file_name.lower().endswith('.apk') or
+                    mime_type == 'application/vnd.android.package-archive'):
+                await message.answer("❌ APK fayllari yuborish taqiqlangan!")
+                logger.warning(f"🚫 APK fayl rad etildi: {message.from_user.id}")
+                return
 
-@router.message(F.venue & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_venue_handler(message: Message):
-    """Admin joy handleri"""
-    await admin_media_handler(message)
+        await user_media_handler(message, media_type, admission)
 
+    except Exception as e:
+        logger.error(f"User document handler xatoligi: {e}")
+        await message.answer(Errors.GENERAL_ERROR)
 
-@router.message(F.contact & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_contact_handler(message: Message):
-    """Admin kontakt handleri"""
-    await admin_media_handler(message)
 
+# =============================================================================
+# ADMIN MEDIA HANDLERLARI (Reply rejimida)
+# =============================================================================
 
-async def admin_media_handler(message: Message):
+async def admin_media_handler(message: Message, media_type: str,
+                              admission: Optional[AdmissionMiddleware] = None):
     """Admin media handleri"""
     try:
         user = message.from_user
@@ -809,17 +860,19 @@ Keyin rasm/video/audio yuboring
             await message.answer("⚠️ Bu foydalanuvchi bloklangan!")
             return
 
-        # Media yuborish
-        success = await send_admin_media_to_user(message, target_user_id)
+        # Media yuborish navbatga qo'yiladi, handler yetkazishni kutmaydi
+        futures = await send_admin_media_to_user(message, target_user_id)
+
+        if futures:
+            report_reply_delivery(target_user_id, futures)
 
-        if success:
             # Ma'lumotni bazaga saqlash
             media_info = await get_media_info(message)
-            if await db.add_admin_reply(target_user_id, media_info):
-                await message.answer("✅ Media javob muvaffaqiyatli yuborildi!")
-                logger.info(f"✅ Media javob yuborildi: {target_user_id}")
+            if await db.add_admin_reply(target_user_id, media_info, media_type):
+                await message.answer(Messages.REPLY_QUEUED)
+                logger.info(f"✅ Media javob navbatga qo'yildi: {target_user_id}")
             else:
-                await message.answer("⚠️ Media yuborildi, lekin saqlashda muammo!")
+                await message.answer("⚠️ Media navbatga qo'yildi, lekin saqlashda muammo!")
 
             # Reply rejimini o'chirish
             admin_reply_mode.pop(user.id, None)
@@ -835,8 +888,8 @@ Keyin rasm/video/audio yuboring
 # ADMIN MATN HANDLERI
 # =============================================================================
 
-@router.message(F.text & F.from_user.func(lambda user: is_admin(user.id)))
-async def admin_text_handler(message: Message):
+async def admin_text_handler(message: Message, media_type: str,
+                             admission: Optional[AdmissionMiddleware] = None):
     """Admin matn handleri"""
     try:
         user = message.from_user
@@ -876,19 +929,19 @@ Barcha komandalar: /help
             await message.answer("⚠️ Bu foydalanuvchi bloklangan!")
             return
 
-        # Matn javob yuborish
+        # Matn javob yuborish navbatga qo'yiladi
         try:
-            bot = message.bot
-            await bot.send_message(
-                chat_id=target_user_id,
+            future = await outbound.enqueue(
+                "send_message", target_user_id, PRIORITY_REPLY, update_key("reply", message),
                 text=f"💬 <b>Xodimundan xabar:</b>\n\n{escape_html(message.text)}"
             )
+            report_reply_delivery(target_user_id, [future])
 
             if await db.add_admin_reply(target_user_id, message.text):
-                await message.answer("✅ Javob muvaffaqiyatli yuborildi!")
-                logger.info(f"✅ Matn javob yuborildi: {target_user_id}")
+                await message.answer(Messages.REPLY_QUEUED)
+                logger.info(f"✅ Matn javob navbatga qo'yildi: {target_user_id}")
             else:
-                await message.answer("⚠️ Javob yuborildi, lekin saqlashda muammo!")
+                await message.answer("⚠️ Javob navbatga qo'yildi, lekin saqlashda muammo!")
 
             # Reply rejimini o'chirish
             admin_reply_mode.pop(user.id, None)
@@ -906,20 +959,21 @@ Barcha komandalar: /help
 # USER MATN HANDLERI
 # =============================================================================
 
-@router.message(F.text & F.from_user.func(lambda user: not is_admin(user.id)))
-async def user_text_handler(message: Message):
+async def user_text_handler(message: Message, media_type: str,
+                            admission: Optional[AdmissionMiddleware] = None):
     """User matn xabar handleri"""
     try:
         user = message.from_user
         message_text = message.text
 
-        # Bloklangan foydalanuvchilarni tekshirish
-        if await db.is_user_blocked(user.id):
-            logger.info(f"🚫 Bloklangan foydalanuvchi: {user.first_name} ({user.id})")
-            return
-
         logger.info(f"💬 Matn xabar - {user.first_name} ({user.id}): {message_text[:50]}...")
 
+        # Takroriy matn: oldingi xabar hisoblagichi oshiriladi, admin qayta bezovta qilinmaydi
+        repeats = await db.fold_duplicate(user.id, message_text)
+        if repeats:
+            acknowledge(message, Messages.DUPLICATE_RECEIVED.format(count=repeats))
+            return
+
         # Foydalanuvchi ma'lumotlarini tayyorlash
         user_dict = {
             "first_name": user.first_name,
@@ -928,9 +982,13 @@ async def user_text_handler(message: Message):
         }
 
         # Xabarni saqlash
-        if await db.add_user_message(user.id, user_dict, message_text, message.message_id):
+        if await db.add_user_message(user.id, user_dict, message_text, message.message_id,
+                                     content_key=message_text):
+            if defer_for_overload(message, admission):
+                return
+
             # Foydalanuvchiga tasdiq
-            await message.answer(Messages.MESSAGE_RECEIVED)
+            acknowledge(message, Messages.MESSAGE_RECEIVED)
 
             # Adminga bildirishnoma
             try:
@@ -951,9 +1009,8 @@ async def user_text_handler(message: Message):
                 )
                 keyboard.adjust(2)
 
-                bot = message.bot
-                await bot.send_message(
-                    chat_id=ADMIN_ID,
+                await outbound.enqueue(
+                    "send_message", ADMIN_ID, PRIORITY_NOTIFY, update_key("notify", message),
                     text=admin_notification,
                     reply_markup=keyboard.as_markup()
                 )
@@ -968,6 +1025,62 @@ async def user_text_handler(message: Message):
         await message.answer(Errors.GENERAL_ERROR)
 
 
+# =============================================================================
+# KONTENT TURI BO'YICHA YO'NALTIRISH
+# =============================================================================
+
+class ContentRoute(Filter):
+    """(rol, kontent turi) jadvalidan handler tanlovchi filtr
+
+    Admin tekshiruvi va ``content_type`` har bir xabar uchun bir marta
+    hisoblanadi, handler lug'atdan bitta qidiruv bilan topiladi. Topilgan
+    handler ``route``, tur esa ``media_type`` sifatida uzatiladi; jadvalda
+    yo'q turlar ishlanmagan bo'lib qoladi.
+    """
+
+    def __init__(self, routes: Dict[Tuple[str, str], Route]):
+        self.routes = routes
+
+    async def __call__(self, message: Message) -> Union[bool, Dict[str, Any]]:
+        user = message.from_user
+        if user is None:
+            return False
+        role = ROLE_ADMIN if is_admin(user.id) else ROLE_USER
+        content_type = message.content_type
+        route = self.routes.get((role, content_type))
+        if route is None:
+            return False
+        return {"route": route, "media_type": content_type.value}
+
+
+# Jadvaldagi handlerlar (message, media_type, admission) qabul qiladi
+USER_MEDIA_TYPES = (
+    MediaTypes.PHOTO, MediaTypes.VIDEO, MediaTypes.AUDIO, MediaTypes.VOICE, MediaTypes.VIDEO_NOTE,
+    MediaTypes.STICKER, MediaTypes.ANIMATION, MediaTypes.LOCATION, MediaTypes.VENUE,
+    MediaTypes.CONTACT, MediaTypes.POLL, MediaTypes.DICE,
+)
+ADMIN_MEDIA_TYPES = (
+    MediaTypes.PHOTO, MediaTypes.VIDEO, MediaTypes.AUDIO, MediaTypes.VOICE, MediaTypes.VIDEO_NOTE,
+    MediaTypes.DOCUMENT, MediaTypes.STICKER, MediaTypes.ANIMATION, MediaTypes.LOCATION,
+    MediaTypes.VENUE, MediaTypes.CONTACT,
+)
+
+CONTENT_ROUTES: Dict[Tuple[str, str], Route] = {
+    **{(ROLE_USER, media_type): user_media_handler for media_type in USER_MEDIA_TYPES},
+    (ROLE_USER, MediaTypes.DOCUMENT): user_document_handler,
+    (ROLE_USER, ContentType.TEXT): user_text_handler,
+    **{(ROLE_ADMIN, media_type): admin_media_handler for media_type in ADMIN_MEDIA_TYPES},
+    (ROLE_ADMIN, ContentType.TEXT): admin_text_handler,
+}
+
+
+@router.message(ContentRoute(CONTENT_ROUTES))
+async def content_handler(message: Message, route: Route, media_type: str,
+                          admission: Optional[AdmissionMiddleware] = None):
+    """Matn va media xabarlar: jadvaldan topilgan handlerga uzatish"""
+    await route(message, media_type, admission)
+
+
 # =============================================================================
 # CALLBACK HANDLERLARI
 # =============================================================================
@@ -1022,55 +1135,74 @@ async def user_info_callback_handler(callback: CallbackQuery):
             await callback.answer("❌ Foydalanuvchi topilmadi!", show_alert=True)
             return
 
-        user_info = user_data.user_info
-        stats = user_data.stats
-        messages = user_data.messages
+        info_text, keyboard = build_user_card(user_id, user_data)
+        await callback.message.answer(info_text, reply_markup=keyboard.as_markup())
+        await callback.answer()
 
-        # So'nggi 3 ta xabarni olish
-        recent_messages = messages[-3:] if len(messages) > 3 else messages
-        recent_text = ""
+    except Exception as e:
+        logger.error(f"User info callback xatoligi: {e}")
+        await callback.answer("❌ Xatolik yuz berdi!")
 
-        for msg in recent_messages:
-            msg_type = "👤" if msg.type == "user" else "👨‍💻"
-            msg_text = escape_html(msg.text[:50])
-            if len(msg.text) > 50:
-                msg_text += "..."
-            recent_text += f"{msg_type} {msg.timestamp}: {msg_text}\n"
 
-        info_text = f"""
-👤 <b>Foydalanuvchi ma'lumotlari</b>
+@router.callback_query(F.data.startswith("users_"))
+async def users_page_callback_handler(callback: CallbackQuery):
+    """/messages sahifasini yoki tartibini almashtirish"""
+    try:
+        if not is_admin(callback.from_user.id):
+            await callback.answer("❌ Ruxsat yo'q!", show_alert=True)
+            return
 
-<b>Shaxsiy ma'lumotlar:</b>
-• Ism: {escape_html(user_info.first_name)} {escape_html(user_info.last_name or '')}
-• Username: @{user_info.username or 'Mavjud emas'}
-• ID: <code>{user_info.id}</code>
-• Birinchi murojaat: {user_info.first_contact}
+        _, order, direction, cursor = callback.data.split("_", 3)
+        text, keyboard = await build_users_page(order, cursor or None, direction == "p")
+        if text is None:
+            await callback.answer(Errors.NO_MESSAGES, show_alert=True)
+            return
 
-    <b>Statistika:</b>
-    • Jami xabarlar: {stats.total_messages}
-    • So'nggi faollik: {stats.last_activity}
-    • Status: {'🔴 Bloklangan' if user_info.is_blocked else '🟢 Faol'}
+        await callback.message.edit_text(text, reply_markup=keyboard.as_markup())
+        await callback.answer()
 
-    <b>So'nggi xabarlar:</b>
-    {recent_text or "Xabarlar yo'q"}
-    """
+    except Exception as e:
+        logger.error(f"Users page callback xatoligi: {e}")
+        await callback.answer("❌ Xatolik yuz berdi!")
 
-        # Tugmalar
-        keyboard = InlineKeyboardBuilder()
-        keyboard.button(text="💬 Javob berish", callback_data=f"reply_{user_id}")
 
-        if user_info.is_blocked:
-            keyboard.button(text="✅ Blokdan chiqarish", callback_data=f"unblock_{user_id}")
-        else:
-            keyboard.button(text="🚫 Bloklash", callback_data=f"block_{user_id}")
+@router.callback_query(F.data == "current_page")
+async def current_page_callback_handler(callback: CallbackQuery):
+    """Sahifa belgisi tugmasi (hech narsa qilmaydi)"""
+    await callback.answer()
 
-        keyboard.adjust(2)
 
-        await callback.message.answer(info_text, reply_markup=keyboard.as_markup())
+@router.callback_query(F.data.startswith("search_"))
+async def search_page_callback_handler(callback: CallbackQuery):
+    """Qidiruv natijalari sahifasini almashtirish"""
+    try:
+        if not is_admin(callback.from_user.id):
+            await callback.answer("❌ Ruxsat yo'q!", show_alert=True)
+            return
+
+        _, token, page = callback.data.split("_")
+        page = int(page)
+        session = search_sessions.get(token)
+        if session is None:
+            await callback.answer("⌛ Qidiruv eskirgan, /search ni qaytadan yuboring", show_alert=True)
+            return
+
+        query, cursors = session
+        if page >= len(cursors):
+            await callback.answer()
+            return
+
+        search_sessions.move_to_end(token)
+        text, keyboard = await build_search_page(token, query, cursors, page)
+        if text is None:
+            await callback.answer(Errors.NO_SEARCH_RESULTS, show_alert=True)
+            return
+
+        await callback.message.edit_text(text, reply_markup=keyboard.as_markup() if keyboard else None)
         await callback.answer()
 
     except Exception as e:
-        logger.error(f"User info callback xatoligi: {e}")
+        logger.error(f"Search callback xatoligi: {e}")
         await callback.answer("❌ Xatolik yuz berdi!")
 
 
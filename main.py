@@ -10,12 +10,17 @@ import logging
 import sys
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 
-from config import BOT_TOKEN, ADMIN_ID
+from config import BOT_TOKEN, ADMIN_ID, Settings
 from handlers import router
 from database import db
+from middlewares import AdmissionMiddleware, BlockedUserMiddleware, ChatSerialMiddleware, RateLimitMiddleware
+from outbound import outbound
+from webhook import run_webhook
 
 
 # Logging sozlamalari
@@ -49,17 +54,41 @@ async def main():
 
     logger.info("🤖 Bot ishga tushmoqda...")
 
-    # Bot va Dispatcher yaratish
+    # Bot va Dispatcher yaratish (TELEGRAM_API_URL - mahalliy yoki soxta Bot API server)
+    session = None
+    if Settings.TELEGRAM_API_URL:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(Settings.TELEGRAM_API_URL))
+        logger.info(f"🔌 Bot API: {Settings.TELEGRAM_API_URL}")
     bot = Bot(
         token=BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
 
     dp = Dispatcher(storage=MemoryStorage())
 
+    # Bloklangan foydalanuvchilar yangilanishlari hammasidan oldin tashlanadi:
+    # ular chat navbatlari, qulflar va parallel ishlash o'rinlarini egallamaydi
+    dp.update.outer_middleware(BlockedUserMiddleware(db))
+    # Turli chatlar parallel, bitta chat yangilanishlari kelgan tartibda.
+    # Oldidagi middleware'lar to'xtamaydi, shuning uchun vazifalar chat
+    # navbatiga kelish tartibida yetib keladi
+    chat_serial = ChatSerialMiddleware()
+    # Yuklamada navbatni chegaralash va past ustuvorlikdagilarni tashlash
+    admission = AdmissionMiddleware(chat_serial, db.blocklist)
+    dp.update.outer_middleware(admission)
+    dp.update.outer_middleware(chat_serial)
+    dp["chat_serial"] = chat_serial
+    dp["admission"] = admission
+    # Spam himoya: chegaradan oshgan xabarlar bazaga yozilmaydi
+    dp.message.outer_middleware(RateLimitMiddleware())
+
     # Routerni qo'shish
     dp.include_router(router)
 
+    # Chiquvchi xabarlar navbati: handlerlar yetkazishni kutmaydi
+    outbound.start(bot)
+
     # Bot ma'lumotlarini olish
     try:
         bot_info = await bot.get_me()
@@ -73,16 +102,23 @@ async def main():
         )
 
         # Database ma'lumotlari
-        all_users = await db.get_all_users()
-        logger.info(f"📊 Bazada {len(all_users)} foydalanuvchi")
+        users_count = await db.get_users_count()
+        logger.info(f"📊 Bazada {users_count} foydalanuvchi")
+
+        # Bloklanganlar ro'yxati oldindan tayyorlanadi: keyin BlockedUserMiddleware
+        # to'xtamaydi va yangilanishlar chat navbatiga kelish tartibini buzmaydi
+        await db.is_user_blocked(ADMIN_ID)
 
     except Exception as e:
         logger.error(f"❌ Bot ma'lumotlarini olishda xatolik: {e}")
         sys.exit(1)
 
     try:
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot, allowed_updates=['message', 'callback_query'])
+        if Settings.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            await bot.delete_webhook(drop_pending_updates=Settings.DROP_PENDING_UPDATES)
+            await dp.start_polling(bot, allowed_updates=['message', 'callback_query'])
 
     except KeyboardInterrupt:
         logger.info("🛑 Bot to'xtatildi (Ctrl+C)")
@@ -92,6 +128,9 @@ async def main():
         logger.error(f"❌ Bot ishida xatolik: {e}")
         await bot.send_message(ADMIN_ID, f"❌ Botda xatolik: {e}")
     finally:
+        # Navbatdagi javoblarni yetkazish, keyin jurnalni snapshotga siqish
+        await outbound.close()
+        await db.close()
         await bot.session.close()
 
 if __name__ == '__main__':
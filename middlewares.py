@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Dispatcher middleware'lari (aiogram 3.8)
+Yangilanishlar routerga yetib bormasdan oldin ishlaydigan tekshiruvlar
+"""
+
+import math
+import time
+import asyncio
+import logging
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from aiogram import BaseMiddleware
+from aiogram.types import Message, TelegramObject, Update
+
+from config import ADMIN_ID, Errors, Messages, Settings
+from outbound import outbound, PRIORITY_NOTIFY
+from rate_limit import RateLimiter, LIMIT_DAILY, LIMIT_RATE
+from utils import is_admin
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatLane:
+    """Bitta chat yangilanishlari navbati"""
+    __slots__ = ("lock", "waiting")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        # Shu chatning middleware ichidagi (kutayotgan va ishlanayotgan) yangilanishlari
+        self.waiting = 0
+
+
+class ChatSerialMiddleware(BaseMiddleware):
+    """Turli chatlar yangilanishlarini parallel, bitta chatnikini ketma-ket ishlash
+
+    ``dp.update.outer_middleware`` sifatida birinchi bo'lib ulanadi.
+    Polling va webhook har bir yangilanishni alohida vazifada kelish
+    tartibida boshlaydi; vazifa shu yergacha to'xtamasdan yetib keladi va
+    chatning ``asyncio.Lock`` navbatiga (FIFO) turadi, shuning uchun bitta
+    foydalanuvchi xabarlari kelgan tartibda saqlanadi. Bir vaqtda
+    ishlanadigan yangilanishlar soni ``concurrency`` bilan chegaralangan:
+    sekin chat faqat o'z navbatini ushlab turadi.
+    """
+
+    def __init__(self, concurrency: int = Settings.UPDATE_CONCURRENCY):
+        """``concurrency`` - bir vaqtda ishlanadigan yangilanishlar soni"""
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # Hozir umumiy o'rinni ushlab turgan vazifalar
+        self._holders: Set[asyncio.Task] = set()
+        self._lanes: Dict[int, _ChatLane] = {}
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.processed = 0
+        # So'nggi yangilanishlarning navbatda kutish vaqtlari (soniya)
+        self._waits: "deque[float]" = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        chat_id = chat.id if chat is not None else user.id if user is not None else None
+        if chat_id is None:
+            await self._acquire()
+            try:
+                return await handler(event, data)
+            finally:
+                self._release()
+
+        arrived = time.monotonic()
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _ChatLane()
+        lane.waiting += 1
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        started = False
+        try:
+            async with lane.lock:
+                await self._acquire()
+                wait = time.monotonic() - arrived
+                self._waits.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+                self.queued -= 1
+                started = True
+                try:
+                    return await handler(event, data)
+                finally:
+                    self._release()
+                    self.processed += 1
+        finally:
+            if not started:
+                self.queued -= 1
+            lane.waiting -= 1
+            if not lane.waiting:
+                del self._lanes[chat_id]
+
+    @asynccontextmanager
+    async def paused(self):
+        """Uzoq kutish paytida umumiy o'rinni bo'shatish (chat navbati ushlab turiladi)
+
+        Masalan, spam himoya oralig'ini kutayotgan xabar boshqa chatlarning
+        o'rnini band qilmasligi uchun.
+        """
+        self._release()
+        try:
+            yield
+        finally:
+            await self._acquire()
+
+    async def _acquire(self):
+        """Umumiy o'rinni olish va uni joriy vazifa nomiga yozish"""
+        await self._semaphore.acquire()
+        self._holders.add(asyncio.current_task())
+        self.active += 1
+
+    def _release(self):
+        """Joriy vazifa o'rinni ushlab turgan bo'lsagina bo'shatish
+
+        ``paused`` dan keyin qayta olish kutilayotganda vazifa bekor qilinsa
+        o'rin olinmagan bo'ladi va ``__call__`` uni ikkinchi marta qaytarmaydi.
+        """
+        task = asyncio.current_task()
+        if task in self._holders:
+            self._holders.discard(task)
+            self._semaphore.release()
+            self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Navbat chuqurligi va chat navbatida kutish vaqtlari (ms)"""
+        waits = sorted(self._waits)
+        return {
+            "queued": self.queued,
+            "active": self.active,
+            "chats": len(self._lanes),
+            "max_queued": self.max_queued,
+            "processed": self.processed,
+            "wait_avg_ms": sum(waits) / len(waits) * 1000 if waits else 0.0,
+            "wait_p99_ms": waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000 if waits else 0.0,
+            "wait_max_ms": self._max_wait * 1000,
+        }
+
+
+class BlockedUserMiddleware(BaseMiddleware):
+    """Bloklangan foydalanuvchilar yangilanishlarini routingdan oldin tashlash
+
+    ``dp.update.outer_middleware`` sifatida ulanadi: foydalanuvchi aiogram'ning
+    ``UserContextMiddleware``'i qo'ygan ``event_from_user`` dan olinadi va
+    bazaning xotiradagi bloklanganlar to'plamida tekshiriladi. Shuning uchun
+    spam oqimi filtrlarga ham, baza yuklanishiga ham yetib bormaydi.
+    """
+
+    def __init__(self, db):
+        """Bloklanganlar ro'yxatini ``db.is_user_blocked`` orqali tekshiradi"""
+        self.db = db
+        self.dropped = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None and not is_admin(user.id) and await self.db.is_user_blocked(user.id):
+            # Har bir tashlangan yangilanishni INFO da yozish oqim paytida qimmat
+            self.dropped += 1
+            logger.debug(f"🚫 Bloklangan foydalanuvchi yangilanishi tashlandi: {user.id}")
+            return None
+        return await handler(event, data)
+
+
+class RateLimitMiddleware(BaseMiddleware):
+    """Foydalanuvchi xabarlarini ``RateLimiter`` chegaralari bo'yicha o'tkazish
+
+    ``dp.message.outer_middleware`` sifatida ulanadi, shuning uchun chegaradan
+    oshgan xabarlar filtrlar va ``add_user_message`` ga yetib bormaydi.
+    Oraliq bo'yicha kechiktirilgan xabar handlerga kutishdan keyin beriladi
+    (polling yangilanishlarni alohida vazifalarda ishlaydi). Rad etish haqida
+    foydalanuvchiga har bir sabab uchun bir marta chiquvchi navbat orqali
+    javob yoziladi.
+    """
+
+    def __init__(self, limiter: RateLimiter = None):
+        """Chegaralar berilmasa Settings/Security qiymatlari olinadi"""
+        self.limiter = limiter if limiter is not None else RateLimiter()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Message,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = event.from_user
+        if user is None or is_admin(user.id):
+            return await handler(event, data)
+
+        reason, wait = self.limiter.check(user.id, event.text or event.caption)
+        if reason is None:
+            if wait:
+                chat_serial = data.get("chat_serial")
+                if chat_serial is not None:
+                    async with chat_serial.paused():
+                        await asyncio.sleep(wait)
+                else:
+                    await asyncio.sleep(wait)
+            return await handler(event, data)
+
+        logger.debug(f"⏳ Chegaradan oshgan xabar ({reason}): {user.id}")
+        if self.limiter.should_notify(user.id, reason):
+            if reason == LIMIT_RATE:
+                text = Errors.RATE_LIMITED.format(seconds=math.ceil(wait))
+            elif reason == LIMIT_DAILY:
+                text = Errors.DAILY_LIMIT_REACHED.format(limit=self.limiter.daily_limit)
+            else:
+                text = Errors.IDENTICAL_MESSAGES
+            outbound.submit("send_message", event.chat.id, PRIORITY_NOTIFY, text=text)
+        return None
+
+
+class AdmissionMiddleware(BaseMiddleware):
+    """Yangilanishlar oqimida yuklamani boshqarish (admin yangilanishlari tegilmaydi)
+
+    Yuklama ``ChatSerialMiddleware`` navbatidagi yangilanishlar soni bilan
+    o'lchanadi; darajalar (``Settings``):
+
+    - ``DEFER_NOTIFICATIONS_AT`` (yoki chiquvchi navbatda ``OUTBOUND_BACKLOG_LIMIT``):
+      xabarlar saqlanadi, lekin har biri uchun adminga bildirishnoma
+      yuborilmaydi - yuklama tushgach bitta umumiy xabar yuboriladi;
+      foydalanuvchi tasdiq o'rniga bir marta "band" javobini oladi
+    - ``SHED_LOW_PRIORITY_AT``: foydalanuvchi komandalari (/start, /help) va
+      callback'lar jimgina tashlanadi
+    - ``INBOUND_QUEUE_LIMIT``: foydalanuvchi yangilanishlari navbatga
+      olinmaydi, foydalanuvchi bir marta qayta yozishni so'raydi
+
+    ``dp.update.outer_middleware`` sifatida ``BlockedUserMiddleware`` dan
+    keyin va ``ChatSerialMiddleware`` dan oldin ulanadi, handlerlarga
+    ``admission`` nomi bilan beriladi. Bloklanganlar yangilanishlari bu yerda
+    ham o'tkazilmaydi: ular yuklamani oshirib boshqalarni tashlatmasligi kerak.
+    Tashlangan callback'larga javob beriladi, aks holda tugma kutib qoladi.
+    """
+
+    def __init__(self, chat_serial: ChatSerialMiddleware, blocklist=(),
+                 queue_limit: int = Settings.INBOUND_QUEUE_LIMIT,
+                 shed_at: int = Settings.SHED_LOW_PRIORITY_AT,
+                 defer_at: int = Settings.DEFER_NOTIFICATIONS_AT,
+                 outbound_limit: int = Settings.OUTBOUND_BACKLOG_LIMIT):
+        """Chegaralar (0 - shu daraja o'chirilgan); bloklanganlar yangilanishlari tashlanadi"""
+        self.chat_serial = chat_serial
+        self.blocklist = blocklist
+        self.queue_limit = queue_limit
+        self.shed_at = shed_at
+        self.defer_at = defer_at
+        self.outbound_limit = outbound_limit
+        # Yuklama davrida "band" javobini olgan foydalanuvchilar
+        self._notified: Set[int] = set()
+        # Yuklama davrida bildirishnomasi qoldirilgan foydalanuvchilar: xabarlar soni
+        self._deferred: Counter = Counter()
+        self._watcher: Optional[asyncio.Task] = None
+        self.stats = {"rejected": 0, "shed": 0, "deferred": 0, "busy_replies": 0, "overloads": 0}
+
+    def _reached(self, threshold: int, value: int) -> bool:
+        return bool(threshold) and value >= threshold
+
+    @property
+    def overloaded(self) -> bool:
+        """Adminga bildirishnomalar qoldiriladigan darajadami"""
+        return (self._reached(self.defer_at, self.chat_serial.queued)
+                or self._reached(self.outbound_limit, outbound.pending))
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or is_admin(user.id):
+            return await handler(event, data)
+        if user.id in self.blocklist:
+            return None
+
+        depth = self.chat_serial.queued
+        if self._reached(self.queue_limit, depth):
+            self.stats["rejected"] += 1
+            self._start_watcher()
+            self.notify_busy(user.id, Errors.OVERLOADED)
+            await self._answer_dropped(event)
+            return None
+
+        if self._reached(self.shed_at, depth) and self._low_priority(event):
+            self.stats["shed"] += 1
+            self._start_watcher()
+            await self._answer_dropped(event)
+            return None
+
+        return await handler(event, data)
+
+    @staticmethod
+    async def _answer_dropped(event: Update):
+        """Tashlangan callback'ga javob: foydalanuvchi tugmasi aylanib qolmasin"""
+        if event.callback_query is None:
+            return
+        try:
+            await event.callback_query.answer(Errors.OVERLOADED)
+        except Exception as e:
+            # So'rov eskirgan bo'lishi mumkin: javob berilmasa ham zarari yo'q
+            logger.debug(f"Tashlangan callback'ga javob berilmadi: {e}")
+
+    @staticmethod
+    def _low_priority(event: Update) -> bool:
+        """Yuklamada birinchi tashlanadigan yangilanishlar: komandalar va callback'lar"""
+        if event.callback_query is not None:
+            return True
+        message = event.message
+        return message is not None and bool(message.text) and message.text.startswith("/")
+
+    def notify_busy(self, user_id: int, text: str):
+        """Yuklama davrida foydalanuvchiga bir marta javob berish"""
+        if user_id in self._notified:
+            return
+        self._notified.add(user_id)
+        self.stats["busy_replies"] += 1
+        outbound.submit("send_message", user_id, PRIORITY_NOTIFY, text=text)
+
+    def defer_notification(self, user_id: int):
+        """Adminga bildirishnoma o'rniga yuklama tugagach umumiy xabar"""
+        self._deferred[user_id] += 1
+        self.stats["deferred"] += 1
+        self._start_watcher()
+
+    def _start_watcher(self):
+        if self._watcher is None:
+            self.stats["overloads"] += 1
+            logger.warning(f"🚦 Yuklama: navbatda {self.chat_serial.queued} ta yangilanish, "
+                           f"chiquvchi {outbound.pending} ta")
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        """Yuklama tushishini kutib, qoldirilgan bildirishnomalarni yuborish"""
+        try:
+            while (self.overloaded or self._reached(self.shed_at, self.chat_serial.queued)
+                   or self._reached(self.queue_limit, self.chat_serial.queued)):
+                await asyncio.sleep(1)
+            self._flush_deferred()
+        finally:
+            self._watcher = None
+
+    def _flush_deferred(self):
+        self._notified.clear()
+        if not self._deferred:
+            logger.info("✅ Yuklama tugadi")
+            return
+        users, messages = len(self._deferred), sum(self._deferred.values())
+        self._deferred.clear()
+        logger.info(f"✅ Yuklama tugadi: {users} foydalanuvchidan {messages} ta xabar")
+        outbound.submit("send_message", ADMIN_ID, PRIORITY_NOTIFY,
+                        text=Messages.DEFERRED_NOTIFICATIONS.format(users=users, messages=messages))
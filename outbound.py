@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chiquvchi xabarlar navbati (aiogram 3.8)
+Telegram'ga barcha yuborishlar umumiy va chat bo'yicha chegaralar bilan,
+yetkazilmaganlari diskdagi jurnalda saqlanadi
+"""
+
+import os
+import json
+import time
+import uuid
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from pydantic import BaseModel
+
+from config import OUTBOX_FILE, Settings
+
+logger = logging.getLogger(__name__)
+
+# Ustuvorliklar: kichik son oldin yuboriladi
+PRIORITY_REPLY = 0  # admin javoblari foydalanuvchilarga
+PRIORITY_NOTIFY = 1  # adminga bildirishnomalar va forwardlar
+
+# Tarmoq/server xatolarida qayta urinishlar orasidagi boshlang'ich kutish (soniya)
+RETRY_BACKOFF = 1.0
+
+
+class _Job:
+    """Bitta Bot API chaqiruvi: ``bot.<method>(chat_id=..., **kwargs)``"""
+    __slots__ = ("priority", "seq", "chat_id", "method", "kwargs", "future", "attempts",
+                 "key", "created", "durable")
+
+    def __init__(self, priority: int, seq: int, chat_id: int, method: str,
+                 kwargs: Dict[str, Any], future: asyncio.Future, key: Optional[str] = None,
+                 created: int = 0, durable: bool = False):
+        self.priority = priority
+        self.seq = seq
+        self.chat_id = chat_id
+        self.method = method
+        self.kwargs = kwargs
+        self.future = future
+        self.attempts = 0
+        # Idempotentlik kaliti: bir xil kalitli chaqiruv ikkinchi marta yuborilmaydi
+        self.key = key
+        self.created = created
+        # Chaqiruv jurnalga yozilgan
+        self.durable = durable
+
+    def to_record(self) -> Dict[str, Any]:
+        """Jurnal yozuvi"""
+        return {"op": "send", "key": self.key, "method": self.method, "chat_id": self.chat_id,
+                "priority": self.priority, "kwargs": self.kwargs, "created": self.created}
+
+
+class _Chat:
+    """Bitta chat navbati: yuborishlar shu chat ichida ketma-ket"""
+    __slots__ = ("jobs", "ready_at", "busy", "queued")
+
+    def __init__(self):
+        self.jobs: "deque[_Job]" = deque()
+        # Chatga keyingi yuborish mumkin bo'lgan vaqt (loop.time())
+        self.ready_at = 0.0
+        self.busy = False
+        # Chat tayyorlar uyumida turibdi
+        self.queued = False
+
+
+def _consume_exception(future: asyncio.Future):
+    """Natijasi kutilmagan vazifa xatosi haqida asyncio ogohlantirmasligi uchun"""
+    if not future.cancelled():
+        future.exception()
+
+
+def _dump_line(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+class OutboxJournal:
+    """Navbat jurnali: har bir qatorda bitta JSON yozuv
+
+    - ``{"op": "send", "key", "method", "chat_id", "priority", "kwargs", "created"}``
+    - ``{"op": "done" | "failed", "key"}`` - chaqiruv yakunlandi
+
+    Bir vaqtda kelgan yozuvlar bitta yozish va fsync bilan qo'shiladi.
+    Yakunlangan yozuvlar jurnal siqilganda olib tashlanadi, faqat oxirgi
+    kalitlari takrorlanishni tekshirish uchun qoladi.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Fayldagi yozuvlar soni (siqish uchun)
+        self.records = 0
+        self._lines: List[str] = []
+        self._flush: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def load(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Yakunlanmagan ``send`` yozuvlari va yakunlangan kalitlar (eskisidan boshlab)
+
+        Yozish paytida uzilgan oxirgi qator kesib tashlanadi (aks holda keyingi
+        yozuv unga qo'shilib qolardi); o'rtadagi buzilgan qator - xatolik.
+        """
+        pending: Dict[str, Dict[str, Any]] = {}
+        finished: "OrderedDict[str, None]" = OrderedDict()
+        if not self.path.exists():
+            return [], []
+        torn = None
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line_no, line in enumerate(f, 1):
+                line_offset, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                if torn is not None:
+                    raise ValueError(f"{self.path.name} {torn[0]}-qatori buzilgan")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    torn = (line_no, line_offset)
+                    continue
+                self.records += 1
+                key = record["key"]
+                if record["op"] == "send":
+                    # Siqishdan keyin qayta qo'shilgan yakunlangan yozuvlar e'tiborsiz
+                    if key not in finished:
+                        pending[key] = record
+                else:
+                    pending.pop(key, None)
+                    finished.pop(key, None)
+                    finished[key] = None
+        if torn is not None:
+            logger.warning(f"⚠️ {self.path.name} oxirgi ({torn[0]}-) qatori uzilgan, kesib tashlandi")
+            with open(self.path, 'r+b') as f:
+                f.truncate(torn[1])
+                os.fsync(f.fileno())
+        return list(pending.values()), list(finished)
+
+    def append(self, record: Dict[str, Any]) -> asyncio.Task:
+        """Yozuvni navbatdagi yozishga qo'shish; vazifa yozuv diskka tushganda tugaydi"""
+        self._lines.append(_dump_line(record))
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._write_lines())
+            self._flush.add_done_callback(self._log_error)
+        return self._flush
+
+    async def _write_lines(self):
+        async with self._lock:
+            # Lock kutilayotganda kelgan yozuvlar ham shu yozishga tushadi
+            lines, self._lines = self._lines, []
+            self._flush = None
+            await asyncio.to_thread(self._append_file, "\n".join(lines) + "\n")
+            self.records += len(lines)
+
+    def _append_file(self, payload: str):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _log_error(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Navbat jurnaliga yozishda xatolik: {task.exception()}")
+
+    async def compact(self, snapshot: Callable[[], List[Dict[str, Any]]]):
+        """Jurnalni ``snapshot()`` yozuvlari bilan atomar qayta yozish
+
+        Holat lock olingandan keyin olinadi: undan oldin yozilgan qatorlar
+        unda aks etgan, keyingilari esa yangi fayl oxiriga qo'shiladi.
+        """
+        async with self._lock:
+            lines = [_dump_line(record) for record in snapshot()]
+            await asyncio.to_thread(self._rewrite_file, lines)
+            self.records = len(lines)
+
+    def _rewrite_file(self, lines: List[str]):
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            if lines:
+                f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class OutboundScheduler:
+    """Telegram'ga chiquvchi chaqiruvlar rejalashtiruvchisi
+
+    - umumiy chegara: soniyasiga ``rate`` ta chaqiruv, portlashsiz (chelak
+      hajmi 1), ya'ni chaqiruvlar orasida kamida ``1 / rate`` soniya
+    - chat chegarasi: bitta chatga chaqiruvlar ketma-ket va kamida
+      ``chat_interval`` oraliq bilan; band chat boshqa chatlarni to'smaydi
+    - ustuvorlik: tayyor chatlar orasidan navbat boshidagi chaqiruvi eng
+      ustuvor (keyin eng eski) bo'lgani tanlanadi
+    - ``TelegramRetryAfter``: chaqiruv chat navbati boshiga qaytadi va chat
+      ``retry_after`` soniya to'xtatiladi; tarmoq xatolarida kutish ikki
+      barobardan ``max_backoff`` gacha oshib boradi
+
+    ``submit`` darhol Future qaytaradi, shuning uchun handler yetkazishni
+    kutmasdan tugashi mumkin. ``enqueue`` chaqiruvni avval jurnalga yozadi:
+    jarayon to'xtab qolsa yetkazilmaganlari ``start`` da qayta navbatga
+    qo'yiladi. Idempotentlik kaliti (masalan, yangilanishdan olingan) bir xil
+    chaqiruv ikki marta navbatga tushishi va yuborilishining oldini oladi;
+    jurnal yozilgandan keyin, lekin ``done`` belgisidan oldin uzilgan chaqiruv
+    esa qayta yuboriladi (kamida bir marta yetkazish).
+    """
+
+    def __init__(self, rate: float = Settings.OUTBOUND_GLOBAL_RATE,
+                 chat_interval: float = Settings.OUTBOUND_CHAT_INTERVAL,
+                 max_retries: int = Settings.OUTBOUND_MAX_RETRIES,
+                 max_backoff: float = Settings.OUTBOUND_MAX_BACKOFF,
+                 journal_path: Optional[Path] = None):
+        """Chegaralar (Settings qiymatlari); ``journal_path`` berilmasa navbat faqat xotirada"""
+        self.rate = rate
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.journal = OutboxJournal(journal_path) if journal_path else None
+        # Kalitli yakunlanmagan chaqiruvlar va oxirgi yakunlangan kalitlar
+        self._jobs: Dict[str, _Job] = {}
+        self._finished_keys: "OrderedDict[str, None]" = OrderedDict()
+        self._compact_task: Optional[asyncio.Task] = None
+        self.bot = None
+        self._chats: Dict[int, _Chat] = {}
+        # Yuborishga tayyor chatlar: (ustuvorlik, tartib raqami, chat_id)
+        self._ready: List[Tuple[int, int, int]] = []
+        # Kutayotgan chatlar: (tayyor bo'lish vaqti, chat_id)
+        self._timers: List[Tuple[float, int]] = []
+        self._seq = itertools.count()
+        self._tokens = 1.0
+        self._updated = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self.stats = {"sent": 0, "failed": 0, "retry_after": 0, "retries": 0,
+                      "duplicates": 0, "recovered": 0}
+
+    def start(self, bot):
+        """Yuborish siklini ishga tushirish (jurnaldagi yetkazilmaganlar tiklanadi)"""
+        self.bot = bot
+        if self._task is None:
+            self._updated = asyncio.get_running_loop().time()
+            if self.journal is not None:
+                self._recover()
+            self._task = asyncio.create_task(self._run())
+
+    def _recover(self):
+        """Jurnaldan yetkazilmagan chaqiruvlarni navbatga qaytarish"""
+        records, finished = self.journal.load()
+        for key in finished[-Settings.OUTBOX_KEEP_DONE:]:
+            self._finished_keys[key] = None
+        for record in records:
+            job = self._new_job(record["method"], record["chat_id"], record["priority"],
+                                record["kwargs"], record["key"], record["created"], durable=True)
+            self._push(job)
+        self.stats["recovered"] = len(records)
+        if records:
+            logger.info(f"♻️ Navbat jurnalidan {len(records)} ta yetkazilmagan xabar tiklandi")
+        # Yakunlangan yozuvlar bo'lsa jurnal darhol qisqartiriladi
+        self._maybe_compact(force=self.journal.records > len(records))
+
+    @property
+    def pending(self) -> int:
+        """Hali yetkazilmagan chaqiruvlar soni"""
+        return self._pending
+
+    def _existing(self, key: Optional[str]) -> Optional[asyncio.Future]:
+        """Shu kalitli chaqiruv allaqachon navbatda yoki yakunlangan bo'lsa uning natijasi"""
+        if key is None:
+            return None
+        job = self._jobs.get(key)
+        if job is not None:
+            self.stats["duplicates"] += 1
+            return job.future
+        if key in self._finished_keys:
+            self.stats["duplicates"] += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+        return None
+
+    def _new_job(self, method: str, chat_id: int, priority: int, kwargs: Dict[str, Any],
+                 key: Optional[str], created: int, durable: bool = False) -> _Job:
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        job = _Job(priority, next(self._seq), chat_id, method, kwargs, future, key, created, durable)
+        if key is not None:
+            self._jobs[key] = job
+        return job
+
+    def submit(self, method: str, chat_id: int, priority: int = PRIORITY_NOTIFY,
+               key: Optional[str] = None, **kwargs) -> asyncio.Future:
+        """Chaqiruvni faqat xotiradagi navbatga qo'yish; Future natija (yoki xato) bilan tugaydi"""
+        existing = self._existing(key)
+        if existing is not None:
+            return existing
+        job = self._new_job(method, chat_id, priority, kwargs, key, int(time.time()))
+        self._push(job)
+        return job.future
+
+    async def enqueue(self, method: str, chat_id: int, priority: int = PRIORITY_NOTIFY,
+                      key: Optional[str] = None, **kwargs) -> asyncio.Future:
+        """Chaqiruvni jurnalga yozib navbatga qo'yish
+
+        Qaytgan paytda chaqiruv diskda saqlangan; Future yetkazish natijasi.
+        Jurnal ishlatilmasa ``submit`` bilan bir xil.
+        """
+        existing = self._existing(key)
+        if existing is not None:
+            return existing
+        if self.journal is None:
+            return self.submit(method, chat_id, priority, key, **kwargs)
+
+        # Klaviaturalar kabi obyektlar jurnal va qayta yuborish uchun lug'atga aylantiriladi
+        kwargs = {name: value.model_dump(exclude_none=True) if isinstance(value, BaseModel) else value
+                  for name, value in kwargs.items()}
+        job = self._new_job(method, chat_id, priority, kwargs, key or uuid.uuid4().hex,
+                            int(time.time()), durable=True)
+        try:
+            await asyncio.shield(self.journal.append(job.to_record()))
+        except Exception as e:
+            self._jobs.pop(job.key, None)
+            job.future.set_exception(e)
+            raise
+        self._push(job)
+        return job.future
+
+    def _push(self, job: _Job):
+        """Chaqiruvni chat navbatining oxiriga qo'shish"""
+        chat_id = job.chat_id
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = _Chat()
+        chat.jobs.append(job)
+        self._pending += 1
+        self._idle.clear()
+        if not chat.busy and not chat.queued:
+            self._schedule(chat_id, chat)
+
+    def _schedule(self, chat_id: int, chat: _Chat):
+        """Chatni tayyorlar yoki kutayotganlar uyumiga qo'yish"""
+        if chat.ready_at <= asyncio.get_running_loop().time():
+            self._push_ready(chat_id, chat)
+        else:
+            heapq.heappush(self._timers, (chat.ready_at, chat_id))
+        self._wakeup.set()
+
+    def _push_ready(self, chat_id: int, chat: _Chat):
+        """Chatni navbat boshidagi chaqiruv ustuvorligi bilan tayyorlar uyumiga qo'yish"""
+        head = chat.jobs[0]
+        chat.queued = True
+        heapq.heappush(self._ready, (head.priority, head.seq, chat_id))
+
+    def _take_token(self, now: float) -> float:
+        """Umumiy chelakdan token olish; yetmasa kutish soniyalari"""
+        self._tokens = min(1.0, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        return 0.0
+
+    async def _run(self):
+        """Tayyor chatlardan eng ustuvor chaqiruvni olib yuborish sikli"""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            while self._timers and self._timers[0][0] <= now:
+                _, chat_id = heapq.heappop(self._timers)
+                chat = self._chats.get(chat_id)
+                # Eskirgan taymerlar (chat band, allaqachon tayyor yoki to'xtatilgan) o'tkaziladi
+                if chat is None or chat.busy or chat.queued or chat.ready_at > now:
+                    continue
+                if chat.jobs:
+                    self._push_ready(chat_id, chat)
+                else:
+                    # Bo'sh chat oralig'i tugadi: xotiradan o'chiriladi
+                    del self._chats[chat_id]
+
+            if not self._ready:
+                timeout = self._timers[0][0] - now if self._timers else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            wait = self._take_token(now)
+            if wait:
+                # Kutish paytida ustuvorroq chaqiruv kelishi mumkin: keyin qayta tanlanadi
+                await asyncio.sleep(wait)
+                continue
+
+            _, _, chat_id = heapq.heappop(self._ready)
+            chat = self._chats[chat_id]
+            chat.queued = False
+            chat.busy = True
+            task = asyncio.create_task(self._deliver(chat_id, chat, chat.jobs.popleft()))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, chat_id: int, chat: _Chat, job: _Job):
+        """Bitta chaqiruvni bajarish va chatni keyingi yuborishga tayyorlash"""
+        delay = self.chat_interval
+        try:
+            result = await getattr(self.bot, job.method)(chat_id=chat_id, **job.kwargs)
+            self.stats["sent"] += 1
+            self._finish(job, result=result)
+        except TelegramRetryAfter as e:
+            self.stats["retry_after"] += 1
+            delay = max(delay, e.retry_after)
+            self._retry(chat, job, e, f"⏳ Telegram {e.retry_after} s kutishni so'radi (chat {chat_id})")
+        except (TelegramNetworkError, TelegramServerError) as e:
+            delay = max(delay, min(RETRY_BACKOFF * 2 ** job.attempts, self.max_backoff))
+            self._retry(chat, job, e, f"🔁 {job.method} qayta yuboriladi (chat {chat_id}): {e}")
+        except Exception as e:
+            self._finish(job, error=e)
+        finally:
+            chat.busy = False
+            chat.ready_at = asyncio.get_running_loop().time() + delay
+            if chat.jobs:
+                self._schedule(chat_id, chat)
+            else:
+                # Oraliq tugagach bo'sh chat o'chiriladi
+                heapq.heappush(self._timers, (chat.ready_at, chat_id))
+                self._wakeup.set()
+
+    def _retry(self, chat: _Chat, job: _Job, error: Exception, message: str):
+        """Chaqiruvni chat navbati boshiga qaytarish (urinishlar tugasa xato)"""
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            self._finish(job, error=error)
+            return
+        self.stats["retries"] += 1
+        logger.warning(message)
+        chat.jobs.appendleft(job)
+
+    def _finish(self, job: _Job, result: Any = None, error: Optional[Exception] = None):
+        """Chaqiruv natijasini Future'ga yozish va jurnalda yakunlangan deb belgilash"""
+        self._pending -= 1
+        if not self._pending:
+            self._idle.set()
+        if job.key is not None:
+            self._jobs.pop(job.key, None)
+            self._finished_keys[job.key] = None
+            if len(self._finished_keys) > Settings.OUTBOX_KEEP_DONE:
+                self._finished_keys.popitem(last=False)
+            if job.durable:
+                # Kutilmaydi: belgi yo'qolsa chaqiruv qayta ishga tushishda yana yuboriladi
+                self.journal.append({"op": "done" if error is None else "failed", "key": job.key})
+                self._maybe_compact()
+        if job.future.done():
+            return
+        if error is None:
+            job.future.set_result(result)
+        else:
+            self.stats["failed"] += 1
+            logger.error(f"❌ {job.method} yuborilmadi (chat {job.chat_id}): {error}")
+            job.future.set_exception(error)
+
+    def _maybe_compact(self, force: bool = False):
+        """Jurnal yozuvlari ko'payganda uni faqat kerakli yozuvlar bilan qayta yozish"""
+        if self._compact_task is not None or not (force or self.journal.records >= Settings.OUTBOX_COMPACT_EVERY):
+            return
+        self._compact_task = asyncio.create_task(self._compact())
+
+    def _journal_snapshot(self) -> List[Dict[str, Any]]:
+        """Siqilgan jurnal: yakunlangan kalitlar va yakunlanmagan chaqiruvlar"""
+        records = [{"op": "done", "key": key} for key in self._finished_keys]
+        records += [job.to_record() for job in self._jobs.values() if job.durable]
+        return records
+
+    async def _compact(self):
+        try:
+            await self.journal.compact(self._journal_snapshot)
+            logger.debug(f"💾 Navbat jurnali siqildi: {self.journal.records} ta yozuv")
+        except Exception as e:
+            logger.error(f"Navbat jurnalini siqishda xatolik: {e}")
+        finally:
+            self._compact_task = None
+
+    async def close(self, timeout: float = Settings.OUTBOUND_DRAIN_SECONDS):
+        """Navbatdagi chaqiruvlarni ``timeout`` soniya ichida yetkazib, siklni to'xtatish"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ {self._pending} ta chiquvchi xabar yuborilmay qoldi")
+        self._task.cancel()
+        for task in list(self._inflight):
+            task.cancel()
+        await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+        self._task = None
+        # Yakunlanganlar belgilari va siqish diskka tushishini kutish
+        if self.journal is not None:
+            pending_writes = [task for task in (self.journal._flush, self._compact_task) if task is not None]
+            await asyncio.gather(*pending_writes, return_exceptions=True)
+
+
+# Global navbat (main.py da ``outbound.start(bot)`` bilan ishga tushadi)
+outbound = OutboundScheduler(journal_path=OUTBOX_FILE)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spam himoya (aiogram 3.8)
+Foydalanuvchi bo'yicha token chelaklari: daqiqalik, kunlik va bir xil xabarlar chegarasi
+"""
+
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from config import Settings, Security
+
+# Rad etish sabablari
+LIMIT_DAILY = "daily"
+LIMIT_RATE = "rate"
+LIMIT_IDENTICAL = "identical"
+
+
+class _Bucket:
+    """Bitta foydalanuvchining chelak holati"""
+    __slots__ = ("tokens", "updated", "next_slot", "day", "day_count", "text_hash", "repeats", "notified")
+
+    def __init__(self, tokens: float, now: float, day: int):
+        self.tokens = tokens
+        self.updated = now
+        # Navbatdagi xabar saqlanishi mumkin bo'lgan eng erta vaqt
+        self.next_slot = 0.0
+        self.day = day
+        self.day_count = 0
+        self.text_hash: Optional[int] = None
+        self.repeats = 0
+        # Shu sabab bilan foydalanuvchiga allaqachon xabar berilgan
+        self.notified: Optional[str] = None
+
+
+class RateLimiter:
+    """Foydalanuvchi bo'yicha xabarlar chegarasi
+
+    - daqiqalik chegara: hajmi ``capacity`` bo'lgan token chelagi, daqiqasiga
+      ``capacity`` ta token bilan to'ladi; bo'sh chelakda xabar rad etiladi
+    - ``interval``: chelak ruxsat bergan, lekin oldingisidan tezroq kelgan
+      xabarlar rad etilmaydi, balki shu oraliq bilan navbatga qo'yiladi
+    - kunlik chegara va ketma-ket bir xil matnlar chegarasi
+
+    Holatlar so'nggi murojaat tartibidagi ``OrderedDict`` da saqlanadi:
+    har bir tekshiruv O(1), ``idle_seconds`` dan beri yozmaganlar boshidan
+    o'chiriladi, ``max_users`` dan oshganda esa eng eskisi chiqariladi.
+    """
+
+    def __init__(self, capacity: int = Security.MAX_MESSAGES_PER_MINUTE,
+                 interval: float = Settings.MIN_MESSAGE_INTERVAL,
+                 daily_limit: int = Settings.DAILY_MESSAGE_LIMIT,
+                 max_identical: int = Security.MAX_IDENTICAL_MESSAGES,
+                 max_users: int = Settings.RATE_LIMIT_MAX_USERS,
+                 idle_seconds: float = Settings.RATE_LIMIT_IDLE_SECONDS):
+        """Chegaralar (0 - shu chegara o'chirilgan)"""
+        self.capacity = capacity
+        self.rate = capacity / 60
+        self.interval = interval
+        self.daily_limit = daily_limit
+        self.max_identical = max_identical
+        self.max_users = max_users
+        self.idle_seconds = idle_seconds
+        self._buckets: "OrderedDict[int, _Bucket]" = OrderedDict()
+        # Joriy mahalliy kun va uning tugash vaqti (har bir tekshiruvda sana hisoblanmaydi)
+        self._day = 0
+        self._day_end = 0.0
+        self.stats = {"allowed": 0, "delayed": 0, LIMIT_RATE: 0, LIMIT_DAILY: 0, LIMIT_IDENTICAL: 0}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _today(self, now: float) -> int:
+        """Mahalliy kun raqami"""
+        if not self._day_end - 86400 <= now < self._day_end:
+            today = date.fromtimestamp(now)
+            self._day = today.toordinal()
+            self._day_end = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        return self._day
+
+    def _expire(self, now: float):
+        """Uzoq vaqt yozmagan foydalanuvchilarni ro'yxat boshidan o'chirish"""
+        buckets = self._buckets
+        cutoff = now - self.idle_seconds
+        while buckets:
+            user_id, bucket = next(iter(buckets.items()))
+            if bucket.updated > cutoff and len(buckets) <= self.max_users:
+                break
+            del buckets[user_id]
+
+    def check(self, user_id: int, text: Optional[str] = None,
+              now: Optional[float] = None) -> Tuple[Optional[str], float]:
+        """Xabarni tekshirish: (rad etish sababi yoki None, kutish soniyalari)
+
+        Ruxsat berilganda ikkinchi qiymat xabarni saqlashdan oldin kutish
+        vaqti, ``LIMIT_RATE`` da esa yangi token paydo bo'lishigacha vaqt.
+        """
+        now = time.time() if now is None else now
+        day = self._today(now)
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = _Bucket(self.capacity, now, day)
+            self._expire(now)
+        else:
+            self._buckets.move_to_end(user_id)
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            if bucket.day != day:
+                bucket.day, bucket.day_count = day, 0
+
+        if self.daily_limit and bucket.day_count >= self.daily_limit:
+            return self._reject(LIMIT_DAILY, 0.0)
+
+        text_hash = hash(text) if self.max_identical and text else None
+        if (text_hash is not None and text_hash == bucket.text_hash
+                and bucket.repeats >= self.max_identical):
+            return self._reject(LIMIT_IDENTICAL, 0.0)
+
+        if self.capacity:
+            if bucket.tokens < 1:
+                return self._reject(LIMIT_RATE, (1 - bucket.tokens) / self.rate)
+            bucket.tokens -= 1
+
+        # Takrorlar faqat o'tkazilgan xabarlar bo'yicha sanaladi
+        if text_hash is not None:
+            if text_hash == bucket.text_hash:
+                bucket.repeats += 1
+            else:
+                bucket.text_hash, bucket.repeats = text_hash, 1
+        bucket.day_count += 1
+        bucket.notified = None
+        delay = 0.0
+        if self.interval:
+            slot = max(now, bucket.next_slot)
+            bucket.next_slot = slot + self.interval
+            delay = slot - now
+            if delay:
+                self.stats["delayed"] += 1
+        self.stats["allowed"] += 1
+        return None, delay
+
+    def _reject(self, reason: str, retry_after: float) -> Tuple[str, float]:
+        """Rad etishni hisobga olish"""
+        self.stats[reason] += 1
+        return reason, retry_after
+
+    def should_notify(self, user_id: int, reason: str) -> bool:
+        """Foydalanuvchiga shu sabab haqida birinchi marta xabar berilyaptimi
+
+        Oqim paytida botning o'zi har bir rad etilgan xabarga javob yozib
+        Telegram chegaralariga urilmasligi uchun.
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is None or bucket.notified == reason:
+            return False
+        bucket.notified = reason
+        return True
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Qidiruv indeksi (aiogram 3.8)
+Xabarlar matni bo'yicha trigram indeksi, o'zbek lotin/kirill yozuvlarini tenglashtirib,
+hamda foydalanuvchi, vaqt, yuboruvchi turi va media turi bo'yicha filtrlar
+"""
+
+import re
+import heapq
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from config import Formats, MediaTypes
+
+WORD_RE = re.compile(r"\w+")
+
+# So'rovdagi filtrlar: from:<user_id>, since:/until:<YYYY-MM-DD>, type:<user|admin>, media:<tur>
+FILTER_RE = re.compile(r"^(from|since|until|type|media):(\S+)$", re.IGNORECASE)
+SENDER_TYPES = ("user", "admin")
+
+# Barcha tutuq belgisi variantlari (o', o‘, oʻ, o’, o`) olib tashlanadi:
+# foydalanuvchilar ularni turlicha yozadi yoki umuman yozmaydi
+APOSTROPHES = "'‘’ʻʼ`´ʹ"
+
+# O'zbek kirill -> lotin (tutuq belgisiz)
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya", "ў": "o", "қ": "q",
+    "ғ": "g", "ҳ": "h",
+}
+TRANSLATION = str.maketrans({**CYRILLIC_TO_LATIN, **{mark: "" for mark in APOSTROPHES}})
+
+# So'z boshida va unlidan keyin kirill "е" lotinda "ye" bo'ladi (ер -> yer)
+CYRILLIC_YE_RE = re.compile(r"(?:^|(?<=[\W_аеёиоуўэюяъь]))е")
+
+# Barcha guruhlar shundan kam xabarda bo'lsa, AND to'plamlar kesishmasi bilan hisoblanadi
+SET_INTERSECT_LIMIT = 65536
+
+
+def normalize_text(text: str) -> str:
+    """Qidiruv uchun matnni bir ko'rinishga keltirish
+
+    Kichik harf, kirill -> lotin va tutuq belgilarini olib tashlash:
+    ``Ўзбекистон``, ``O‘zbekiston`` va ``ozbekiston`` bir xil bo'ladi.
+    """
+    text = text.lower()
+    if "е" in text:
+        text = CYRILLIC_YE_RE.sub("ye", text)
+    return text.translate(TRANSLATION)
+
+
+@dataclass
+class SearchQuery:
+    """Tahlil qilingan qidiruv so'rovi
+
+    ``since`` va ``until`` - epoch soniyalari, ``until`` kiritilmaydi
+    (``until:2026-09-30`` shu kunning oxirigacha degani).
+    """
+    text: str = ""
+    user_id: Optional[str] = None
+    since: Optional[int] = None
+    until: Optional[int] = None
+    type: Optional[str] = None
+    media: Optional[str] = None
+
+    @property
+    def has_filters(self) -> bool:
+        """Matndan boshqa shart bormi"""
+        return any(value is not None for value in (self.user_id, self.since, self.until, self.type, self.media))
+
+
+def _parse_date(value: str) -> datetime:
+    """Filtr sanasini o'qish (mahalliy vaqt, DATE_FORMAT)"""
+    try:
+        return datetime.strptime(value, Formats.DATE_FORMAT)
+    except ValueError:
+        raise ValueError(f"Sana noto'g'ri: {value} (format: YYYY-MM-DD)")
+
+
+def parse_query(query: str) -> SearchQuery:
+    """``/search`` so'rovidan filtrlarni ajratib olish
+
+    Taniladigan ``kalit:qiymat`` bo'laklari filtrga aylanadi, qolgan so'zlar
+    matn sifatida qidiriladi. Noto'g'ri qiymatda ValueError (foydalanuvchiga
+    ko'rsatiladigan matn bilan) ko'tariladi.
+    """
+    result = SearchQuery()
+    words = []
+    for word in query.split():
+        match = FILTER_RE.match(word)
+        if match is None:
+            words.append(word)
+            continue
+
+        key, value = match.group(1).lower(), match.group(2)
+        if key == "from":
+            if not value.isdigit():
+                raise ValueError(f"from: foydalanuvchi ID raqam bo'lishi kerak ({value})")
+            result.user_id = str(int(value))
+        elif key == "since":
+            result.since = int(_parse_date(value).timestamp())
+        elif key == "until":
+            result.until = int((_parse_date(value) + timedelta(days=1)).timestamp())
+        elif key == "type":
+            if value.lower() not in SENDER_TYPES:
+                raise ValueError(f"type: faqat {' yoki '.join(SENDER_TYPES)} bo'lishi mumkin")
+            result.type = value.lower()
+        else:
+            if value.lower() not in MediaTypes.MEDIA_NAMES:
+                raise ValueError(f"media: noma'lum tur ({value}). Mavjudlari: {', '.join(MediaTypes.MEDIA_NAMES)}")
+            result.media = value.lower()
+
+    result.text = " ".join(words)
+    return result
+
+
+def trigrams(text: str) -> Set[str]:
+    """Normallashtirilgan matn so'zlarining trigramlari
+
+    So'zlar bo'sh joy bilan o'raladi, shunda qisqa so'zlar ham kalitga ega.
+    """
+    result = set()
+    for word in WORD_RE.findall(text):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+class SearchIndex:
+    """Xabarlar bo'yicha trigram indeksi
+
+    Har bir xabar vaqt tartibidagi butun son (doc id) oladi, shuning uchun
+    postings ro'yxatlari o'sish tartibida va eng yangi natijalar ularning
+    oxirida turadi. So'rovdagi har bir so'z matn ichidagi qism-satr
+    sifatida qidiriladi va barcha so'zlar bir xabarda bo'lishi kerak (AND).
+    Trigramlar faqat nomzodlarni tanlaydi; yakuniy tekshiruv normallashtirilgan
+    matnda bajariladi.
+
+    Filtrlar ham xuddi shunday postings ro'yxatlari: foydalanuvchi, yuboruvchi
+    turi va media turi bo'yicha. Sana oralig'i doc id oralig'iga vaqtlar
+    massivida ikkilik qidiruv bilan o'giriladi.
+    """
+
+    def __init__(self):
+        """Bo'sh indeks"""
+        self._doc_users: List[str] = []
+        self._doc_messages: list = []
+        # Doc id bo'yicha vaqtlar; soat orqaga ketsa ham kamaymaydi
+        self._doc_epochs = array("q")
+        self._postings: Dict[str, array] = {}
+        self._user_docs: Dict[str, array] = {}
+        self._type_docs: Dict[str, array] = {}
+        self._media_docs: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_messages)
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, object]]) -> "SearchIndex":
+        """(user_id, Message) juftliklaridan indeks qurish (worker oqimida)
+
+        Xabarlar avval vaqt bo'yicha tartiblanadi (bir foydalanuvchi ichidagi
+        tartib saqlanadi), shunda doc id'lar xronologik bo'ladi.
+        """
+        index = cls()
+        for user_id, message in sorted(items, key=lambda item: item[1].epoch):
+            index.add(user_id, message)
+        return index
+
+    @staticmethod
+    def _append(postings: Dict[str, array], key: str, doc_id: int):
+        """doc id ni kalit ro'yxati oxiriga qo'shish"""
+        posting = postings.get(key)
+        if posting is None:
+            posting = postings[key] = array("I")
+        posting.append(doc_id)
+
+    def add(self, user_id: str, message):
+        """Yangi xabarni indeksga qo'shish"""
+        doc_id = len(self._doc_messages)
+        self._doc_users.append(user_id)
+        self._doc_messages.append(message)
+        epochs = self._doc_epochs
+        epochs.append(max(message.epoch, epochs[-1]) if epochs else message.epoch)
+
+        self._append(self._user_docs, user_id, doc_id)
+        self._append(self._type_docs, message.type, doc_id)
+        if message.media_type:
+            self._append(self._media_docs, message.media_type, doc_id)
+
+        postings = self._postings
+        for gram in trigrams(normalize_text(message.text)):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array("I")
+            posting.append(doc_id)
+
+    def _term_groups(self, term: str) -> List[List[array]]:
+        """So'z uchun AND qilinadigan guruhlar; har bir guruh - postings birlashmasi
+
+        Uch va undan uzun so'zda har bir trigram alohida guruh. Qisqa so'z
+        uchun uni o'z ichiga olgan barcha kalitlar bitta guruhga birlashadi.
+        """
+        if len(term) >= 3:
+            return [[self._postings.get(term[i:i + 3], array("I"))] for i in range(len(term) - 2)]
+        return [[posting for gram, posting in self._postings.items() if term in gram]]
+
+    @staticmethod
+    def _contains(postings: List[array], doc_id: int) -> bool:
+        """doc id guruhdagi postings'dan birida bormi (ikkilik qidiruv)"""
+        for posting in postings:
+            position = bisect_left(posting, doc_id)
+            if position < len(posting) and posting[position] == doc_id:
+                return True
+        return False
+
+    @staticmethod
+    def _newest_first(postings: List[array], lo: int, hi: int) -> Iterator[int]:
+        """Bir nechta postings birlashmasi [lo, hi) oralig'ida, eng yangisidan boshlab (dangasa)"""
+        ranges = []
+        for posting in postings:
+            start, end = bisect_left(posting, lo), bisect_left(posting, hi)
+            if start < end:
+                ranges.append(map(posting.__getitem__, range(end - 1, start - 1, -1)))
+        if len(ranges) == 1:
+            yield from ranges[0]
+            return
+        previous = None
+        for doc_id in heapq.merge(*ranges, reverse=True):
+            if doc_id != previous:  # Bir xabar bir nechta mos kalitda bo'lishi mumkin
+                yield doc_id
+                previous = doc_id
+
+    def _candidates(self, groups: List[Tuple[int, List[array]]], lo: int, hi: int) -> Iterator[int]:
+        """Barcha guruhlarda bor [lo, hi) oralig'idagi doc id'lar, eng yangisidan boshlab
+
+        Barcha guruhlar kichik bo'lsa to'plamlar kesishmasi olinadi; aks
+        holda eng kichik guruh yangidan eskiga yuriladi va qolganlari
+        ikkilik qidiruv bilan tekshiriladi (ko'p uchraydigan qismlar bilan
+        ``limit`` ga tez yetiladi). Guruh bo'lmasa (faqat sana filtri)
+        oraliqning o'zi yuriladi.
+        """
+        if not groups:
+            yield from range(hi - 1, lo - 1, -1)
+            return
+
+        driver = groups[0][1]
+        if len(groups) > 1 and groups[-1][0] <= SET_INTERSECT_LIMIT:
+            candidates = set().union(*driver)
+            for _, postings in groups[1:]:
+                if not candidates:
+                    break
+                candidates.intersection_update(set().union(*postings))
+            yield from sorted((doc_id for doc_id in candidates if lo <= doc_id < hi), reverse=True)
+            return
+
+        others = [postings for _, postings in groups[1:]]
+        for doc_id in self._newest_first(driver, lo, hi):
+            if all(self._contains(postings, doc_id) for postings in others):
+                yield doc_id
+
+    def _filter_groups(self, query: SearchQuery) -> Optional[List[array]]:
+        """Filtrlarning postings ro'yxatlari; mos xabar bo'lmasa None"""
+        groups = []
+        for postings, key in ((self._user_docs, query.user_id), (self._type_docs, query.type),
+                              (self._media_docs, query.media)):
+            if key is None:
+                continue
+            posting = postings.get(key)
+            if not posting:
+                return None
+            groups.append(posting)
+        return groups
+
+    def search(self, query: Union[str, SearchQuery], limit: int,
+               before: Optional[int] = None) -> List[Tuple[int, str, object]]:
+        """So'rovga mos xabarlar, eng yangisi birinchi: (doc id, user_id, Message)
+
+        ``before`` - oldingi sahifaning oxirgi doc id si (kursor); natijalar
+        undan eskilari bilan davom etadi.
+        """
+        if isinstance(query, str):
+            query = parse_query(query)
+        terms = set(WORD_RE.findall(normalize_text(query.text)))
+        if not terms and not query.has_filters:
+            return []
+
+        filters = self._filter_groups(query)
+        if filters is None:
+            return []
+        groups = [(len(posting), [posting]) for posting in filters]
+        for term in terms:
+            for postings in self._term_groups(term):
+                size = sum(len(posting) for posting in postings)
+                if not size:
+                    return []
+                groups.append((size, postings))
+        groups.sort(key=lambda item: item[0])
+
+        epochs = self._doc_epochs
+        lo = bisect_left(epochs, query.since) if query.since is not None else 0
+        hi = bisect_left(epochs, query.until) if query.until is not None else len(epochs)
+        if before is not None:
+            hi = min(hi, before)
+
+        results = []
+        for doc_id in self._candidates(groups, lo, hi):
+            message = self._doc_messages[doc_id]
+            if query.since is not None and message.epoch < query.since:
+                continue
+            if query.until is not None and message.epoch >= query.until:
+                continue
+            if terms:
+                text = normalize_text(message.text)
+                if not all(term in text for term in terms):
+                    continue
+            results.append((doc_id, self._doc_users[doc_id], message))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Foydalanuvchi bo'yicha bo'lingan JSON ma'lumotlar bazasi (aiogram 3.8)
+Har bir foydalanuvchi xabarlari data/users/<id>.json faylida saqlanadi
+"""
+
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Set
+
+from config import USERS_DIR, BACKUP_DIR
+from database import MessageDatabase, UserInfo, Message, UserStats, UserData
+
+logger = logging.getLogger(__name__)
+
+# Xabar qo'shadigan, ya'ni shard faylini o'zgartiradigan jurnal yozuvlari
+SHARD_OPS = ("user_message", "admin_reply", "repeat")
+
+
+class ShardedMessageDatabase(MessageDatabase):
+    """Foydalanuvchi bo'yicha bo'lingan xabarlar bazasi
+
+    index.json faqat foydalanuvchi ma'lumotlari va statistikasini saqlaydi,
+    shuning uchun ishga tushish umumiy tarix hajmiga bog'liq emas. Xabarlar
+    foydalanuvchi birinchi marta so'ralganda uning faylidan yuklanadi, siqishda
+    esa faqat o'zgargan foydalanuvchilar fayllari qayta yoziladi.
+    """
+
+    def __init__(self, file_path: Path = USERS_DIR / "index.json"):
+        """Ma'lumotlar bazasini ishga tushirish"""
+        super().__init__(file_path)
+        self.users_dir = file_path.parent
+        self.backup_dir = BACKUP_DIR
+        # Indeksning o'zi lazy yuklanadi: xabarlar doim shardlardan o'qiladi
+        self.lazy_load = False
+        # Oxirgi siqishdan keyin xabar qo'shilgan foydalanuvchilar
+        self._dirty: Set[str] = set()
+
+    def _shard_path(self, user_id: str) -> Path:
+        """Foydalanuvchi xabarlari fayli"""
+        return self.users_dir / f"{user_id}.json"
+
+    # -------------------------------------------------------------------------
+    # Yuklash
+    # -------------------------------------------------------------------------
+
+    def _load_snapshot(self, f):
+        """Indeksdan faqat foydalanuvchi ma'lumotlari va statistikasini o'qish"""
+        for user_id, entry in self._iter_snapshot(f):
+            if user_id == "_meta":
+                self._seq = entry.get("seq", 0)
+                continue
+
+            try:
+                self.data[user_id] = UserData(
+                    user_info=UserInfo(**entry.get("user_info", {})),
+                    messages=[],
+                    stats=UserStats(**entry.get("stats", {}))
+                )
+                self._unloaded[user_id] = (entry.get("message_count", 0), entry.get("last_type"))
+            except Exception as e:
+                raise ValueError(f"Foydalanuvchi {user_id} yozuvi buzilgan: {e}") from e
+
+    def _apply(self, record: Dict[str, Any]):
+        """Jurnal yozuvini qo'llash va o'zgargan shardni belgilash"""
+        super()._apply(record)
+        if record.get("op") in SHARD_OPS and str(record.get("user_id")) in self.data:
+            self._dirty.add(str(record["user_id"]))
+
+    def _read_deferred(self, user_ids: Iterable[str]) -> Dict[str, List[Message]]:
+        """Shard fayllarini o'qish (worker oqimida)"""
+        shards = {}
+        for user_id in user_ids:
+            path = self._shard_path(user_id)
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    shards[user_id] = [Message(**msg) for msg in json.load(f)]
+            else:
+                shards[user_id] = []
+        return shards
+
+    def _read_raw_messages(self, source, user_id: str, count: int) -> bytes:
+        """O'qilmagan shard xabarlarini zahira uchun olish (worker oqimida)
+
+        Shard fayli indeksdan keyin yozilgan ortiqcha xabarlarni ham o'z
+        ichiga olishi mumkin, shuning uchun indeksdagi son bo'yicha kesiladi.
+        """
+        path = self._shard_path(user_id)
+        if not path.exists():
+            return b"[]"
+        with open(path, 'r', encoding='utf-8') as f:
+            messages = json.load(f)[:count]
+        return json.dumps(messages, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    # -------------------------------------------------------------------------
+    # Siqish
+    # -------------------------------------------------------------------------
+
+    async def _prepare_compaction(self):
+        """O'zgargan, lekin hali o'qilmagan shardlarni yuklash
+
+        Yangi o'zgarishlar yuklash paytida ham kelishi mumkin, shuning uchun
+        bunday foydalanuvchi qolmaguncha takrorlanadi. Oxirgi tekshiruv va
+        snapshot orasida event loop'ga qaytilmaydi.
+        """
+        pending = [user_id for user_id in self._dirty if user_id in self._unloaded]
+        while pending:
+            await self._load_deferred(pending)
+            pending = [user_id for user_id in self._dirty if user_id in self._unloaded]
+
+    def _compaction_state(self):
+        """Indeks uchun barcha sarlavhalar va faqat o'zgargan shardlar"""
+        dirty, self._dirty = self._dirty, set()
+
+        index = {}
+        for user_id, user_data in self.data.items():
+            entry = self._unloaded.get(user_id)
+            if entry is None:
+                messages = user_data.messages
+                entry = (len(messages), messages[-1].type if messages else None)
+            index[user_id] = (
+                user_data.user_info.to_dict(),
+                user_data.stats.to_dict(),
+                entry[0],
+                entry[1]
+            )
+
+        shards = {
+            user_id: (self.data[user_id].messages, len(self.data[user_id].messages))
+            for user_id in dirty
+        }
+        return index, shards, dirty
+
+    def _compaction_failed(self, state):
+        """Yozilmagan shardlarni keyingi siqish uchun qaytarish"""
+        self._dirty |= state[2]
+
+    @staticmethod
+    def _write_json_atomic(path: Path, write):
+        """Faylni vaqtinchalik nusxa orqali atomar yozish"""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_snapshot(self, state, seq: int):
+        """O'zgargan shardlar va indeksni yozish (worker oqimida)
+
+        Avval shardlar, keyin indeks yoziladi: indeks almashtirilmasdan
+        uzilish bo'lsa, eski indeksdagi xabarlar soni ortiqcha yozuvlarni kesadi.
+        """
+        index, shards, _ = state
+
+        for user_id, (messages, count) in shards.items():
+            payload = json.dumps([msg.to_dict() for msg in messages[:count]],
+                                 ensure_ascii=False, separators=(',', ':'))
+            self._write_json_atomic(self._shard_path(user_id), lambda f: f.write(payload))
+
+        def write_index(f):
+            f.write("{\n")
+            f.write('"_meta": ' + json.dumps({"seq": seq}))
+            for user_id, (user_info, stats, message_count, last_type) in index.items():
+                record = {
+                    "user_info": user_info,
+                    "stats": stats,
+                    "message_count": message_count,
+                    "last_type": last_type
+                }
+                f.write(",\n" + json.dumps(user_id) + ": ")
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            f.write("\n}\n")
+
+        self._write_json_atomic(self.file_path, write_index)
+        self._old_journal_path.unlink(missing_ok=True)
+
+        logger.debug(f"💾 {len(shards)} ta shard va indeks yozildi")
+
+    def import_users(self, users: Dict[str, UserData]) -> int:
+        """Bitta fayldagi bazani bo'lingan ko'rinishga o'tkazish"""
+        self.data = dict(users)
+        self._unloaded = {}
+        self._dirty = set(users)
+        self._write_snapshot(self._compaction_state(), self._seq)
+        self._sync_blocklist()
+        return len(users)
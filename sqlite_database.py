@@ -0,0 +1,707 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite ma'lumotlar bazasi moduli (aiogram 3.8)
+MessageDatabase bilan bir xil API, lekin ma'lumotlar diskdagi jadvallarda
+"""
+
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Any, Set, Tuple
+
+from config import Settings
+from database import (MessageDatabase, UserInfo, Message, UserStats, UserData, DuplicateWindow,
+                      RECENT_MESSAGES)
+from search_index import WORD_RE, normalize_text, parse_query
+from user_index import USER_ORDERS, encode_cursor, decode_cursor
+from blocklist import Blocklist
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL DEFAULT '',
+    last_name TEXT,
+    username TEXT,
+    first_contact INTEGER NOT NULL DEFAULT 0,
+    is_blocked INTEGER NOT NULL DEFAULT 0,
+    total_messages INTEGER NOT NULL DEFAULT 0,
+    last_message INTEGER NOT NULL DEFAULT 0,
+    last_activity INTEGER NOT NULL DEFAULT 0,
+    is_active_today INTEGER NOT NULL DEFAULT 0,
+    waiting_since INTEGER NOT NULL DEFAULT 0,
+    admin_replies INTEGER NOT NULL DEFAULT 0,
+    recent TEXT
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    text TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    message_id INTEGER,
+    media_type TEXT,
+    repeats INTEGER NOT NULL DEFAULT 1,
+    search_text TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_messages_user ON messages(user_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_type ON messages(type);
+CREATE INDEX IF NOT EXISTS idx_messages_media ON messages(media_type) WHERE media_type IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_users_last_activity ON users(last_activity);
+CREATE INDEX IF NOT EXISTS idx_users_total_messages ON users(total_messages);
+CREATE INDEX IF NOT EXISTS idx_users_waiting ON users(waiting_since) WHERE waiting_since > 0;
+CREATE INDEX IF NOT EXISTS idx_users_order_unread ON users(
+    (CASE WHEN waiting_since > 0 THEN waiting_since ELSE (1 << 40) - last_activity END), id);
+CREATE INDEX IF NOT EXISTS idx_users_order_activity ON users(-last_activity, id);
+CREATE INDEX IF NOT EXISTS idx_users_order_messages ON users(-total_messages, id);
+"""
+
+# Sxema versiyasi (PRAGMA user_version): 1 - vaqtlar Unix epoch soniyalarida,
+# 2 - xabarlarda media_type ustuni, 3 - foydalanuvchilarda waiting_since ustuni,
+# 4 - xabarlarda repeats (takrorlar soni) ustuni, 5 - xabarlarda search_text
+# (normalize_text qilingan matn) ustuni, 6 - foydalanuvchilarda admin_replies va
+# recent (UserStats xulosasi, JSON; NULL - hali hisoblanmagan) ustunlari
+SCHEMA_VERSION = 6
+
+# Har bir versiyaga o'tishda qo'shilgan ustunlar
+ADDED_COLUMNS = {
+    2: "ALTER TABLE messages ADD COLUMN media_type TEXT;",
+    3: "ALTER TABLE users ADD COLUMN waiting_since INTEGER NOT NULL DEFAULT 0;",
+    4: "ALTER TABLE messages ADD COLUMN repeats INTEGER NOT NULL DEFAULT 1;",
+    5: "ALTER TABLE messages ADD COLUMN search_text TEXT;",
+    6: "ALTER TABLE users ADD COLUMN admin_replies INTEGER NOT NULL DEFAULT 0;\n"
+       "ALTER TABLE users ADD COLUMN recent TEXT;",
+}
+
+# Qidiruv matni bo'lmagan (eski) xabarlar uchun uni to'ldirish
+FILL_SEARCH_TEXT = "UPDATE messages SET search_text = py_normalize(text) WHERE search_text IS NULL;"
+
+# So'nggi admin javobidan keyingi eng eski foydalanuvchi xabari (0 - javob berilgan)
+FILL_WAITING_SINCE = """
+UPDATE users SET waiting_since = COALESCE((
+    SELECT MIN(m.timestamp) FROM messages m
+    WHERE m.user_id = users.id AND m.type = 'user' AND m.id > COALESCE(
+        (SELECT MAX(a.id) FROM messages a WHERE a.user_id = users.id AND a.type = 'admin'), 0)
+), 0);
+"""
+
+# user_index.user_order_key bilan bir xil tartib qiymati (indekslar ham shu ifodalar bo'yicha)
+USER_ORDER_SQL = {
+    "unread": "(CASE WHEN waiting_since > 0 THEN waiting_since ELSE (1 << 40) - last_activity END)",
+    "activity": "-last_activity",
+    "messages": "-total_messages",
+}
+
+
+def _epoch_sql(column: str) -> str:
+    """DATETIME_FORMAT (mahalliy vaqt) matnini epoch soniyalariga o'giruvchi SQL ifoda"""
+    return f"COALESCE(CAST(strftime('%s', NULLIF({column}, ''), 'utc') AS INTEGER), 0)"
+
+
+# Vaqtlari matn bo'lgan eski bazani jadvallarni qayta yaratib ko'chirish
+MIGRATE_TO_EPOCH = f"""
+BEGIN;
+DROP INDEX IF EXISTS idx_messages_user;
+DROP INDEX IF EXISTS idx_messages_timestamp;
+DROP INDEX IF EXISTS idx_messages_type;
+DROP INDEX IF EXISTS idx_messages_media;
+DROP INDEX IF EXISTS idx_users_last_activity;
+DROP INDEX IF EXISTS idx_users_total_messages;
+DROP INDEX IF EXISTS idx_users_waiting;
+DROP INDEX IF EXISTS idx_users_order_unread;
+DROP INDEX IF EXISTS idx_users_order_activity;
+DROP INDEX IF EXISTS idx_users_order_messages;
+ALTER TABLE messages RENAME TO messages_v0;
+ALTER TABLE users RENAME TO users_v0;
+{SCHEMA}
+INSERT INTO users (id, first_name, last_name, username, first_contact, is_blocked,
+    total_messages, last_message, last_activity, is_active_today)
+    SELECT id, first_name, last_name, username, {_epoch_sql("first_contact")}, is_blocked,
+    total_messages, {_epoch_sql("last_message")}, {_epoch_sql("last_activity")}, is_active_today FROM users_v0;
+INSERT INTO messages (id, user_id, text, timestamp, type, message_id)
+    SELECT id, user_id, text, {_epoch_sql("timestamp")}, type, message_id FROM messages_v0;
+DROP TABLE messages_v0;
+DROP TABLE users_v0;
+{FILL_WAITING_SINCE}
+{FILL_SEARCH_TEXT}
+PRAGMA user_version = {SCHEMA_VERSION};
+COMMIT;
+"""
+
+
+def _migrate_columns_sql(version: int) -> str:
+    """Epoch vaqtli bazaga keyingi versiyalardagi ustunlarni qo'shish skripti"""
+    added = "\n".join(ADDED_COLUMNS[v] for v in range(version + 1, SCHEMA_VERSION + 1))
+    fill = FILL_WAITING_SINCE if version < 3 else ""
+    if version < 5:
+        fill += "\n" + FILL_SEARCH_TEXT
+    return f"BEGIN;\n{added}\n{SCHEMA}\n{fill}\nPRAGMA user_version = {SCHEMA_VERSION};\nCOMMIT;\n"
+
+
+MESSAGE_COLUMNS = "text, timestamp, type, message_id, media_type, repeats"
+
+USER_COLUMNS = (
+    "id, first_name, last_name, username, first_contact, is_blocked, "
+    "total_messages, last_message, last_activity, is_active_today, waiting_since, "
+    "admin_replies, recent"
+)
+
+
+def _escape_like(text: str) -> str:
+    """LIKE uchun maxsus belgilarni ekranlash"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SQLiteMessageDatabase:
+    """SQLite asosidagi xabarlar bazasi
+
+    Barcha so'rovlar bitta ulanish orqali alohida oqimda bajariladi,
+    shuning uchun event loop disk bilan ishlash vaqtida to'xtab qolmaydi.
+    """
+
+    def __init__(self, file_path: Path):
+        """Ma'lumotlar bazasini ishga tushirish"""
+        self.file_path = file_path
+        self._lock = asyncio.Lock()
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        # Admin /next bilan olgan, hali javob berilmagan suhbatlar (faqat xotirada)
+        self._claimed: Set[int] = set()
+        # Bloklanganlar: middleware har bir yangilanishda so'rov yubormasligi uchun
+        self.blocklist = Blocklist(file_path.with_name("blocked.json"))
+        # Takroriy xabarlar: kalit -> messages jadvalidagi qator ID
+        self.duplicates = DuplicateWindow(Settings.DUPLICATE_WINDOW)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ulanishni ochish va sxemani yaratish"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.file_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            # Eski xabarlarning qidiruv matnini ko'chirishda to'ldirish uchun
+            conn.create_function("py_normalize", 1, lambda s: normalize_text(s) if s else s,
+                                 deterministic=True)
+            self._init_schema(conn)
+            self._fill_summaries(conn)
+            self._conn = conn
+            self._sync_blocklist()
+            logger.info(f"🗄 SQLite bazasi ochildi: {self.file_path}")
+        return self._conn
+
+    @staticmethod
+    def _init_schema(conn: sqlite3.Connection):
+        """Sxemani yaratish yoki eski bazani joriy versiyaga ko'chirish"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        has_tables = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone() is not None
+
+        if has_tables and version < 1:
+            conn.executescript(MIGRATE_TO_EPOCH)
+            logger.info("🔄 SQLite bazasidagi vaqtlar epoch soniyalariga o'tkazildi")
+        elif has_tables and version < SCHEMA_VERSION:
+            conn.executescript(_migrate_columns_sql(version))
+            logger.info(f"🔄 SQLite sxemasi {version}-versiyadan {SCHEMA_VERSION}-versiyaga yangilandi")
+        else:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _fill_summaries(conn: sqlite3.Connection):
+        """Xulosasi yo'q (ko'chirilgan) foydalanuvchilar uchun uni hisoblash
+
+        Har bir foydalanuvchining faqat so'nggi ``RECENT_MESSAGES`` ta xabari
+        o'qiladi; keyin xulosa har bir xabar qo'shilganda yangilanib boradi.
+        """
+        user_ids = [row["id"] for row in conn.execute("SELECT id FROM users WHERE recent IS NULL")]
+        if not user_ids:
+            return
+        with conn:
+            for user_id in user_ids:
+                messages = [
+                    SQLiteMessageDatabase._row_to_message(m)
+                    for m in conn.execute(
+                        f"SELECT {MESSAGE_COLUMNS} FROM messages WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                        (user_id, RECENT_MESSAGES)
+                    )
+                ][::-1]
+                stats = UserStats()
+                stats.rebuild_summary(messages)
+                admin_replies = conn.execute(
+                    "SELECT COUNT(*) FROM messages WHERE user_id = ? AND type = 'admin'", (user_id,)
+                ).fetchone()[0]
+                conn.execute("UPDATE users SET admin_replies = ?, recent = ? WHERE id = ?",
+                             (admin_replies, json.dumps(stats.recent, ensure_ascii=False), user_id))
+        logger.info(f"🔄 {len(user_ids)} ta foydalanuvchi xulosasi hisoblandi")
+
+    @staticmethod
+    def _record_summary(conn: sqlite3.Connection, user_id: int, message: Message):
+        """Xabarni foydalanuvchi xulosasiga qo'shish (chaqiruvchi tranzaksiyasida)"""
+        row = conn.execute("SELECT admin_replies, recent FROM users WHERE id = ?", (user_id,)).fetchone()
+        stats = UserStats(admin_replies=row["admin_replies"], recent=json.loads(row["recent"] or "[]"))
+        stats.record_message(message)
+        conn.execute("UPDATE users SET admin_replies = ?, recent = ? WHERE id = ?",
+                     (stats.admin_replies, json.dumps(stats.recent, ensure_ascii=False), user_id))
+
+    async def _run(self, func, *args):
+        """Sinxron funksiyani alohida oqimda ketma-ket bajarish"""
+        async with self._lock:
+            return await asyncio.to_thread(func, *args)
+
+    @staticmethod
+    def _row_to_user(row: sqlite3.Row, messages: List[Message]) -> UserData:
+        """Jadval qatoridan UserData yaratish (xulosa ``recent`` ustunidan)"""
+        user_data = UserData(
+            user_info=UserInfo(
+                id=row["id"],
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                username=row["username"],
+                first_contact=row["first_contact"],
+                is_blocked=bool(row["is_blocked"])
+            ),
+            messages=messages,
+            stats=UserStats(
+                total_messages=row["total_messages"],
+                last_message=row["last_message"],
+                last_activity=row["last_activity"],
+                is_active_today=bool(row["is_active_today"]),
+                waiting_since=row["waiting_since"],
+                admin_replies=row["admin_replies"],
+                recent=json.loads(row["recent"]) if row["recent"] is not None else None
+            )
+        )
+        if user_data.stats.recent is None:
+            user_data.stats.rebuild_summary(messages)
+        return user_data
+
+    @staticmethod
+    def _row_to_message(row: sqlite3.Row) -> Message:
+        """Jadval qatoridan Message yaratish"""
+        return Message(
+            text=row["text"],
+            timestamp=row["timestamp"],
+            type=row["type"],
+            message_id=row["message_id"],
+            media_type=row["media_type"],
+            repeats=row["repeats"]
+        )
+
+    # -------------------------------------------------------------------------
+    # Sinxron amallar (worker oqimida)
+    # -------------------------------------------------------------------------
+
+    def _add_user_message(self, user_id: int, user_dict: Dict[str, Any], message_text: str,
+                          message_id: Optional[int], media_type: Optional[str], timestamp: int,
+                          content_key: Optional[Hashable] = None) -> bool:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (id, first_name, last_name, username, first_contact, "
+                "last_message, last_activity, is_active_today, recent) VALUES (?, ?, ?, ?, ?, ?, ?, 1, '[]')",
+                (user_id, user_dict.get("first_name", ""), user_dict.get("last_name"),
+                 user_dict.get("username"), timestamp, timestamp, timestamp)
+            )
+            if cursor.rowcount:
+                logger.info(f"👤 Yangi foydalanuvchi: {user_dict.get('first_name')} ({user_id})")
+
+            cursor = conn.execute(
+                "INSERT INTO messages (user_id, text, timestamp, type, message_id, media_type, search_text) "
+                "VALUES (?, ?, ?, 'user', ?, ?, ?)",
+                (user_id, message_text, timestamp, message_id, media_type, normalize_text(message_text))
+            )
+            row_id = cursor.lastrowid
+            conn.execute(
+                "UPDATE users SET total_messages = total_messages + 1, last_message = ?, "
+                "last_activity = ?, is_active_today = 1, first_name = ?, last_name = ?, username = ?, "
+                "waiting_since = CASE WHEN waiting_since = 0 THEN ? ELSE waiting_since END "
+                "WHERE id = ?",
+                (timestamp, timestamp, user_dict.get("first_name", ""), user_dict.get("last_name"),
+                 user_dict.get("username"), timestamp, user_id)
+            )
+            self._record_summary(conn, user_id, Message(message_text, timestamp, "user", message_id, media_type))
+        if content_key is not None:
+            self.duplicates.add(user_id, content_key, row_id)
+        return True
+
+    def _fold_duplicate(self, user_id: int, content_key: Hashable) -> int:
+        row_id = self.duplicates.find(user_id, content_key)
+        if row_id is None:
+            return 0
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE messages SET repeats = repeats + 1 WHERE id = ?", (row_id,))
+            row = conn.execute("SELECT repeats FROM messages WHERE id = ?", (row_id,)).fetchone()
+        return row["repeats"] if row else 0
+
+    def _add_admin_reply(self, user_id: int, reply_text: str, media_type: Optional[str],
+                         timestamp: int) -> bool:
+        conn = self._connect()
+        with conn:
+            if conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone() is None:
+                logger.error(f"Foydalanuvchi topilmadi: {user_id}")
+                return False
+            conn.execute(
+                "INSERT INTO messages (user_id, text, timestamp, type, media_type, search_text) "
+                "VALUES (?, ?, ?, 'admin', ?, ?)",
+                (user_id, reply_text, timestamp, media_type, normalize_text(reply_text))
+            )
+            conn.execute("UPDATE users SET waiting_since = 0 WHERE id = ?", (user_id,))
+            self._record_summary(conn, user_id, Message(reply_text, timestamp, "admin", None, media_type))
+        self._claimed.discard(user_id)
+        self.duplicates.reset(user_id)
+        return True
+
+    def _get_user_data(self, user_id: int) -> Optional[UserData]:
+        conn = self._connect()
+        row = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return None
+        messages = [
+            self._row_to_message(m)
+            for m in conn.execute(
+                f"SELECT {MESSAGE_COLUMNS} FROM messages WHERE user_id = ? ORDER BY id",
+                (user_id,)
+            )
+        ]
+        return self._row_to_user(row, messages)
+
+    def _get_users_count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def _get_all_users(self) -> Dict[str, UserData]:
+        conn = self._connect()
+        messages: Dict[int, List[Message]] = {}
+        for m in conn.execute(f"SELECT user_id, {MESSAGE_COLUMNS} FROM messages ORDER BY id"):
+            messages.setdefault(m["user_id"], []).append(self._row_to_message(m))
+        return {
+            str(row["id"]): self._row_to_user(row, messages.get(row["id"], []))
+            for row in conn.execute(f"SELECT {USER_COLUMNS} FROM users")
+        }
+
+    def _get_unread_messages_count(self) -> int:
+        conn = self._connect()
+        return conn.execute("SELECT COUNT(*) FROM users WHERE waiting_since > 0").fetchone()[0]
+
+    def _get_waiting_queue(self, limit: int, exclude: List[int]) -> List[Tuple[str, int]]:
+        """So'nggi admin javobidan keyingi eng eski foydalanuvchi xabari bo'yicha navbat"""
+        placeholders = ",".join("?" * len(exclude))
+        rows = self._connect().execute(
+            "SELECT id, waiting_since FROM users "
+            f"WHERE waiting_since > 0 AND id NOT IN ({placeholders}) "
+            "ORDER BY waiting_since LIMIT ?",
+            (*exclude, limit)
+        ).fetchall()
+        return [(str(row["id"]), row["waiting_since"]) for row in rows]
+
+    def _get_users_page(self, order: str, cursor: Optional[str], limit: int,
+                        backward: bool) -> Dict[str, Any]:
+        """Tartib ifodasi bo'yicha indeksdan keyset sahifa
+
+        Birinchi ustun bo'yicha alohida chegara SQLite'ga indeks oralig'ini
+        (SEARCH) tanlatadi; juftlik taqqoslashi esa tengliklarni ajratadi.
+        Qo'shni sahifa borligi bitta ortiqcha qator bilan aniqlanadi; sahifa
+        o'rnini sanash esa o'rniga proporsional bo'lgani uchun qilinmaydi.
+        """
+        conn = self._connect()
+        value = USER_ORDER_SQL[order]
+        select = f"SELECT {USER_COLUMNS}, {value} AS order_value FROM users"
+
+        rows, has_prev, has_next = [], False, False
+        if cursor and backward:
+            key = decode_cursor(cursor)
+            rows = conn.execute(
+                f"{select} WHERE {value} <= ? AND ({value}, id) < (?, ?) "
+                f"ORDER BY {value} DESC, id DESC LIMIT ?",
+                (key[0], *key, limit + 1)
+            ).fetchall()
+            has_prev, has_next = len(rows) > limit, True
+            rows = rows[:limit][::-1]
+        if cursor and not backward:
+            key = decode_cursor(cursor)
+            rows = conn.execute(
+                f"{select} WHERE {value} >= ? AND ({value}, id) > (?, ?) ORDER BY {value}, id LIMIT ?",
+                (key[0], *key, limit + 1)
+            ).fetchall()
+            has_prev, has_next = True, len(rows) > limit
+            rows = rows[:limit]
+        # Boshidan yoki orqaga yurilganda boshiga yetilsa - birinchi to'liq sahifa
+        if not cursor or (backward and len(rows) < limit):
+            rows = conn.execute(f"{select} ORDER BY {value}, id LIMIT ?", (limit + 1,)).fetchall()
+            has_prev, has_next = False, len(rows) > limit
+            rows = rows[:limit]
+
+        # Sahifa xulosa ustunlaridan chiziladi, xabarlar tarixi o'qilmaydi
+        return {
+            "users": [(str(row["id"]), self._row_to_user(row, [])) for row in rows],
+            "offset": 0 if not has_prev else None,
+            "total": self._get_users_count(),
+            "prev": encode_cursor((rows[0]["order_value"], rows[0]["id"])) if rows and has_prev else None,
+            "next": encode_cursor((rows[-1]["order_value"], rows[-1]["id"])) if rows and has_next else None
+        }
+
+    def _get_stats(self, yesterday: int) -> Dict[str, Any]:
+        conn = self._connect()
+        total_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        total_messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        active_users = conn.execute(
+            "SELECT COUNT(*) FROM users WHERE last_activity > ?", (yesterday,)
+        ).fetchone()[0]
+        top_users = conn.execute(
+            "SELECT id, first_name, last_name, total_messages FROM users "
+            "ORDER BY total_messages DESC LIMIT 5"
+        ).fetchall()
+
+        return {
+            "total_users": total_users,
+            "total_messages": total_messages,
+            "unread_messages": self._get_unread_messages_count(),
+            "active_users_24h": active_users,
+            "top_users": [
+                {
+                    "user_id": str(row["id"]),
+                    "name": f"{row['first_name']} {row['last_name'] or ''}".strip(),
+                    "messages_count": row["total_messages"]
+                }
+                for row in top_users
+            ]
+        }
+
+    def _search_messages(self, query: str, limit: int, before: Optional[int]) -> List[Dict[str, Any]]:
+        """SearchIndex bilan bir xil moslik: har bir so'z normalize_text qilingan
+        matnda qism-satr sifatida, so'zlar AND bilan"""
+        parsed = parse_query(query)
+        terms = sorted(set(WORD_RE.findall(normalize_text(parsed.text))))
+        if not terms and not parsed.has_filters:
+            return []
+
+        conditions, params = [], []
+        for term in terms:
+            conditions.append("m.search_text LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(term)}%")
+        for condition, value in (("m.user_id = ?", parsed.user_id), ("m.timestamp >= ?", parsed.since),
+                                 ("m.timestamp < ?", parsed.until), ("m.type = ?", parsed.type),
+                                 ("m.media_type = ?", parsed.media), ("m.id < ?", before)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT m.id, m.user_id, m.text, m.timestamp, m.type, m.message_id, m.media_type, m.repeats, "
+            "u.first_name, u.last_name, u.username "
+            "FROM messages m JOIN users u ON u.id = m.user_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY m.id DESC LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+
+        return [
+            {
+                "user_id": str(row["user_id"]),
+                "user_name": f"{row['first_name']} {row['last_name'] or ''}".strip(),
+                "username": row["username"],
+                "message": self._row_to_message(row),
+                "match_text": row["text"],
+                "cursor": row["id"]
+            }
+            for row in rows
+        ]
+
+    def _backup_data(self, backup_path: Path) -> bool:
+        conn = self._connect()
+        target = sqlite3.connect(backup_path)
+        try:
+            conn.backup(target)
+        finally:
+            target.close()
+        return True
+
+    def _set_blocked(self, user_id: int, blocked: bool) -> bool:
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("UPDATE users SET is_blocked = ? WHERE id = ?", (int(blocked), user_id))
+        if cursor.rowcount > 0:
+            self.blocklist.set_blocked(user_id, blocked)
+            self.blocklist.save()
+            return True
+        return False
+
+    def _sync_blocklist(self):
+        """Bloklanganlar faylini jadvaldagi holat bilan solishtirish"""
+        rows = self._conn.execute("SELECT id FROM users WHERE is_blocked = 1").fetchall()
+        if self.blocklist.reset(row["id"] for row in rows):
+            try:
+                self.blocklist.save()
+            except Exception as e:
+                logger.error(f"Bloklanganlar ro'yxatini saqlashda xatolik: {e}")
+
+    def import_users(self, users: Dict[str, UserData]) -> int:
+        """messages.json dagi foydalanuvchilarni bitta tranzaksiyada import qilish"""
+        conn = self._connect()
+        imported = 0
+        with conn:
+            for user_data in users.values():
+                info, stats = user_data.user_info, user_data.stats
+                messages = user_data.messages
+                waiting_since = 0
+                if messages and messages[-1].type == "user":
+                    waiting_since = MessageDatabase._waiting_since(user_data)
+                if stats.recent is None:
+                    stats.rebuild_summary(messages)
+                conn.execute(
+                    f"INSERT OR REPLACE INTO users ({USER_COLUMNS}) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (info.id, info.first_name, info.last_name, info.username, info.first_contact,
+                     int(info.is_blocked), stats.total_messages, stats.last_message,
+                     stats.last_activity, int(stats.is_active_today), waiting_since,
+                     stats.admin_replies, json.dumps(stats.recent, ensure_ascii=False))
+                )
+                conn.execute("DELETE FROM messages WHERE user_id = ?", (info.id,))
+                conn.executemany(
+                    f"INSERT INTO messages (user_id, {MESSAGE_COLUMNS}, search_text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(info.id, m.text, m.epoch, m.type, m.message_id, m.media_type, m.repeats,
+                      normalize_text(m.text)) for m in user_data.messages]
+                )
+                imported += 1
+        self._sync_blocklist()
+        return imported
+
+    # -------------------------------------------------------------------------
+    # Async API (MessageDatabase bilan bir xil)
+    # -------------------------------------------------------------------------
+
+    async def add_user_message(self, user_id: int, user_dict: Dict[str, Any], message_text: str,
+                               message_id: int = None, media_type: Optional[str] = None,
+                               content_key: Optional[Hashable] = None) -> bool:
+        """Foydalanuvchi xabarini qo'shish"""
+        try:
+            timestamp = int(time.time())
+            return await self._run(self._add_user_message, user_id, user_dict, message_text,
+                                   message_id, media_type, timestamp, content_key)
+        except Exception as e:
+            logger.error(f"Xabar qo'shishda xatolik: {e}")
+            return False
+
+    async def fold_duplicate(self, user_id: int, content_key: Hashable) -> int:
+        """Takroriy xabarni oldingisining hisoblagichiga qo'shish (takror bo'lmasa 0)"""
+        try:
+            return await self._run(self._fold_duplicate, user_id, content_key)
+        except Exception as e:
+            logger.error(f"Takroriy xabarni qo'shishda xatolik: {e}")
+            return 0
+
+    async def add_admin_reply(self, user_id: int, reply_text: str, media_type: Optional[str] = None) -> bool:
+        """Admin javobini qo'shish"""
+        try:
+            timestamp = int(time.time())
+            return await self._run(self._add_admin_reply, user_id, reply_text, media_type, timestamp)
+        except Exception as e:
+            logger.error(f"Admin javobini qo'shishda xatolik: {e}")
+            return False
+
+    async def get_all_users(self) -> Dict[str, UserData]:
+        """Barcha foydalanuvchilarni olish (butun bazani o'qiydi)"""
+        return await self._run(self._get_all_users)
+
+    async def get_users_page(self, order: str = "unread", cursor: Optional[str] = None,
+                             limit: int = 10, backward: bool = False) -> Dict[str, Any]:
+        """Foydalanuvchilar sahifasi (MessageDatabase.get_users_page bilan bir xil)"""
+        if order not in USER_ORDERS:
+            raise ValueError(f"Noma'lum tartib: {order}")
+        return await self._run(self._get_users_page, order, cursor, limit, backward)
+
+    async def get_users_count(self) -> int:
+        """Foydalanuvchilar soni"""
+        return await self._run(self._get_users_count)
+
+    async def get_user_data(self, user_id: int) -> Optional[UserData]:
+        """Foydalanuvchi ma'lumotlarini olish"""
+        return await self._run(self._get_user_data, user_id)
+
+    async def get_user_messages(self, user_id: int) -> List[Message]:
+        """Foydalanuvchi xabarlarini olish"""
+        user_data = await self.get_user_data(user_id)
+        return user_data.messages if user_data else []
+
+    async def get_unread_messages_count(self) -> int:
+        """Javob berilmagan xabarlar soni"""
+        return await self._run(self._get_unread_messages_count)
+
+    async def get_waiting_queue(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Javob kutayotgan suhbatlar, eng uzoq kutayotgani birinchi"""
+        return await self._run(self._get_waiting_queue, limit, list(self._claimed))
+
+    async def pop_waiting(self) -> Optional[Tuple[str, int]]:
+        """Eng uzoq kutayotgan suhbatni navbatdan olish (admin /next)"""
+        queue = await self.get_waiting_queue(1)
+        if not queue:
+            return None
+        self._claimed.add(int(queue[0][0]))
+        return queue[0]
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Bot statistikasi"""
+        yesterday = int(time.time() - timedelta(days=1).total_seconds())
+        return await self._run(self._get_stats, yesterday)
+
+    async def search_messages(self, query: str, limit: int = 50,
+                              before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Xabarlarda qidirish (eng yangi natijalar birinchi, filtrlar bilan)"""
+        return await self._run(self._search_messages, query, limit, before)
+
+    async def backup_data(self, backup_path: Path = None) -> bool:
+        """Ma'lumotlarni zahiralash"""
+        try:
+            if not backup_path:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                backup_path = self.file_path.parent.parent / "backup" / f"messages_backup_{timestamp}.db"
+
+            backup_path.parent.mkdir(parents=True, exist_ok=True)
+            await self._run(self._backup_data, backup_path)
+
+            logger.info(f"💾 Zahira nusxa yaratildi: {backup_path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Zahira yaratishda xatolik: {e}")
+            return False
+
+    async def block_user(self, user_id: int) -> bool:
+        """Foydalanuvchini bloklash"""
+        try:
+            return await self._run(self._set_blocked, user_id, True)
+        except Exception as e:
+            logger.error(f"Foydalanuvchini bloklashda xatolik: {e}")
+            return False
+
+    async def unblock_user(self, user_id: int) -> bool:
+        """Foydalanuvchini blokdan chiqarish"""
+        try:
+            return await self._run(self._set_blocked, user_id, False)
+        except Exception as e:
+            logger.error(f"Blokdan chiqarishda xatolik: {e}")
+            return False
+
+    async def is_user_blocked(self, user_id: int) -> bool:
+        """Foydalanuvchi bloklanganmi tekshirish (xotiradagi to'plamda)"""
+        if self._conn is None:
+            await self._run(self._connect)
+        return user_id in self.blocklist
+
+    async def close(self):
+        """Ulanishni yopish"""
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistika indeksi (aiogram 3.8)
+get_stats uchun har bir o'zgarishda yangilanadigan yig'indilar
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Bir soatlik bo'laklar: faollik indeksi shu aniqlikda saqlanadi
+BUCKET_SECONDS = 3600
+# Faol foydalanuvchilar oynasi (24 soat)
+ACTIVE_WINDOW = 24 * 3600
+
+
+class StatsIndex:
+    """Bot statistikasi uchun yig'indilar
+
+    - ``total_messages``: barcha xabarlar soni (foydalanuvchi + admin)
+    - ``waiting``: javob kutayotgan foydalanuvchilar navbati, javobsiz
+      qolgan eng eski xabar vaqti bo'yicha (eng eskisi boshida)
+    - ``claimed``: admin ``/next`` bilan olgan, hali javob berilmagan suhbatlar
+    - top-K: eng ko'p yozgan foydalanuvchilar. Xabarlar soni faqat
+      ortadi, shuning uchun ro'yxatga faqat o'sgan foydalanuvchining o'zi
+      kirishi mumkin va kichik tartiblangan ro'yxat yetarli
+    - faollik: so'nggi faollik soati bo'yicha foydalanuvchilar to'plamlari;
+      24 soatdan eskilari so'rov paytida tashlab yuboriladi
+    """
+
+    def __init__(self, top_size: int = 5):
+        """Bo'sh indeks"""
+        self.top_size = top_size
+        self.total_messages = 0
+        self.waiting: "OrderedDict[str, int]" = OrderedDict()
+        self.claimed: Dict[str, int] = {}
+        # (xabarlar soni, user_id), kamayish tartibida
+        self._top: List[Tuple[int, str]] = []
+        self._buckets: Dict[int, Set[str]] = {}
+        self._activity: Dict[str, int] = {}
+
+    def add_user(self, user_id: str, message_count: int, total_messages: int,
+                 last_activity: int, waiting_since: Optional[int]):
+        """Yuklangan foydalanuvchini indeksga qo'shish
+
+        Barcha foydalanuvchilar qo'shilgach ``sort_waiting`` chaqiriladi.
+        """
+        self.total_messages += message_count
+        if waiting_since is not None:
+            self.waiting[user_id] = waiting_since
+        self._update_top(user_id, total_messages)
+        self.touch(user_id, last_activity)
+
+    def sort_waiting(self):
+        """Yuklashdan keyin navbatni kutish vaqti bo'yicha tartiblash"""
+        self.waiting = OrderedDict(sorted(self.waiting.items(), key=lambda item: item[1]))
+
+    def on_user_message(self, user_id: str, total_messages: int, timestamp: int):
+        """Foydalanuvchi xabari qo'shildi
+
+        Allaqachon navbatdagi foydalanuvchi o'z o'rnida qoladi: navbat
+        javobsiz qolgan eng eski xabar bo'yicha.
+        """
+        self.total_messages += 1
+        if user_id not in self.waiting and user_id not in self.claimed:
+            self.waiting[user_id] = timestamp
+        self._update_top(user_id, total_messages)
+        self.touch(user_id, timestamp)
+
+    def on_admin_reply(self, user_id: str):
+        """Admin javobi qo'shildi"""
+        self.total_messages += 1
+        self.waiting.pop(user_id, None)
+        self.claimed.pop(user_id, None)
+
+    @property
+    def unread_count(self) -> int:
+        """Javob kutayotgan suhbatlar soni (olinganlari bilan)"""
+        return len(self.waiting) + len(self.claimed)
+
+    def pop_waiting(self) -> Optional[Tuple[str, int]]:
+        """Eng uzoq kutayotgan suhbatni navbatdan olish
+
+        Suhbat javob berilguncha ``claimed`` da qoladi va qayta
+        berilmaydi; qayta ishga tushishda navbatga qaytadi.
+        """
+        if not self.waiting:
+            return None
+        user_id, since = self.waiting.popitem(last=False)
+        self.claimed[user_id] = since
+        return user_id, since
+
+    def peek_waiting(self, limit: int) -> List[Tuple[str, int]]:
+        """Navbat boshidagi suhbatlar: (user_id, kutish boshlangan vaqt)"""
+        result = []
+        for item in self.waiting.items():
+            if len(result) >= limit:
+                break
+            result.append(item)
+        return result
+
+    def touch(self, user_id: str, timestamp: int):
+        """Foydalanuvchi faolligini yangilash
+
+        Oynadan tashqaridagi vaqtlar indekslanmaydi: vaqt faqat oldinga
+        yuradi, ular hech qachon yana faol bo'lmaydi.
+        """
+        if timestamp <= time.time() - ACTIVE_WINDOW:
+            return
+        previous = self._activity.get(user_id)
+        if previous is not None:
+            bucket = self._buckets.get(previous // BUCKET_SECONDS)
+            if bucket is not None:
+                bucket.discard(user_id)
+        self._activity[user_id] = timestamp
+        self._buckets.setdefault(timestamp // BUCKET_SECONDS, set()).add(user_id)
+
+    def active_count(self, now: Optional[float] = None) -> int:
+        """So'nggi 24 soatda faol foydalanuvchilar soni
+
+        To'liq oyna ichidagi bo'laklar o'lchami bo'yicha, chegaradagi bitta
+        bo'lak esa foydalanuvchi vaqtlari bo'yicha sanaladi.
+        """
+        cutoff = (now if now is not None else time.time()) - ACTIVE_WINDOW
+        edge = int(cutoff) // BUCKET_SECONDS
+
+        for hour in [hour for hour in self._buckets if hour < edge]:
+            for user_id in self._buckets.pop(hour):
+                del self._activity[user_id]
+
+        count = 0
+        for hour, users in self._buckets.items():
+            if hour > edge:
+                count += len(users)
+            else:
+                count += sum(1 for user_id in users if self._activity[user_id] > cutoff)
+        return count
+
+    def top(self) -> List[Tuple[int, str]]:
+        """Eng faol foydalanuvchilar: (xabarlar soni, user_id)"""
+        return list(self._top)
+
+    def _update_top(self, user_id: str, count: int):
+        """Top-K ro'yxatini bitta foydalanuvchi uchun yangilash"""
+        for i, (_, top_user_id) in enumerate(self._top):
+            if top_user_id == user_id:
+                del self._top[i]
+                break
+        else:
+            if len(self._top) >= self.top_size and count <= self._top[-1][0]:
+                return
+
+        # Teng sonlarda avval qo'shilgan foydalanuvchi oldinda qoladi
+        position = len(self._top)
+        while position > 0 and self._top[position - 1][0] < count:
+            position -= 1
+        self._top.insert(position, (count, user_id))
+        del self._top[self.top_size:]
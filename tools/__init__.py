@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Bot bilan ishlash uchun yordamchi skriptlar"""
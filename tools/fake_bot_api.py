@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Soxta Telegram Bot API server: botni tarmoqsiz sinash va o'tkazuvchanlikni o'lchash uchun
+
+``/bot<token>/<method>`` so'rovlariga Telegram javoblari ko'rinishida javob
+beradi, sun'iy kechikish qo'shadi va Telegram chegaralarini taqlid qiladi:
+umumiy va chat bo'yicha chegaradan oshganda ``429`` va ``retry_after``
+qaytaradi. ``GET /stats`` hisoblagichlarni ko'rsatadi.
+
+Ishlatish:
+    python -m tools.fake_bot_api --port 8081 --latency 0.05
+    TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py
+"""
+
+import math
+import time
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+from typing import Dict
+
+from aiohttp import web
+
+# Javobi Message bo'lgan metodlar
+MESSAGE_METHODS = {
+    "sendmessage", "forwardmessage", "sendphoto", "sendvideo", "sendaudio", "sendvoice",
+    "sendvideonote", "senddocument", "sendsticker", "sendanimation", "sendlocation",
+    "sendvenue", "sendcontact",
+}
+
+
+class FakeBotAPI:
+    """Bot API taqlidi
+
+    - ``global_rate``: soniyasiga umumiy yuborishlar (token chelagi)
+    - ``chat_interval``, ``chat_burst``: bitta chatga o'rtacha shu oraliqda
+      bittadan, ketma-ket esa ``chat_burst`` tagacha yuborish (Telegram qisqa
+      portlashlarga, masalan handler ichidagi ``message.answer`` ga yo'l qo'yadi)
+    - ``latency``: har bir so'rovga qo'shiladigan kechikish (soniya)
+    """
+
+    def __init__(self, global_rate: float = 30, chat_interval: float = 1.0, latency: float = 0.05,
+                 chat_burst: int = 3):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.chat_burst = chat_burst
+        self.latency = latency
+        self._tokens = float(global_rate)
+        self._updated = time.monotonic()
+        # Chat chelagi bo'shaydigan vaqt: har bir yuborish uni chat_interval ga suradi
+        self._chat_busy_until: Dict[str, float] = {}
+        self._message_ids = itertools.count(1)
+        self.stats = Counter()
+
+    def _limit(self, chat_id: str) -> int:
+        """Chegaradan oshgan bo'lsa retry_after soniyalari, aks holda 0"""
+        now = time.monotonic()
+        self._tokens = min(self.global_rate, self._tokens + (now - self._updated) * self.global_rate)
+        self._updated = now
+        if self._tokens < 1:
+            return 1
+        busy_until = max(now, self._chat_busy_until.get(chat_id, 0.0))
+        overflow = busy_until + self.chat_interval - now - self.chat_burst * self.chat_interval
+        if overflow > 0:
+            return max(1, math.ceil(overflow))
+        self._tokens -= 1
+        self._chat_busy_until[chat_id] = busy_until + self.chat_interval
+        return 0
+
+    def _message(self, chat_id: str, data) -> dict:
+        """Yuborilgan xabar obyekti"""
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "private"},
+        }
+        if "text" in data:
+            message["text"] = data["text"]
+        return message
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """``/bot<token>/<method>`` so'rovi"""
+        method = request.match_info["method"].lower()
+        data = await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        chat_id = data.get("chat_id")
+        if chat_id is not None and method != "getupdates":
+            retry_after = self._limit(chat_id)
+            if retry_after:
+                self.stats["429"] += 1
+                return web.json_response({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                })
+        self.stats[method] += 1
+
+        if method in MESSAGE_METHODS:
+            result = self._message(chat_id, data)
+        elif method == "copymessage":
+            result = {"message_id": next(self._message_ids)}
+        elif method == "getme":
+            result = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        elif method == "getupdates":
+            # Long polling: yangilanishlar yo'q
+            await asyncio.sleep(min(float(data.get("timeout", 0) or 0), 1.0))
+            result = []
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """Hisoblagichlar"""
+        return web.json_response(dict(self.stats))
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/stats", self.handle_stats)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+        return app
+
+
+async def start_server(api: FakeBotAPI, host: str = "127.0.0.1", port: int = 0) -> web.AppRunner:
+    """Serverni joriy event loop'da ishga tushirish (port 0 - bo'sh port)
+
+    Haqiqiy manzil ``runner.addresses[0]`` da.
+    """
+    runner = web.AppRunner(api.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soxta Telegram Bot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05, help="so'rov kechikishi (soniya)")
+    parser.add_argument("--global-rate", type=float, default=30, help="soniyasiga umumiy yuborishlar")
+    parser.add_argument("--chat-interval", type=float, default=1.0, help="chat bo'yicha oraliq (soniya)")
+    parser.add_argument("--chat-burst", type=int, default=3, help="chatga ketma-ket yuborishlar")
+    args = parser.parse_args()
+
+    api = FakeBotAPI(args.global_rate, args.chat_interval, args.latency, args.chat_burst)
+    web.run_app(api.make_app(), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+messages.json (va jurnal) ma'lumotlarini SQLite bazasiga ko'chirish
+
+Ishlatish:
+    python -m tools.migrate_to_sqlite [--source data/messages.json] [--target data/messages.db]
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from config import DATA_DIR
+from database import MessageDatabase
+from sqlite_database import SQLiteMessageDatabase
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(source: Path, target: Path) -> int:
+    """JSON bazani o'qib, SQLite bazaga yozish"""
+    json_db = MessageDatabase(source)
+    users = await json_db.get_all_users()
+
+    sqlite_db = SQLiteMessageDatabase(target)
+    try:
+        imported = await asyncio.to_thread(sqlite_db.import_users, users)
+    finally:
+        await sqlite_db.close()
+
+    total_messages = sum(len(user_data.messages) for user_data in users.values())
+    logger.info(f"✅ {imported} foydalanuvchi va {total_messages} xabar ko'chirildi: {target}")
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="messages.json ni SQLite bazaga ko'chirish")
+    parser.add_argument("--source", type=Path, default=DATA_DIR / "messages.json")
+    parser.add_argument("--target", type=Path, default=DATA_DIR / "messages.db")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(migrate(args.source, args.target))
+
+
+if __name__ == '__main__':
+    main()
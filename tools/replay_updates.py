@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yozib olingan yangilanishlarni webhook serverga qayta yuborish
+
+Fayl har bir qatorda bitta Telegram ``Update`` JSON (``WEBHOOK_RECORD_PATH``
+bilan yozilgan yoki qo'lda tayyorlangan). Har bir yangilanish
+``X-Telegram-Bot-Api-Secret-Token`` bilan POST qilinadi, javob kodlari va
+kechikishlar hisoblanadi.
+
+Ishlatish:
+    python -m tools.replay_updates --file updates.jsonl --url http://127.0.0.1:8080/webhook --concurrency 10
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+import aiohttp
+
+from config import Settings
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: Path, repeat: int, renumber: bool) -> List[dict]:
+    """Yangilanishlarni o'qish; ``renumber`` bilan har bir nusxa yangi ID oladi
+
+    Bot yangilanishdan olingan kalitlar bo'yicha takrorlarni tashlaydi, shuning
+    uchun bir faylni ko'p marta yuborishda ID'lar yangilanishi kerak.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        updates = [json.loads(line) for line in f if line.strip()]
+
+    result = []
+    ids = itertools.count(1)
+    for _ in range(repeat):
+        for update in updates:
+            update = json.loads(json.dumps(update))
+            if renumber:
+                new_id = next(ids)
+                update["update_id"] = new_id
+                if "message" in update:
+                    update["message"]["message_id"] = new_id
+            result.append(update)
+    return result
+
+
+async def replay(url: str, secret: str, updates: List[dict], concurrency: int):
+    """Yangilanishlarni ``concurrency`` ta parallel so'rov bilan yuborish"""
+    statuses = Counter()
+    latencies: List[float] = []
+    queue = iter(updates)
+
+    async def worker(session: aiohttp.ClientSession):
+        for update in queue:
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=update, headers={SECRET_HEADER: secret}) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*[worker(session) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"\n📨 {len(updates)} yangilanish, {elapsed:.2f} s ({len(updates) / elapsed:.0f}/s)")
+    print(f"📊 Javoblar: {dict(statuses)}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        print(f"⏱ Kechikish: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yangilanishlarni webhook serverga qayta yuborish")
+    parser.add_argument("--file", type=Path, required=True, help="JSONL fayl")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{Settings.WEBHOOK_PORT}{Settings.WEBHOOK_PATH}")
+    parser.add_argument("--secret", default=Settings.WEBHOOK_SECRET)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=1, help="faylni necha marta yuborish")
+    parser.add_argument("--renumber", action="store_true", help="update_id va message_id ni yangilash")
+    args = parser.parse_args()
+
+    updates = load_updates(args.file, args.repeat, args.renumber)
+    asyncio.run(replay(args.url, args.secret, updates, args.concurrency))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+messages.json (va jurnal) ma'lumotlarini foydalanuvchi bo'yicha bo'lingan
+ko'rinishga (data/users/<id>.json + index.json) o'tkazish
+
+Ishlatish:
+    python -m tools.shard_messages [--source data/messages.json] [--target data/users]
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from config import DATA_DIR, USERS_DIR
+from database import MessageDatabase
+from sharded_database import ShardedMessageDatabase
+
+logger = logging.getLogger(__name__)
+
+
+async def convert(source: Path, target: Path) -> int:
+    """Bitta fayldagi bazani o'qib, shardlarga yozish"""
+    json_db = MessageDatabase(source)
+    users = await json_db.get_all_users()
+
+    sharded_db = ShardedMessageDatabase(target / "index.json")
+    converted = await asyncio.to_thread(sharded_db.import_users, users)
+
+    logger.info(f"✅ {converted} foydalanuvchi {target} papkasiga ajratildi")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="messages.json ni foydalanuvchi fayllariga ajratish")
+    parser.add_argument("--source", type=Path, default=DATA_DIR / "messages.json")
+    parser.add_argument("--target", type=Path, default=USERS_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(convert(args.source, args.target))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Foydalanuvchilar tartib indeksi (aiogram 3.8)
+/messages sahifalari uchun har bir o'zgarishda yangilanadigan tartiblangan kalitlar
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+# Ro'yxat tartiblari: javobsizlar birinchi, so'nggi faollik, xabarlar soni
+USER_ORDERS = ("unread", "activity", "messages")
+
+# "unread" tartibida javob berilganlar shu qiymatdan ayirilgan faollik bilan
+# barcha epoch vaqtlaridan keyin turadi
+ANSWERED_BASE = 1 << 40
+
+
+def user_order_key(order: str, user_id: int, last_activity: int, total_messages: int,
+                   waiting_since: int) -> Tuple[int, int]:
+    """Tartib kaliti (qiymat, user_id): o'sish tartibida solishtiriladi
+
+    SQLite bazasi ham aynan shu ifodalar bo'yicha tartiblaydi, shuning uchun
+    kursor ikkala bazada bir xil ma'noga ega. "unread" - avval eng uzoq
+    kutayotganlar, keyin qolganlar so'nggi faollik bo'yicha.
+    """
+    if order == "activity":
+        return -last_activity, user_id
+    if order == "messages":
+        return -total_messages, user_id
+    if waiting_since:
+        return waiting_since, user_id
+    return ANSWERED_BASE - last_activity, user_id
+
+
+def encode_cursor(key: Tuple[int, int]) -> str:
+    """Kalitni callback data uchun qisqa matnga aylantirish"""
+    return ".".join(str(part) for part in key)
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """``encode_cursor`` teskarisi (noto'g'ri kursorda ValueError)"""
+    value, user_id = cursor.split(".")
+    return int(value), int(user_id)
+
+
+class UserOrderIndex:
+    """Har bir tartib uchun foydalanuvchilarning tartiblangan kalitlari
+
+    Kalitlar oddiy ro'yxatda saqlanadi: o'zgarishda eski kalit ikkilik
+    qidiruv bilan o'chiriladi va yangisi o'z joyiga qo'yiladi. Sahifa olish
+    kursordan boshlab ``limit`` ta kalitni kesib olishdan iborat, shuning uchun
+    foydalanuvchilar soniga bog'liq emas.
+    """
+
+    def __init__(self):
+        """Bo'sh indeks"""
+        # user_id -> (last_activity, total_messages, waiting_since)
+        self._users: Dict[str, Tuple[int, int, int]] = {}
+        self._keys: Dict[str, List[Tuple[int, int]]] = {order: [] for order in USER_ORDERS}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add_user(self, user_id: str, last_activity: int, total_messages: int, waiting_since: int):
+        """Yuklangan foydalanuvchini qo'shish (oxirida ``sort`` chaqiriladi)"""
+        values = self._users[user_id] = (last_activity, total_messages, waiting_since)
+        for order, keys in self._keys.items():
+            keys.append(user_order_key(order, int(user_id), *values))
+
+    def sort(self):
+        """Yuklashdan keyin barcha tartiblarni bir marta saralash"""
+        for keys in self._keys.values():
+            keys.sort()
+
+    def update(self, user_id: str, last_activity: int, total_messages: int, waiting_since: int):
+        """Foydalanuvchi qiymatlari o'zgardi"""
+        values = (last_activity, total_messages, waiting_since)
+        previous = self._users.get(user_id)
+        if previous == values:
+            return
+        self._users[user_id] = values
+
+        for order, keys in self._keys.items():
+            key = user_order_key(order, int(user_id), *values)
+            if previous is not None:
+                old_key = user_order_key(order, int(user_id), *previous)
+                if old_key == key:
+                    continue
+                del keys[bisect_left(keys, old_key)]
+            insort(keys, key)
+
+    def page(self, order: str, cursor: Optional[Tuple[int, int]], limit: int,
+             backward: bool = False) -> Tuple[List[Tuple[int, int]], int]:
+        """Kursordan keyingi (``backward`` da oldingi) sahifa: (kalitlar, boshlanish o'rni)
+
+        Orqaga yurilganda boshiga yetilsa, birinchi to'liq sahifa qaytadi.
+        """
+        keys = self._keys[order]
+        if cursor is None:
+            start = 0
+        elif backward:
+            start = max(0, bisect_left(keys, cursor) - limit)
+        else:
+            start = bisect_right(keys, cursor)
+        return keys[start:start + limit], start
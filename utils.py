@@ -8,9 +8,11 @@ Umumiy ishlatish uchun funksiyalar
 import html
 import re
 import os
+import time
 import mimetypes
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Hashable
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from config import ADMIN_ID, Settings, Formats, MediaTypes, Security
@@ -28,6 +30,14 @@ def escape_html(text: str) -> str:
     return html.escape(str(text))
 
 
+def make_preview(text: str, length: int = 50) -> str:
+    """Xabarning qisqa ko'rinishi: kesilgan va HTML uchun ekranlangan"""
+    preview = escape_html(text[:length])
+    if len(text) > length:
+        preview += "..."
+    return preview
+
+
 def format_user_info(user) -> str:
     """Foydalanuvchi ma'lumotlarini formatlash"""
     name = f"{user.first_name} {user.last_name or ''}".strip()
@@ -94,23 +104,48 @@ def split_long_message(text: str, max_length: int = Settings.MAX_MESSAGE_LENGTH)
     return parts
 
 
-def format_datetime(dt_str: str, format_type: str = "full") -> str:
-    """Sana va vaqtni formatlash"""
+def format_datetime(dt_str, format_type: str = "full") -> str:
+    """Sana va vaqtni formatlash (epoch yoki matn)"""
     try:
-        dt = datetime.strptime(dt_str, Formats.DATETIME_FORMAT)
+        epoch = parse_timestamp(dt_str)
 
         if format_type == "date":
-            return dt.strftime(Formats.DATE_FORMAT)
+            return format_timestamp(epoch, Formats.DATE_FORMAT)
         elif format_type == "time":
-            return dt.strftime(Formats.TIME_FORMAT)
+            return format_timestamp(epoch, Formats.TIME_FORMAT)
         elif format_type == "short":
-            return dt.strftime("%d.%m %H:%M")
+            return format_timestamp(epoch, "%d.%m %H:%M")
         else:  # full
-            return dt.strftime("%d.%m.%Y %H:%M")
+            return format_timestamp(epoch, "%d.%m.%Y %H:%M")
     except:
         return dt_str
 
 
+def parse_timestamp(value) -> int:
+    """Vaqt belgisini Unix epoch soniyalariga o'girish (int yoki matn)
+
+    Eski fayllardagi DATETIME_FORMAT matnlari shu yerda o'giriladi;
+    bo'sh qiymat 0 ga teng.
+    """
+    if isinstance(value, int):
+        return value
+    if not value:
+        return 0
+    try:
+        dt = datetime.fromisoformat(value)  # Asosiy format uchun tez yo'l
+    except ValueError:
+        dt = datetime.strptime(value, Formats.DATETIME_FORMAT)
+    return int(dt.timestamp())
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(epoch: int, fmt: str = Formats.DATETIME_FORMAT) -> str:
+    """Unix epoch soniyalarini matnga o'girish (faqat ko'rsatishda, keshlangan)"""
+    if not epoch:
+        return ""
+    return datetime.fromtimestamp(epoch).strftime(fmt)
+
+
 def format_file_size(size_bytes: int) -> str:
     """Fayl hajmini formatlash"""
     if size_bytes < 1024:
@@ -316,7 +351,7 @@ def get_message_stats(messages: list) -> dict:
     total_length = sum(len(m.text) for m in messages)
     avg_length = total_length // len(messages) if messages else 0
 
-    last_message = max(messages, key=lambda x: x.timestamp) if messages else None
+    last_message = max(messages, key=lambda x: x.epoch) if messages else None
 
     return {
         'total': len(messages),
@@ -329,29 +364,32 @@ def get_message_stats(messages: list) -> dict:
     }
 
 
-def create_pagination_keyboard(items: list, page: int = 1, per_page: int = 10, callback_prefix: str = "page"):
-    """Sahifalash uchun keyboard yaratish"""
-    from aiogram.utils.keyboard import InlineKeyboardBuilder
+def create_pagination_keyboard(prev_data: Optional[str], next_data: Optional[str], label: Optional[str] = None):
+    """Sahifalash uchun keyboard yaratish
 
-    total_pages = (len(items) + per_page - 1) // per_page
+    Kursorli sahifalash: tugmalar callback data'sini chaqiruvchi tayyorlaydi
+    (Telegram cheklovi - 64 bayt). ``label`` - o'rtadagi joriy sahifa belgisi.
+    """
+    from aiogram.utils.keyboard import InlineKeyboardBuilder
 
     keyboard = InlineKeyboardBuilder()
 
     # Sahifa tugmalari
-    if total_pages > 1:
-        buttons = []
+    buttons = []
 
-        if page > 1:
-            buttons.append(("⬅️ Oldingi", f"{callback_prefix}_{page - 1}"))
+    if prev_data:
+        buttons.append(("⬅️ Oldingi", prev_data))
 
-        buttons.append((f"{page}/{total_pages}", "current_page"))
+    if label and (prev_data or next_data):
+        buttons.append((label, "current_page"))
 
-        if page < total_pages:
-            buttons.append(("Keyingi ➡️", f"{callback_prefix}_{page + 1}"))
+    if next_data:
+        buttons.append(("Keyingi ➡️", next_data))
 
-        for text, data in buttons:
-            keyboard.button(text=text, callback_data=data)
+    for text, data in buttons:
+        keyboard.button(text=text, callback_data=data)
 
+    if buttons:
         keyboard.adjust(len(buttons))
 
     return keyboard
@@ -372,6 +410,22 @@ def extract_user_id_from_message(text: str) -> Optional[int]:
     return None
 
 
+def get_content_key(message) -> Optional[Hashable]:
+    """Takroriy xabarlarni aniqlash uchun kontent kaliti
+
+    Matn uchun matnning o'zi, fayl uchun Telegram ``file_unique_id`` (qayta
+    yuborilgan yoki forward qilingan fayl uchun ham bir xil) va izoh.
+    Joylashuv, kontakt, so'rovnoma va zar har safar yangi xabar hisoblanadi.
+    """
+    if message.text:
+        return message.text
+    media = (message.photo[-1] if message.photo else None) or message.video or message.audio or \
+        message.voice or message.video_note or message.document or message.sticker or message.animation
+    if media is not None:
+        return "file", media.file_unique_id, message.caption
+    return None
+
+
 def generate_media_report(stats: dict, users_data: dict) -> str:
     """Media hisobot generatsiya qilish"""
     report_time = datetime.now().strftime(Formats.DATETIME_FORMAT)
@@ -475,12 +529,10 @@ def create_file_path(media_dir: Path, user_id: int, filename: str) -> Path:
     return file_path
 
 
-def get_time_ago(timestamp_str: str) -> str:
-    """Vaqt farqini hisoblash"""
+def get_time_ago(timestamp_str) -> str:
+    """Vaqt farqini hisoblash (epoch yoki matn)"""
     try:
-        timestamp = datetime.strptime(timestamp_str, Formats.DATETIME_FORMAT)
-        now = datetime.now()
-        diff = now - timestamp
+        diff = timedelta(seconds=time.time() - parse_timestamp(timestamp_str))
 
         if diff.days > 0:
             return f"{diff.days} kun oldin"
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Webhook rejimi (aiogram 3.8)
+Telegram yangilanishlarini aiohttp server orqali qabul qilish
+"""
+
+import hmac
+import json
+import signal
+import asyncio
+import logging
+import secrets
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from config import Settings
+from outbound import outbound
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """Yangilanishlarni qabul qiluvchi aiohttp ilova
+
+    - ``POST WEBHOOK_PATH``: ``X-Telegram-Bot-Api-Secret-Token`` sarlavhasi
+      tekshiriladi, yangilanish fon vazifasida ishlanadi va Telegram'ga
+      darhol ``200`` qaytadi
+    - ``GET /health``: holat, ishlanayotgan yangilanishlar va chiquvchi
+      navbat hajmi; to'xtash boshlanganda ``503`` (load balancer uchun)
+    - ``drain``: yangi yangilanishlarga ``503`` qaytarib (Telegram ularni
+      keyinroq qayta yuboradi), boshlanganlari tugashini kutish
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, secret: str, path: str = Settings.WEBHOOK_PATH):
+        self.dp = dp
+        self.bot = bot
+        self.secret = secret
+        self.path = path
+        self.draining = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._record_file = None
+        self.stats = {"updates": 0, "rejected": 0, "errors": 0}
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/health", self.handle_health)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Bitta yangilanishni qabul qilish"""
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            self.stats["rejected"] += 1
+            return web.Response(status=401)
+        if self.draining:
+            return web.Response(status=503)
+
+        body = await request.read()
+        try:
+            update = Update.model_validate(json.loads(body), context={"bot": self.bot})
+        except ValueError as e:
+            logger.warning(f"⚠️ Noto'g'ri yangilanish: {e}")
+            return web.Response(status=400)
+
+        if self._record_file is not None:
+            self._record_file.write(body.decode("utf-8").replace("\n", " ") + "\n")
+
+        self.stats["updates"] += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update):
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Yangilanish {update.update_id} ni ishlashda xatolik: {e}")
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Holat tekshiruvi"""
+        health = {
+            "status": "draining" if self.draining else "ok",
+            "inflight": len(self._tasks),
+            "outbound_pending": outbound.pending,
+            **self.stats,
+        }
+        # Chat navbatlari: kutayotganlar va kutish vaqtlari
+        chat_serial = self.dp.get("chat_serial")
+        if chat_serial is not None:
+            health["dispatch"] = chat_serial.stats()
+        admission = self.dp.get("admission")
+        if admission is not None:
+            health["admission"] = admission.stats
+        return web.json_response(health, status=503 if self.draining else 200)
+
+    def record_to(self, path):
+        """Qabul qilingan yangilanishlarni JSONL faylga yozib borish (replay uchun)"""
+        self._record_file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    async def drain(self, timeout: float = Settings.WEBHOOK_DRAIN_SECONDS):
+        """Yangi yangilanishlarni rad etib, boshlanganlarini ``timeout`` ichida tugatish"""
+        self.draining = True
+        if self._tasks:
+            logger.info(f"⏳ {len(self._tasks)} ta yangilanish tugashi kutilmoqda...")
+            done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+            if pending:
+                logger.warning(f"⚠️ {len(pending)} ta yangilanish to'xtatildi")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+
+
+def webhook_secret() -> str:
+    """WEBHOOK_SECRET yoki shu ishga tushish uchun tasodifiy qiymat"""
+    if Settings.WEBHOOK_SECRET:
+        return Settings.WEBHOOK_SECRET
+    logger.warning("⚠️ WEBHOOK_SECRET o'rnatilmagan: tasodifiy qiymat ishlatiladi "
+                   "(bir nechta nusxa uchun .env da bir xil qiymat bering)")
+    return secrets.token_urlsafe(32)
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, stop_event: Optional[asyncio.Event] = None):
+    """Webhook serverini ishga tushirib, to'xtash signalini kutish
+
+    Webhook o'chirilmaydi: to'xtab turgan paytdagi yangilanishlar Telegram'da
+    navbatda qoladi va keyingi nusxaga yetkaziladi.
+    """
+    secret = webhook_secret()
+    server = WebhookServer(dp, bot, secret)
+    if Settings.WEBHOOK_RECORD_PATH:
+        server.record_to(Settings.WEBHOOK_RECORD_PATH)
+
+    runner = web.AppRunner(server.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, Settings.WEBHOOK_HOST, Settings.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"🌐 Webhook server: {Settings.WEBHOOK_HOST}:{Settings.WEBHOOK_PORT}{Settings.WEBHOOK_PATH}")
+
+    if stop_event is None:
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except (NotImplementedError, AttributeError):
+                # Windows: Ctrl+C KeyboardInterrupt bo'lib keladi
+                pass
+
+    try:
+        if Settings.WEBHOOK_URL:
+            await bot.set_webhook(
+                Settings.WEBHOOK_URL.rstrip("/") + Settings.WEBHOOK_PATH,
+                secret_token=secret,
+                allowed_updates=dp.resolve_used_update_types(),
+                drop_pending_updates=False
+            )
+            logger.info(f"✅ Webhook o'rnatildi: {Settings.WEBHOOK_URL}")
+        else:
+            logger.warning("⚠️ WEBHOOK_URL o'rnatilmagan: webhook Telegram'da ro'yxatdan o'tkazilmadi")
+
+        await dp.emit_startup(bot=bot)
+        await stop_event.wait()
+        logger.info("🛑 To'xtash signali: yangilanishlar qabul qilinmaydi")
+    finally:
+        await server.drain()
+        await dp.emit_shutdown(bot=bot)
+        await runner.cleanup()